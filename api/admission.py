@@ -0,0 +1,240 @@
+"""
+Admission control for LLM-heavy endpoints
+Each controller caps concurrent work, keeps a bounded wait queue and limits how much of
+its capacity one client may hold; anything beyond that is rejected at once with 429 and Retry-After
+"""
+
+import asyncio
+import itertools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict, deque
+from typing import Optional
+
+from fastapi import HTTPException, Request
+
+CLIENT_ID_HEADER = "X-Client-Id"
+MAX_RETRY_AFTER_SECONDS = 300
+
+
+class AdmissionRejected(Exception):
+    """Request turned away by an admission controller"""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("seq", "loop", "future", "granted")
+
+    def __init__(self, seq: int, loop, future):
+        self.seq = seq
+        self.loop = loop
+        self.future = future
+        self.granted = False
+
+
+class Ticket:
+    """An admitted unit of work; release() frees its slot and may be called from any thread"""
+
+    def __init__(self, controller: "AdmissionController", client_id: str):
+        self.controller = controller
+        self.client_id = client_id
+        self.admitted_at = time.monotonic()
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self.controller._release(self.client_id, time.monotonic() - self.admitted_at)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded wait queue, granting freed slots to the least-served client first"""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int, queue_timeout: float,
+                 per_client_limit: Optional[int] = None):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        # Admitted plus queued requests one client may hold; defaults to half the capacity
+        self.per_client_limit = per_client_limit or max(1, math.ceil((max_concurrent + max_queue) / 2))
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._active = 0
+        self._queued = 0
+        self._client_active = defaultdict(int)
+        self._client_queued = defaultdict(int)
+        self._waiters = OrderedDict()
+        self._seq = itertools.count()
+        # Moving average of how long a slot is held, for Retry-After
+        self._avg_hold_seconds = 1.0
+        self._lock = threading.Lock()
+
+    async def acquire(self, client_id: str) -> Ticket:
+        """Admit now, wait in the queue for up to queue_timeout, or raise AdmissionRejected"""
+        with self._lock:
+            if self._client_active[client_id] + self._client_queued[client_id] >= self.per_client_limit:
+                raise self._reject_locked(f"Client {client_id} is at its share of {self.name} capacity")
+            if self._active < self.max_concurrent and not self._queued:
+                return self._admit_locked(client_id)
+            if self._queued >= self.max_queue:
+                raise self._reject_locked(f"Too many {self.name} requests in progress")
+
+            loop = asyncio.get_running_loop()
+            waiter = _Waiter(next(self._seq), loop, loop.create_future())
+            self._waiters.setdefault(client_id, deque()).append(waiter)
+            self._queued += 1
+            self._client_queued[client_id] += 1
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except BaseException as e:
+            with self._lock:
+                if not waiter.granted:
+                    self._remove_waiter_locked(client_id, waiter)
+                    if isinstance(e, asyncio.TimeoutError):
+                        self.timed_out += 1
+                        raise self._reject_locked(f"Timed out waiting for {self.name} capacity") from None
+                    raise
+            # Granted while timing out or being cancelled - hand the slot back if we cannot use it
+            if not isinstance(e, asyncio.TimeoutError):
+                Ticket(self, client_id).release()
+                raise
+        return Ticket(self, client_id)
+
+    def _admit_locked(self, client_id: str) -> Ticket:
+        self._active += 1
+        self._client_active[client_id] += 1
+        self.admitted += 1
+        return Ticket(self, client_id)
+
+    def _reject_locked(self, reason: str) -> AdmissionRejected:
+        self.rejected += 1
+        waits = (self._queued + 1) / max(self.max_concurrent, 1)
+        retry_after = min(MAX_RETRY_AFTER_SECONDS, max(1, math.ceil(self._avg_hold_seconds * waits)))
+        return AdmissionRejected(reason, retry_after)
+
+    def _remove_waiter_locked(self, client_id: str, waiter: _Waiter):
+        waiters = self._waiters.get(client_id)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del self._waiters[client_id]
+            self._queued -= 1
+            self._client_queued[client_id] -= 1
+            if not self._client_queued[client_id]:
+                del self._client_queued[client_id]
+
+    def _release(self, client_id: str, held_seconds: float):
+        with self._lock:
+            self._active -= 1
+            self._client_active[client_id] -= 1
+            if not self._client_active[client_id]:
+                del self._client_active[client_id]
+            self._avg_hold_seconds = 0.8 * self._avg_hold_seconds + 0.2 * held_seconds
+            self._grant_locked()
+
+    def _grant_locked(self):
+        while self._active < self.max_concurrent and self._queued:
+            # Fair share: the waiting client with the fewest admitted requests goes next, FIFO on ties
+            client_id = min(
+                self._waiters,
+                key=lambda client: (self._client_active[client], self._waiters[client][0].seq)
+            )
+            waiter = self._waiters[client_id][0]
+            self._remove_waiter_locked(client_id, waiter)
+            self._active += 1
+            self._client_active[client_id] += 1
+            self.admitted += 1
+            waiter.granted = True
+            waiter.loop.call_soon_threadsafe(_resolve, waiter.future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "queue_timeout_seconds": self.queue_timeout,
+                "per_client_limit": self.per_client_limit,
+                "active": self._active,
+                "queued": self._queued,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "clients": {
+                    client: {"active": self._client_active.get(client, 0),
+                             "queued": self._client_queued.get(client, 0)}
+                    for client in set(self._client_active) | set(self._client_queued)
+                }
+            }
+
+
+def _controller_from_env(name: str, max_concurrent: int, max_queue: int, queue_timeout: float) -> AdmissionController:
+    """Controller whose limits can be overridden with ADMISSION_<NAME>_* variables"""
+    prefix = f"ADMISSION_{name.upper()}_"
+    per_client = os.getenv(prefix + "PER_CLIENT")
+    return AdmissionController(
+        name,
+        max_concurrent=int(os.getenv(prefix + "CONCURRENCY", str(max_concurrent))),
+        max_queue=int(os.getenv(prefix + "QUEUE", str(max_queue))),
+        queue_timeout=float(os.getenv(prefix + "QUEUE_TIMEOUT", str(queue_timeout))),
+        per_client_limit=int(per_client) if per_client else None
+    )
+
+
+# Classification runs hold their slot until the background run finishes; the classifier pool is their queue
+controllers = {
+    "lc_upload": _controller_from_env("lc_upload", max_concurrent=4, max_queue=8, queue_timeout=10),
+    "export_upload": _controller_from_env("export_upload", max_concurrent=2, max_queue=4, queue_timeout=10),
+    "classify": _controller_from_env("classify", max_concurrent=8, max_queue=0, queue_timeout=0),
+}
+
+
+def client_id_for(request: Request) -> str:
+    """Client identity for fair share: the X-Client-Id header, else the peer address"""
+    client_id = request.headers.get(CLIENT_ID_HEADER)
+    if client_id:
+        return client_id
+    return request.client.host if request.client else "unknown"
+
+
+async def acquire(name: str, request: Request) -> Ticket:
+    """Admit a request to the named controller or raise 429 with Retry-After"""
+    try:
+        return await controllers[name].acquire(client_id_for(request))
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=e.reason,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+
+def admit(name: str):
+    """Dependency that holds a slot of the named controller for the duration of the request"""
+    async def dependency(request: Request):
+        ticket = await acquire(name, request)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+    return dependency
+
+
+def stats() -> dict:
+    return {name: controller.stats() for name, controller in controllers.items()}
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for LC-Scanner read endpoints
+Compares FastAPI's response_model path (pydantic validation + JSON encoding) with the
+orjson fast path on large LC and classification run lists, using an in-memory SQLite database
+
+Usage: python bench_serialization.py [--lcs 1000] [--runs 200] [--docs-per-run 25] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, selectinload
+
+import serialization
+from models import (
+    Base,
+    LetterOfCredit as LCModel,
+    LCDocumentRequirement as LCRequirementModel,
+    ExportDocument as ExportDocModel,
+    ClassificationRun as ClassificationRunModel,
+    DocumentClassification as ClassificationModel
+)
+from schemas import LetterOfCredit, ClassificationRun
+
+
+def seed(db, num_lcs: int, num_runs: int, docs_per_run: int):
+    """LCs with requirements, plus classification runs with one classification per document"""
+    lcs = [
+        LCModel(
+            lc_reference=f"BENCH-{i:06d}",
+            applicant="Applicant Trading Co. " * 4,
+            beneficiary="Beneficiary Export Ltd. " * 4,
+            goods_description="Goods as per proforma invoice " * 20,
+            rulebook_versions={"UCP": "600"}
+        )
+        for i in range(num_lcs)
+    ]
+    db.add_all(lcs)
+    db.flush()
+
+    db.add_all([
+        LCRequirementModel(
+            lc_id=lc.id,
+            document_id=f"doc_{j:03d}",
+            name=f"Requirement {j}",
+            description="Signed commercial invoice in triplicate",
+            validation_criteria=["signed", "three originals"]
+        )
+        for lc in lcs for j in range(5)
+    ])
+    db.flush()
+
+    for i in range(num_runs):
+        lc = lcs[i % num_lcs]
+        requirement = lc.document_requirements[0]
+        run = ClassificationRunModel(
+            lc_id=lc.id, total_export_docs=docs_per_run, total_lc_requirements=5, status="completed"
+        )
+        docs = [
+            ExportDocModel(
+                lc_id=lc.id,
+                document_id=f"bench_{i}_{j}",
+                filename=f"bench_{i}_{j}.pdf",
+                document_name="Commercial Invoice",
+                summary="Invoice for shipment " * 5,
+                full_description="Line item details " * 50
+            )
+            for j in range(docs_per_run)
+        ]
+        db.add(run)
+        db.add_all(docs)
+        db.flush()
+        db.add_all([
+            ClassificationModel(
+                export_document_id=doc.id,
+                lc_requirement_id=requirement.id,
+                classification_run_id=run.id,
+                confidence_score=0.87,
+                reasoning="Matches the invoice requirement",
+                is_matched=True
+            )
+            for doc in docs
+        ])
+    db.commit()
+
+
+def standard_path(schema, rows) -> bytes:
+    """What FastAPI does for response_model=List[schema]"""
+    adapter = TypeAdapter(List[schema])
+    validated = adapter.validate_python(rows, from_attributes=True)
+    return json.dumps(adapter.dump_python(validated, mode="json")).encode("utf-8")
+
+
+def fast_path(schema, rows) -> bytes:
+    return orjson.dumps(serialization.to_dicts(schema, rows))
+
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark response serialization paths")
+    parser.add_argument("--lcs", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--docs-per-run", type=int, default=25)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    print(f"🌱 Seeding {args.lcs} LCs and {args.runs} runs x {args.docs_per_run} classifications...")
+    seed(db, args.lcs, args.runs, args.docs_per_run)
+
+    lcs = db.query(LCModel).options(selectinload(LCModel.document_requirements)).all()
+    runs = db.query(ClassificationRunModel).options(
+        selectinload(ClassificationRunModel.classifications).selectinload(ClassificationModel.export_document),
+        selectinload(ClassificationRunModel.classifications).selectinload(ClassificationModel.lc_requirement)
+    ).all()
+
+    print(f"\n{'payload':<28}{'standard':>12}{'fast':>12}{'speedup':>10}{'size':>12}")
+    for label, schema, rows in (
+        (f"{len(lcs)} LCs", LetterOfCredit, lcs),
+        (f"{len(runs)} classification runs", ClassificationRun, runs),
+    ):
+        assert json.loads(standard_path(schema, rows)) == json.loads(fast_path(schema, rows))
+        standard = best_of(args.repeat, standard_path, schema, rows)
+        fast = best_of(args.repeat, fast_path, schema, rows)
+        size = len(fast_path(schema, rows)) / 1024
+        print(f"{label:<28}{standard * 1000:>10.1f}ms{fast * 1000:>10.1f}ms{standard / fast:>9.1f}x{size:>10.0f}KB")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
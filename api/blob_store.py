@@ -0,0 +1,151 @@
+"""
+Content-addressed store for original PDFs
+Files live under BLOB_STORE_DIR in two-level sharded directories named by their SHA-256
+(ab/cd/abcd...), so an identical upload is stored once. The blobs table counts the export documents
+and LCs referencing each file; collect_garbage() removes files nothing references any more.
+Extraction reads blobs in place through PDFExtractor's memory map instead of copying them
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import Blob as BlobModel
+
+BLOB_STORE_DIR = os.getenv("BLOB_STORE_DIR", str(Path(__file__).parent / "data" / "blobs"))
+# Unreferenced blobs younger than this are kept, so an upload that re-uses a file between its write
+# and its commit never loses it to a concurrent collection
+BLOB_GC_GRACE_SECONDS = int(os.getenv("BLOB_GC_GRACE_SECONDS", "3600"))
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """Sharded directory of files named by the SHA-256 of their content"""
+
+    def __init__(self, root: str = BLOB_STORE_DIR):
+        self.root = Path(root)
+
+    def path(self, sha256: str) -> Path:
+        if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+            raise ValueError(f"Not a SHA-256 hex digest: {sha256!r}")
+        return self.root / sha256[:2] / sha256[2:4] / sha256
+
+    def exists(self, sha256: str) -> bool:
+        return self.path(sha256).exists()
+
+    def put_bytes(self, data: bytes) -> Tuple[str, int]:
+        """Store content unless already present; returns (sha256, size)"""
+        sha256 = hashlib.sha256(data).hexdigest()
+        self._write(sha256, lambda out: out.write(data))
+        return sha256, len(data)
+
+    def put_file(self, source: Path) -> Tuple[str, int]:
+        """Store a file's content unless already present; returns (sha256, size)"""
+        digest = hashlib.sha256()
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        sha256 = digest.hexdigest()
+
+        def copy(out):
+            with open(source, "rb") as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                    out.write(chunk)
+
+        self._write(sha256, copy)
+        return sha256, Path(source).stat().st_size
+
+    def _write(self, sha256: str, write):
+        target = self.path(sha256)
+        if target.exists():
+            # Refresh the mtime so a concurrent collection sees the blob as recently used
+            os.utime(target)
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write beside the target and rename, so readers never see a partial file
+        fd, partial = tempfile.mkstemp(dir=target.parent, prefix=".partial-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                write(out)
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(partial, target)
+        except BaseException:
+            Path(partial).unlink(missing_ok=True)
+            raise
+
+    def files(self) -> Iterator[Path]:
+        if self.root.exists():
+            yield from (path for path in self.root.glob("??/??/*") if not path.name.startswith("."))
+
+
+# Shared store for the API process
+blob_store = BlobStore()
+
+
+def add_reference(db: Session, sha256: str, size_bytes: int):
+    """Count one more row referencing a blob, in the session's transaction"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert(BlobModel)
+    elif dialect == "sqlite":
+        insert = sqlite.insert(BlobModel)
+    else:
+        raise HTTPException(status_code=500, detail=f"Blob references are not supported on {dialect}")
+    db.execute(insert.values(sha256=sha256, size_bytes=size_bytes, ref_count=1).on_conflict_do_update(
+        index_elements=[BlobModel.sha256],
+        set_={"ref_count": BlobModel.ref_count + 1, "last_released_at": None}
+    ))
+
+
+def release_reference(db: Session, sha256: Optional[str]):
+    """Count one row fewer referencing a blob; the file goes at the next collect_garbage()"""
+    if not sha256:
+        return
+    db.execute(
+        update(BlobModel).where(BlobModel.sha256 == sha256)
+        .values(ref_count=BlobModel.ref_count - 1, last_released_at=datetime.utcnow())
+    )
+
+
+def collect_garbage(db: Session, store: BlobStore = blob_store,
+                    grace_seconds: int = BLOB_GC_GRACE_SECONDS) -> List[str]:
+    """Delete unreferenced blobs (rows and files) older than the grace period; returns their digests"""
+    cutoff = datetime.utcnow() - timedelta(seconds=grace_seconds)
+    unreferenced = db.execute(
+        select(BlobModel.sha256).where(BlobModel.ref_count <= 0, BlobModel.last_released_at < cutoff)
+    ).scalars().all()
+    if unreferenced:
+        db.execute(delete(BlobModel).where(BlobModel.sha256.in_(unreferenced), BlobModel.ref_count <= 0))
+    db.commit()
+
+    known = set(db.execute(select(BlobModel.sha256)).scalars())
+    removed = []
+    for path in store.files():
+        if path.name in known or path.stat().st_mtime > time.time() - grace_seconds:
+            continue
+        path.unlink(missing_ok=True)
+        removed.append(path.name)
+    return removed
+
+
+def main():
+    """Remove stored files no export document or LC references any more: python blob_store.py"""
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        removed = collect_garbage(db)
+    print(f"🗑️  Removed {len(removed)} unreferenced blobs from {blob_store.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,511 @@
+"""
+Streaming bulk ingestion for LC-Scanner
+Parses NDJSON or extract_document.py --batch JSON incrementally and loads
+LCs, requirements and export documents with batched multi-row INSERT ... ON CONFLICT DO NOTHING
+"""
+
+import codecs
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+import embeddings
+import events
+import mt700
+from document_ids import allocate_document_ids
+from models import (
+    LetterOfCredit as LCModel,
+    LCDocumentRequirement as LCRequirementModel,
+    ExportDocument as ExportDocModel
+)
+from schemas import LetterOfCreditBase
+
+BULK_BATCH_SIZE = int(os.getenv("BULK_BATCH_SIZE", "500"))
+MAX_BULK_BATCH_SIZE = 5000
+# A single pending JSON value larger than this is treated as malformed input
+MAX_RECORD_BYTES = int(os.getenv("BULK_MAX_RECORD_BYTES", str(64 * 1024 * 1024)))
+READ_CHUNK_SIZE = 64 * 1024
+
+# Errors kept in the ingest report; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+# LC reference -> id lookups remembered across batches
+MAX_CACHED_LC_IDS = 10000
+
+LC_FIELDS = [name for name in LetterOfCreditBase.model_fields]
+
+_INCOMPLETE = object()
+
+
+class BulkIngestError(ValueError):
+    """Input stream that cannot be parsed any further"""
+
+
+class NDJSONParser:
+    """Incremental parser for newline-delimited JSON; one record per line"""
+
+    def __init__(self):
+        self._buffer = ""
+        self.line_number = 0
+        self.errors = []
+        self.metadata = {}
+
+    def feed(self, text: str) -> List[dict]:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        if len(self._buffer) > MAX_RECORD_BYTES:
+            raise BulkIngestError(f"Line {self.line_number + 1} exceeds {MAX_RECORD_BYTES} bytes")
+        return [record for record in map(self._parse_line, lines) if record is not None]
+
+    def close(self) -> List[dict]:
+        rest, self._buffer = self._buffer, ""
+        record = self._parse_line(rest)
+        return [record] if record is not None else []
+
+    def _parse_line(self, line: str) -> Optional[dict]:
+        self.line_number += 1
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            self.errors.append(f"Line {self.line_number}: invalid JSON ({e.msg})")
+            return None
+        if not isinstance(record, dict):
+            self.errors.append(f"Line {self.line_number}: expected a JSON object")
+            return None
+        return record
+
+
+class BatchJSONParser:
+    """
+    Incremental parser for extract_document.py --batch output
+    Yields entries of the top-level "documents" array as soon as each one is complete;
+    other top-level members are kept in metadata. A top-level object without
+    "documents" (e.g. output/LC.json) is returned as a single record on close()
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._state = "start"
+        self._key = None
+        # Skip decode attempts until the pending value has doubled in size
+        self._retry_at = 0
+        self._decoder = json.JSONDecoder()
+        self.documents_seen = False
+        self.errors = []
+        self.metadata = {}
+
+    def feed(self, text: str) -> List[dict]:
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        if len(self._buffer) < self._retry_at:
+            return []
+        return self._parse(final=False)
+
+    def close(self) -> List[dict]:
+        records = self._parse(final=True)
+        if self._state != "done":
+            raise BulkIngestError("Unexpected end of JSON input")
+        if not self.documents_seen:
+            records.append(self.metadata)
+            self.metadata = {}
+        return records
+
+    def _skip_whitespace(self):
+        while self._pos < len(self._buffer) and self._buffer[self._pos] in " \t\r\n":
+            self._pos += 1
+
+    def _expect(self, char: str):
+        if self._buffer[self._pos] != char:
+            raise BulkIngestError(f"Expected '{char}' but found '{self._buffer[self._pos]}'")
+        self._pos += 1
+
+    def _decode(self, final: bool):
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError as e:
+            if final:
+                raise BulkIngestError(f"Invalid JSON: {e.msg}")
+            if len(self._buffer) - self._pos > MAX_RECORD_BYTES:
+                raise BulkIngestError(f"JSON value exceeds {MAX_RECORD_BYTES} bytes or is malformed")
+            self._retry_at = 2 * (len(self._buffer) - self._pos)
+            return _INCOMPLETE
+        # A number at the end of the buffer may still be missing digits
+        if (not final and end == len(self._buffer)
+                and isinstance(value, (int, float)) and not isinstance(value, bool)):
+            return _INCOMPLETE
+        self._pos = end
+        self._retry_at = 0
+        return value
+
+    def _parse(self, final: bool) -> List[dict]:
+        records = []
+        while True:
+            self._skip_whitespace()
+            if self._pos >= len(self._buffer):
+                return records
+            char = self._buffer[self._pos]
+
+            if self._state == "start":
+                self._expect("{")
+                self._state = "key"
+            elif self._state == "key":
+                if char == "}":
+                    self._pos += 1
+                    self._state = "done"
+                elif char == ",":
+                    self._pos += 1
+                else:
+                    key = self._decode(final)
+                    if key is _INCOMPLETE:
+                        return records
+                    if not isinstance(key, str):
+                        raise BulkIngestError("Expected an object key")
+                    self._key = key
+                    self._state = "colon"
+            elif self._state == "colon":
+                self._expect(":")
+                self._state = "documents_open" if self._key == "documents" else "value"
+            elif self._state == "value":
+                value = self._decode(final)
+                if value is _INCOMPLETE:
+                    return records
+                self.metadata[self._key] = value
+                self._state = "key"
+            elif self._state == "documents_open":
+                self._expect("[")
+                self.documents_seen = True
+                self._state = "documents"
+            elif self._state == "documents":
+                if char == "]":
+                    self._pos += 1
+                    self._state = "key"
+                elif char == ",":
+                    self._pos += 1
+                else:
+                    document = self._decode(final)
+                    if document is _INCOMPLETE:
+                        return records
+                    if isinstance(document, dict):
+                        records.append(document)
+                    else:
+                        self.errors.append("Skipped a documents entry that is not a JSON object")
+            else:
+                raise BulkIngestError("Unexpected data after the top-level JSON object")
+
+
+def make_parser(ingest_format: str):
+    """Parser for "ndjson" or "batch" input"""
+    if ingest_format == "ndjson":
+        return NDJSONParser()
+    if ingest_format == "batch":
+        return BatchJSONParser()
+    raise BulkIngestError(f"Unsupported format: {ingest_format}")
+
+
+def format_from_content_type(content_type: Optional[str]) -> str:
+    """Pick the input format from a Content-Type header; JSON means --batch output"""
+    if content_type and "ndjson" in content_type.lower():
+        return "ndjson"
+    return "batch"
+
+
+def _insert_ignore(db: Session, model, *conflict_columns: str):
+    """INSERT ... ON CONFLICT (columns) DO NOTHING for the session's dialect"""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(model.__table__).on_conflict_do_nothing(index_elements=list(conflict_columns))
+    if dialect == "sqlite":
+        return sqlite.insert(model.__table__).on_conflict_do_nothing(index_elements=list(conflict_columns))
+    raise BulkIngestError(f"Bulk ingest is not supported on {dialect}")
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+class BulkIngestor:
+    """
+    Accumulates parsed records and writes them in batched transactions
+    LCs are matched on lc_reference and export documents on their LC and batch document_id (kept as
+    source_document_id; the stored document_id is allocated per LC as for uploads). Existing rows are left untouched
+    """
+
+    def __init__(self, db: Session, batch_size: int = BULK_BATCH_SIZE,
+                 default_lc_reference: Optional[str] = None):
+        self.db = db
+        self.batch_size = batch_size
+        self.default_lc_reference = default_lc_reference
+        self.last_lc_reference = None
+        self.touched_lc_ids = set()
+        self.errors = []
+        self.stats = {
+            "records": 0,
+            "batches": 0,
+            "lcs_created": 0,
+            "lcs_existing": 0,
+            "requirements_created": 0,
+            "export_documents_created": 0,
+            "export_documents_existing": 0,
+            "records_rejected": 0
+        }
+        self._pending_lcs = {}
+        self._pending_documents = []
+        self._lc_ids = {}
+        self._started = time.perf_counter()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending_lcs) + len(self._pending_documents)
+
+    def reject(self, message: str):
+        self.stats["records_rejected"] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def add(self, record: dict, metadata: Optional[dict] = None):
+        """Queue one LC analysis or export document entry"""
+        self.stats["records"] += 1
+        extraction = record.get("extraction_result") if "extraction_result" in record else record
+
+        if not isinstance(extraction, dict):
+            reason = record.get("error") or "no extraction_result"
+            self.reject(f"{record.get('document_id', 'record')}: {reason}")
+            return
+
+        if extraction.get("LC_REFERENCE"):
+            lc_row = {field: extraction.get(field.upper()) for field in LC_FIELDS}
+            lc_row.update(mt700.typed_columns(lc_row))
+            requirements = extraction.get("DOCUMENTS_REQUIRED") or []
+            # First occurrence wins, matching ON CONFLICT DO NOTHING against the table
+            self._pending_lcs.setdefault(lc_row["lc_reference"], (lc_row, requirements))
+            self.last_lc_reference = lc_row["lc_reference"]
+            return
+
+        document_id = record.get("document_id")
+        lc_reference = record.get("lc_reference") or self.default_lc_reference
+        if not document_id:
+            self.reject("Record is neither an LC analysis nor an export document")
+            return
+        if not lc_reference:
+            self.reject(f"{document_id}: no lc_reference on the record or the request")
+            return
+
+        file_info = record.get("file_info") or {}
+        self._pending_documents.append((lc_reference, {
+            "source_document_id": document_id,
+            "filename": file_info.get("filename") or document_id,
+            "file_path": file_info.get("file_path"),
+            "file_size_bytes": file_info.get("file_size_bytes"),
+            "document_name": extraction.get("document_name"),
+            "summary": extraction.get("summary"),
+            "full_description": extraction.get("full_description"),
+            "extraction_timestamp": _parse_timestamp(file_info.get("extraction_timestamp")),
+            "extraction_metadata": {
+                "original_metadata": metadata or record.get("extraction_metadata") or {},
+                "file_info": file_info
+            }
+        }))
+
+    def flush(self):
+        """Write pending records in one transaction"""
+        if not self.pending:
+            return
+        rows_before = self.rows_written
+        try:
+            self._flush_lcs()
+            self._flush_documents()
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+        self.stats["batches"] += 1
+
+        elapsed = time.perf_counter() - self._started
+        print(f"📦 Batch {self.stats['batches']}: {self.rows_written - rows_before} rows "
+              f"({self.rows_written / elapsed if elapsed else 0:.0f} rows/sec overall)")
+
+    def _flush_lcs(self):
+        pending, self._pending_lcs = self._pending_lcs, {}
+        if not pending:
+            return
+
+        rows = [lc_row for lc_row, _ in pending.values()]
+        statement = _insert_ignore(self.db, LCModel, "lc_reference").returning(LCModel.id, LCModel.lc_reference)
+        created = {reference: lc_id for lc_id, reference in self.db.execute(statement, rows)}
+        self.stats["lcs_created"] += len(created)
+        self.stats["lcs_existing"] += len(pending) - len(created)
+
+        requirement_rows = [
+            {
+                "lc_id": lc_id,
+                "document_id": requirement.get("document_id"),
+                "name": requirement.get("name"),
+                "description": requirement.get("description"),
+                "quantity": requirement.get("quantity", 1),
+                "validation_criteria": requirement.get("validation_criteria", []),
+                # Core inserts skip the ORM events that embed requirements
+                "embedding": embeddings.to_blob(embeddings.embed(
+                    embeddings.requirement_text(requirement.get("name"), requirement.get("description"))
+                ))
+            }
+            for reference, lc_id in created.items()
+            for requirement in pending[reference][1]
+        ]
+        if requirement_rows:
+            self.db.execute(LCRequirementModel.__table__.insert(), requirement_rows)
+            self.stats["requirements_created"] += len(requirement_rows)
+
+        self._remember_lc_ids(created)
+        self.touched_lc_ids.update(created.values())
+
+    def _flush_documents(self):
+        pending, self._pending_documents = self._pending_documents, []
+        if not pending:
+            return
+
+        unknown = {reference for reference, _ in pending if reference not in self._lc_ids}
+        if unknown:
+            self._remember_lc_ids(dict(self.db.execute(
+                select(LCModel.lc_reference, LCModel.id).where(LCModel.lc_reference.in_(unknown))
+            ).all()))
+
+        # First occurrence of an (LC, batch id) pair wins, matching ON CONFLICT DO NOTHING against the table
+        rows = {}
+        resolved = 0
+        for reference, row in pending:
+            lc_id = self._lc_ids.get(reference)
+            if lc_id is None:
+                self.reject(f"{row['source_document_id']}: LC {reference} not found")
+                continue
+            resolved += 1
+            rows.setdefault((lc_id, row["source_document_id"]), {**row, "lc_id": lc_id})
+        if not rows:
+            return
+        existing = set(self.db.execute(
+            select(ExportDocModel.lc_id, ExportDocModel.source_document_id).where(
+                ExportDocModel.lc_id.in_({lc_id for lc_id, _ in rows}),
+                ExportDocModel.source_document_id.in_({source_id for _, source_id in rows})
+            )
+        ).all())
+        new_rows = [row for key, row in rows.items() if key not in existing]
+        self.stats["export_documents_existing"] += resolved - len(new_rows)
+        if not new_rows:
+            return
+
+        # Core inserts skip the ORM events that embed export documents
+        for row in new_rows:
+            row["embedding"] = embeddings.to_blob(embeddings.embed(
+                embeddings.document_text(row["document_name"], row["summary"])
+            ))
+
+        # Numbered per LC like uploads; allocated last so the counter rows stay locked only until the commit
+        by_lc: Dict[int, list] = {}
+        for row in new_rows:
+            by_lc.setdefault(row["lc_id"], []).append(row)
+        for lc_id, lc_rows in by_lc.items():
+            for row, document_id in zip(lc_rows, allocate_document_ids(self.db, lc_id, len(lc_rows))):
+                row["document_id"] = document_id
+
+        statement = _insert_ignore(self.db, ExportDocModel, "lc_id", "source_document_id").returning(ExportDocModel.lc_id)
+        created_lc_ids = self.db.execute(statement, new_rows).scalars().all()
+        self.stats["export_documents_created"] += len(created_lc_ids)
+        # Inserted by a concurrent ingest since the lookup above
+        self.stats["export_documents_existing"] += len(new_rows) - len(created_lc_ids)
+        self.touched_lc_ids.update(created_lc_ids)
+        # New LCs without documents are not announced: no worker could have cached them before this commit
+        for lc_id in sorted(set(created_lc_ids)):
+            events.notify_changed(self.db, lc_id, "documents_added")
+
+    def _remember_lc_ids(self, lc_ids: Dict[str, int]):
+        if len(self._lc_ids) + len(lc_ids) > MAX_CACHED_LC_IDS:
+            self._lc_ids.clear()
+        self._lc_ids.update(lc_ids)
+
+    @property
+    def rows_written(self) -> int:
+        return (self.stats["lcs_created"] + self.stats["requirements_created"]
+                + self.stats["export_documents_created"])
+
+    def collect_parser_errors(self, parser):
+        """Count records the parser had to skip as rejected"""
+        for message in parser.errors:
+            self.reject(message)
+        parser.errors = []
+
+    def summary(self) -> dict:
+        """Counts, throughput and the first rejected records"""
+        elapsed = time.perf_counter() - self._started
+        return {
+            **self.stats,
+            "rows_written": self.rows_written,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(self.rows_written / elapsed, 1) if elapsed else None,
+            "errors": list(self.errors)
+        }
+
+
+async def ingest_stream(chunks: AsyncIterator[bytes], parser, ingestor: BulkIngestor, run_sync):
+    """
+    Feed an async byte stream through a parser into the ingestor
+    run_sync runs blocking batch writes off the event loop (e.g. starlette's run_in_threadpool)
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        for record in parser.feed(decoder.decode(chunk)):
+            ingestor.add(record, parser.metadata.get("extraction_metadata"))
+        if ingestor.pending >= ingestor.batch_size:
+            await run_sync(ingestor.flush)
+
+    for record in parser.feed(decoder.decode(b"", final=True)) + parser.close():
+        ingestor.add(record, parser.metadata.get("extraction_metadata"))
+    await run_sync(ingestor.flush)
+    ingestor.collect_parser_errors(parser)
+
+
+def ingest_file(path: Path, parser, ingestor: BulkIngestor):
+    """Feed a file through a parser into the ingestor in fixed-size chunks"""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            for record in parser.feed(chunk):
+                ingestor.add(record, parser.metadata.get("extraction_metadata"))
+            if ingestor.pending >= ingestor.batch_size:
+                ingestor.flush()
+
+    for record in parser.close():
+        ingestor.add(record, parser.metadata.get("extraction_metadata"))
+    ingestor.flush()
+    ingestor.collect_parser_errors(parser)
+
+
+def populate_from_output(db: Session, output_dir: Path) -> BulkIngestor:
+    """Load output/LC.json and output/Export_docs.json, attaching the export documents to that LC"""
+    ingestor = BulkIngestor(db)
+
+    lc_file = output_dir / "LC.json"
+    export_docs_file = output_dir / "Export_docs.json"
+    for path in (lc_file, export_docs_file):
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {path}")
+
+    ingest_file(lc_file, BatchJSONParser(), ingestor)
+    ingestor.default_lc_reference = ingestor.last_lc_reference
+    ingest_file(export_docs_file, BatchJSONParser(), ingestor)
+    return ingestor
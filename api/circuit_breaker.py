@@ -0,0 +1,203 @@
+"""
+Circuit breaker for LLM provider calls
+Tracks the outcome of recent calls; when too many fail or run slower than the slow-call threshold the
+breaker opens and calls fail at once instead of tying up a worker. After a cool-down a single probe
+call is let through and its outcome decides whether the breaker closes again
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from fastapi import HTTPException
+from langchain_core.callbacks import BaseCallbackHandler
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Call refused because the breaker is open"""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} circuit is open; retry in {retry_after}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Opens on failure rate over a sliding window of calls; slow calls count as failures"""
+
+    def __init__(self, name: str, failure_rate: float = 0.5, slow_call_seconds: float = 60,
+                 window: int = 20, min_calls: int = 5, open_seconds: float = 30):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.opened_count = 0
+        self.rejected = 0
+        self._outcomes = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state_locked()
+
+    def _current_state_locked(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+        return self._state
+
+    def _retry_after_locked(self) -> int:
+        remaining = self.open_seconds - (time.monotonic() - self._opened_at)
+        return max(1, math.ceil(remaining))
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go ahead now"""
+        with self._lock:
+            state = self._current_state_locked()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.rejected += 1
+            raise CircuitOpenError(self.name, self._retry_after_locked())
+
+    def check(self):
+        """Raise CircuitOpenError if the breaker is open, without taking the half-open probe"""
+        with self._lock:
+            if self._current_state_locked() == OPEN:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self._retry_after_locked())
+
+    def record(self, succeeded: bool, seconds: float = 0.0):
+        """Record the outcome of a call let through by before_call"""
+        failed = not succeeded or seconds >= self.slow_call_seconds
+        with self._lock:
+            state = self._current_state_locked()
+            if state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._open_locked()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            if state == OPEN:
+                return
+
+            self._outcomes.append(failed)
+            if len(self._outcomes) >= self.min_calls and \
+                    sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                self._open_locked()
+
+    def _open_locked(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened_count += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state_locked()
+            return {
+                "state": state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": sum(self._outcomes),
+                "failure_rate_threshold": self.failure_rate,
+                "slow_call_seconds": self.slow_call_seconds,
+                "retry_after_seconds": self._retry_after_locked() if state == OPEN else 0,
+                "opened_count": self.opened_count,
+                "rejected": self.rejected
+            }
+
+
+class CircuitBreakerHandler(BaseCallbackHandler):
+    """LangChain callback guarding every LLM call with a breaker; refusing a call raises out of invoke()"""
+
+    raise_error = True
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        self._started = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id):
+        self.breaker.before_call()
+        with self._lock:
+            self._started[run_id] = time.perf_counter()
+
+    def _finish(self, run_id, succeeded: bool):
+        with self._lock:
+            started = self._started.pop(run_id, None)
+        if started is not None:
+            self.breaker.record(succeeded, time.perf_counter() - started)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, True)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, False)
+
+
+def open_error_in(error: BaseException) -> Optional[CircuitOpenError]:
+    """The CircuitOpenError behind an exception that may have been wrapped by the caller"""
+    while error is not None:
+        if isinstance(error, CircuitOpenError):
+            return error
+        error = error.__cause__ or error.__context__
+    return None
+
+
+def unavailable(error: CircuitOpenError) -> HTTPException:
+    """503 telling the client when the breaker will next let a call through"""
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(error.retry_after)}
+    )
+
+
+def require_closed(breaker: CircuitBreaker):
+    """Dependency failing fast with 503 while the breaker is open"""
+    def dependency():
+        try:
+            breaker.check()
+        except CircuitOpenError as e:
+            raise unavailable(e)
+    return dependency
+
+
+def _breaker_from_env(name: str) -> CircuitBreaker:
+    """Breaker whose thresholds can be overridden with <NAME>_BREAKER_* variables"""
+    prefix = f"{name.upper()}_BREAKER_"
+    return CircuitBreaker(
+        name,
+        failure_rate=float(os.getenv(prefix + "FAILURE_RATE", "0.5")),
+        slow_call_seconds=float(os.getenv(prefix + "SLOW_CALL_SECONDS", "60")),
+        window=int(os.getenv(prefix + "WINDOW", "20")),
+        min_calls=int(os.getenv(prefix + "MIN_CALLS", "5")),
+        open_seconds=float(os.getenv(prefix + "OPEN_SECONDS", "30"))
+    )
+
+
+# Shared by document extraction and classification, which both call the same provider
+llm_breaker = _breaker_from_env("llm")
+llm_breaker_handler = CircuitBreakerHandler(llm_breaker)
@@ -0,0 +1,259 @@
+"""
+Background classification runs for the API
+Executes the lc_document_classifier LangGraph on a bounded thread pool and tracks per-run progress in-process
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from database import READ_YOUR_WRITES_SECONDS, SessionLocal, engine, stick_to_primary
+from models import (
+    ClassificationRun as ClassificationRunModel,
+    DocumentClassification as ClassificationModel
+)
+from response_cache import response_cache
+import circuit_breaker
+import events
+import metrics
+import tracing
+
+CLASSIFIER_DIR = Path(__file__).parent.parent / "lc_document_classifier"
+CLASSIFIER_MAX_WORKERS = int(os.getenv("CLASSIFIER_MAX_WORKERS", "4"))
+CLASSIFIER_MODEL_NAME = "langchain_gpt-4o-mini"
+# Callbacks of every LLM call. The breaker goes first: a call it refuses raises out of the callback chain,
+# so a handler after it would never hear of the call, while one before it would wait for an end that never comes
+LLM_CALLBACKS = [circuit_breaker.llm_breaker_handler, metrics.llm_metrics]
+
+# Progress entries kept for finished runs before the oldest are forgotten
+MAX_TRACKED_RUNS = 1000
+
+_executor = ThreadPoolExecutor(max_workers=CLASSIFIER_MAX_WORKERS, thread_name_prefix="classifier")
+_progress = OrderedDict()
+_progress_lock = threading.Lock()
+# Runs submitted to the executor that have not finished yet: run_id -> (lc_id, future, document selection)
+_pending_runs = {}
+_pending_lock = threading.Lock()
+
+
+def _set_progress(run_id: int, **fields):
+    with _progress_lock:
+        entry = _progress.setdefault(run_id, {"run_id": run_id})
+        entry.update(fields, updated_at=datetime.utcnow())
+        _progress.move_to_end(run_id)
+        while len(_progress) > MAX_TRACKED_RUNS:
+            _progress.popitem(last=False)
+
+
+def get_progress(run_id: int) -> Optional[dict]:
+    """Progress of a run started by this process, or None if it is not tracked here"""
+    with _progress_lock:
+        entry = _progress.get(run_id)
+        return dict(entry) if entry else None
+
+
+def executor_stats() -> dict:
+    """Worker pool size and how many submitted runs are running or waiting for a worker"""
+    with _pending_lock:
+        pending = len(_pending_runs)
+    return {
+        "max_workers": CLASSIFIER_MAX_WORKERS,
+        "running": min(pending, CLASSIFIER_MAX_WORKERS),
+        "queued": max(0, pending - CLASSIFIER_MAX_WORKERS)
+    }
+
+
+def _selection(export_document_ids: Optional[List[int]]) -> Optional[frozenset]:
+    return frozenset(export_document_ids) if export_document_ids else None
+
+
+def find_active_run(lc_id: int, export_document_ids: Optional[List[int]] = None) -> Optional[int]:
+    """A run of this process still classifying the same documents of the LC, which a new request can share"""
+    selection = _selection(export_document_ids)
+    with _pending_lock:
+        for run_id, (run_lc_id, future, run_selection) in _pending_runs.items():
+            if run_lc_id == lc_id and run_selection == selection and not future.done():
+                return run_id
+    return None
+
+
+def warm_up():
+    """Import the classifier graph now so the first run does not pay for it"""
+    if str(CLASSIFIER_DIR) not in sys.path:
+        sys.path.append(str(CLASSIFIER_DIR))
+    import graph  # noqa: F401
+
+
+def drain(timeout: float) -> int:
+    """
+    Wait up to timeout seconds for submitted runs to finish, then cancel those still waiting
+    for a worker and mark them failed; returns how many runs were cancelled
+    Runs already executing are left to complete before the process exits
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with _pending_lock:
+            if not _pending_runs:
+                return 0
+        time.sleep(0.1)
+
+    _executor.shutdown(wait=False, cancel_futures=True)
+    with _pending_lock:
+        cancelled = [(run_id, lc_id) for run_id, (lc_id, future, _) in _pending_runs.items() if future.cancelled()]
+        for run_id, _ in cancelled:
+            del _pending_runs[run_id]
+    for run_id, lc_id in cancelled:
+        _finish_run(run_id, lc_id, "failed", "Server shut down before the run started")
+    return len(cancelled)
+
+
+def submit_classification(run_id: int, lc_id: int, total_documents: int,
+                          export_document_ids: Optional[List[int]] = None,
+                          on_finish: Optional[Callable[[], None]] = None):
+    """
+    Queue a classification run; the run row must already exist with status running
+    on_finish is called from the worker thread once the run has completed or failed
+    """
+    _set_progress(
+        run_id,
+        lc_id=lc_id,
+        status="running",
+        documents_classified=0,
+        total_documents=total_documents,
+        matches_found=0,
+        started_at=datetime.utcnow()
+    )
+    with _pending_lock:
+        future = _executor.submit(
+            _run_classification, run_id, lc_id, total_documents, export_document_ids, on_finish,
+            tracing.current_context()
+        )
+        _pending_runs[run_id] = (lc_id, future, _selection(export_document_ids))
+
+
+def _run_classification(run_id: int, lc_id: int, total_documents: int,
+                        export_document_ids: Optional[List[int]],
+                        on_finish: Optional[Callable[[], None]] = None,
+                        parent_context=None):
+    """Stream the classifier graph for one run inside a span parented to the submitting request"""
+    with tracing.tracer.start_as_current_span(
+        "classification.run",
+        context=parent_context,
+        attributes={"classification.run_id": run_id, "lc.id": lc_id, "classification.total_documents": total_documents}
+    ):
+        try:
+            _classify(run_id, lc_id, total_documents, export_document_ids, on_finish)
+        finally:
+            with _pending_lock:
+                _pending_runs.pop(run_id, None)
+
+
+def _classify(run_id: int, lc_id: int, total_documents: int,
+              export_document_ids: Optional[List[int]],
+              on_finish: Optional[Callable[[], None]]):
+    """Stream the classifier graph for one run and record its outcome"""
+    try:
+        if str(CLASSIFIER_DIR) not in sys.path:
+            sys.path.append(str(CLASSIFIER_DIR))
+        from graph import graph, bound_db_service, bound_callbacks
+
+        initial_state = {
+            "lc_requirements": [],
+            "lc_reference": "",
+            "export_documents": [],
+            "current_doc_index": 0,
+            "classifications": [],
+            "current_classification": {},
+            "total_documents": 0,
+            "status": "starting",
+            "error": "",
+            "trace_id": tracing.current_trace_id() or "",
+            "lc_id": str(lc_id),
+            "classification_run_id": str(run_id),
+            "export_document_ids": export_document_ids
+        }
+        # Two graph steps per document plus the loading steps
+        config = {"recursion_limit": 2 * total_documents + 10}
+
+        final_state = None
+        documents_classified = 0
+        breaker = circuit_breaker.llm_breaker
+        with bound_db_service() as db_service, bound_callbacks(LLM_CALLBACKS):
+            # The run row and its documents were committed moments ago; a lagging replica may not have them yet
+            stick_to_primary(db_service.session, time.time() + READ_YOUR_WRITES_SECONDS)
+            for state in graph.stream(initial_state, config=config, stream_mode="values"):
+                final_state = state
+                if state.get("status") == "recorded_and_continuing":
+                    classifications = state.get("classifications", [])
+                    metrics.CLASSIFICATION_DOCUMENTS.inc(state.get("current_doc_index", 0) - documents_classified)
+                    documents_classified = state.get("current_doc_index", 0)
+                    _set_progress(
+                        run_id,
+                        documents_classified=state.get("current_doc_index", 0),
+                        total_documents=state.get("total_documents", total_documents),
+                        matches_found=sum(1 for c in classifications if c.get("is_classified"))
+                    )
+                    response_cache.invalidate(lc_id)
+                    _publish_progress(run_id, lc_id)
+                    # Stop rather than record fallback classifications while the provider is down
+                    if breaker.state == circuit_breaker.OPEN:
+                        final_state = {"error": "LLM provider unavailable (circuit open)"}
+                        break
+
+        error = final_state.get("error") if final_state else "Classifier produced no output"
+        _finish_run(run_id, lc_id, "failed" if error else "completed", error or None)
+    except Exception as e:
+        print(f"❌ Classification run {run_id} failed: {e}")
+        _finish_run(run_id, lc_id, "failed", str(e))
+    finally:
+        if on_finish:
+            on_finish()
+
+
+def _publish_progress(run_id: int, lc_id: int):
+    """Tell the LC's event subscribers another document was classified"""
+    progress = get_progress(run_id) or {}
+    try:
+        events.publish(
+            engine, lc_id, "document_classified",
+            run_id=run_id,
+            documents_classified=progress.get("documents_classified"),
+            total_documents=progress.get("total_documents"),
+            matches_found=progress.get("matches_found")
+        )
+    except Exception as e:
+        print(f"⚠️  Warning: Could not publish progress of classification run {run_id}: {e}")
+
+
+def _finish_run(run_id: int, lc_id: int, status: str, error_message: Optional[str] = None):
+    """Persist the final run status with the match count stored in the database"""
+    db = SessionLocal()
+    try:
+        run = db.query(ClassificationRunModel).filter(ClassificationRunModel.id == run_id).first()
+        if run:
+            run.total_matches_found = db.query(ClassificationModel).filter(
+                ClassificationModel.classification_run_id == run_id,
+                ClassificationModel.is_matched == True
+            ).count()
+            run.status = status
+            run.error_message = error_message
+            events.notify(
+                db, lc_id, "run_completed",
+                run_id=run_id, status=status, total_matches_found=run.total_matches_found, error_message=error_message
+            )
+            db.commit()
+            _set_progress(run_id, status=status, matches_found=run.total_matches_found, error_message=error_message)
+        metrics.CLASSIFICATION_RUNS.labels(status).inc()
+    except Exception as e:
+        db.rollback()
+        print(f"⚠️  Warning: Could not finalize classification run {run_id}: {e}")
+    finally:
+        db.close()
+        response_cache.invalidate(lc_id)
+
@@ -19,7 +19,9 @@ from models import (
     LCDocumentRequirement as LCRequirementModel,
     ExportDocument as ExportDocModel,
     ClassificationRun as ClassificationRunModel,
-    DocumentClassification as ClassificationModel
+    DocumentClassification as ClassificationModel,
+    ExportDocumentCounter as ExportDocumentCounterModel,
+    Blob as BlobModel
 )
 
 def confirm_clear():
@@ -31,8 +33,10 @@ def confirm_clear():
     print("   • letter_of_credits")
     print("   • lc_document_requirements") 
     print("   • export_documents")
+    print("   • export_document_counters")
     print("   • classification_runs")
     print("   • document_classifications")
+    print("   • blobs")
     print()
     
     response = input("Are you sure you want to proceed? Type 'YES' to confirm: ")
@@ -68,6 +72,10 @@ def clear_table_data(db: Session):
         deleted_runs = db.query(ClassificationRunModel).delete()
         print(f"   ✅ Deleted {deleted_runs} classification run records")
         
+        print("   Clearing export_document_counters...")
+        deleted_counters = db.query(ExportDocumentCounterModel).delete()
+        print(f"   ✅ Deleted {deleted_counters} export document counters")
+        
         print("   Clearing export_documents...")
         deleted_exports = db.query(ExportDocModel).delete()
         print(f"   ✅ Deleted {deleted_exports} export document records")
@@ -80,6 +88,11 @@ def clear_table_data(db: Session):
         deleted_lcs = db.query(LCModel).delete()
         print(f"   ✅ Deleted {deleted_lcs} LC records")
         
+        # Stored files become unreferenced and are removed by blob_store.collect_garbage()
+        print("   Clearing blobs...")
+        deleted_blobs = db.query(BlobModel).delete()
+        print(f"   ✅ Deleted {deleted_blobs} blob records")
+        
         # Commit all deletions
         db.commit()
         print("\n✅ All table data cleared successfully!")
@@ -89,7 +102,9 @@ def clear_table_data(db: Session):
             'runs': deleted_runs,
             'exports': deleted_exports,
             'requirements': deleted_requirements,
-            'lcs': deleted_lcs
+            'lcs': deleted_lcs,
+            'counters': deleted_counters,
+            'blobs': deleted_blobs
         }
         
     except Exception as e:
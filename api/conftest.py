@@ -0,0 +1,153 @@
+"""
+Shared pytest fixtures and data helpers for the in-process API tests
+Runs the FastAPI app against a temporary SQLite database instead of PostgreSQL, through pysqlite
+for get_db and aiosqlite for get_async_db
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import main
+from database import RoutingSession, get_async_db, get_db, get_read_db
+from models import (
+    Base,
+    LetterOfCredit as LCModel,
+    LCDocumentRequirement as LCRequirementModel,
+    ExportDocument as ExportDocModel,
+    ClassificationRun as ClassificationRunModel,
+    DocumentClassification as ClassificationModel
+)
+from response_cache import response_cache
+
+
+def _enable_wal(dbapi_connection, connection_record):
+    # Readers do not block the other engine's writers
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+@pytest.fixture
+def database_path(tmp_path_factory):
+    # Kept out of tmp_path, which tests use for their own files
+    return tmp_path_factory.mktemp("database") / "test.db"
+
+
+@pytest.fixture
+def engine(database_path):
+    """SQLite engine with all tables created"""
+    test_engine = create_engine(f"sqlite:///{database_path}", connect_args={"check_same_thread": False})
+    event.listen(test_engine, "connect", _enable_wal)
+    Base.metadata.create_all(bind=test_engine)
+    yield test_engine
+    test_engine.dispose()
+
+
+@pytest.fixture
+def async_engine(engine, database_path):
+    """aiosqlite engine on the same database; unpooled since each TestClient request runs its own event loop"""
+    test_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}", poolclass=NullPool)
+    event.listen(test_engine.sync_engine, "connect", _enable_wal)
+    yield test_engine
+
+
+@pytest.fixture
+def db_session(engine):
+    """Session for seeding and inspecting test data"""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(engine, async_engine):
+    """TestClient whose requests use the test database"""
+    TestSession = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+    TestAsyncSession = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+    def override_get_db():
+        db = TestSession()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with TestAsyncSession() as db:
+            yield db
+
+    main.app.dependency_overrides[get_db] = override_get_db
+    main.app.dependency_overrides[get_read_db] = override_get_db
+    main.app.dependency_overrides[get_async_db] = override_get_async_db
+    response_cache.clear()
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+    response_cache.clear()
+
+
+@pytest.fixture
+def query_counter(engine, async_engine):
+    """Records every SQL statement executed on the test engines"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    for test_engine in (engine, async_engine.sync_engine):
+        event.listen(test_engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    for test_engine in (engine, async_engine.sync_engine):
+        event.remove(test_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def seed_lc(db, lc_reference: str, num_requirements: int, num_docs: int) -> int:
+    """Create an LC with requirements, export documents and one classification run"""
+    lc = LCModel(lc_reference=lc_reference)
+    db.add(lc)
+    db.flush()
+
+    requirements = [
+        LCRequirementModel(lc_id=lc.id, document_id=f"doc_{i:03d}", name=f"{lc_reference} requirement {i}")
+        for i in range(1, num_requirements + 1)
+    ]
+    docs = [
+        ExportDocModel(
+            lc_id=lc.id,
+            document_id=f"{lc_reference}_export_doc_{i:03d}",
+            filename=f"doc_{i}.pdf",
+            document_name=f"{lc_reference} document {i}"
+        )
+        for i in range(1, num_docs + 1)
+    ]
+    db.add_all(requirements + docs)
+    db.flush()
+
+    run = ClassificationRunModel(
+        lc_id=lc.id,
+        total_export_docs=num_docs,
+        total_lc_requirements=num_requirements,
+        status="completed"
+    )
+    db.add(run)
+    db.flush()
+
+    # Match every other document to a requirement
+    matches = 0
+    for i, doc in enumerate(docs):
+        if i % 2 == 0:
+            db.add(ClassificationModel(
+                export_document_id=doc.id,
+                lc_requirement_id=requirements[(i // 2) % num_requirements].id,
+                classification_run_id=run.id,
+                confidence_score=0.9,
+                is_matched=True
+            ))
+            matches += 1
+    run.total_matches_found = matches
+
+    db.commit()
+    return lc.id
@@ -0,0 +1,42 @@
+"""
+Allocation of export document ids from a per-LC counter row
+Each allocation is a single INSERT ... ON CONFLICT DO UPDATE ... RETURNING that reserves a block of
+numbers, so concurrent uploads and ingestion workers never compute the same id. The counter row stays
+locked only until the caller's transaction commits; allocate right before committing
+"""
+
+from typing import List
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import ExportDocument as ExportDocModel, ExportDocumentCounter as CounterModel
+
+
+def format_document_id(lc_id: int, number: int) -> str:
+    """Globally unique export document id; the LC id keeps per-LC numbering from colliding"""
+    return f"export_doc_{lc_id}_{number:03d}"
+
+
+def allocate_document_ids(db: Session, lc_id: int, count: int) -> List[str]:
+    """Reserve count consecutive document ids for an LC in the session's transaction"""
+    if count <= 0:
+        return []
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        insert = postgresql.insert(CounterModel)
+    elif dialect == "sqlite":
+        insert = sqlite.insert(CounterModel)
+    else:
+        raise HTTPException(status_code=500, detail=f"Document id allocation is not supported on {dialect}")
+
+    # The first allocation for an LC continues after the documents it already has
+    existing = select(func.count()).select_from(ExportDocModel).where(ExportDocModel.lc_id == lc_id).scalar_subquery()
+    statement = insert.values(lc_id=lc_id, last_number=existing + count).on_conflict_do_update(
+        index_elements=[CounterModel.lc_id],
+        set_={"last_number": CounterModel.last_number + count}
+    ).returning(CounterModel.last_number)
+    last = db.execute(statement).scalar_one()
+    return [format_document_id(lc_id, number) for number in range(last - count + 1, last + 1)]
@@ -0,0 +1,224 @@
+"""
+Local embeddings and a similarity index for export document ↔ LC requirement candidates
+Texts are embedded offline with a signed hashing vectorizer (word unigrams and bigrams, sublinear tf,
+L2-normalised float32), so no model download or API call is needed and vectors are stable across
+processes. Vectors are stored on export_documents.embedding and lc_document_requirements.embedding,
+kept current by ORM events and written by bulk ingest with its Core inserts. Readers compute a missing
+vector in memory without storing it; python embeddings.py backfills rows stored before either
+"""
+
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import bindparam, event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from models import LCDocumentRequirement as LCRequirementModel, ExportDocument as ExportDocModel
+
+EMBEDDING_DIM = 512  # Power of two, hashed features are masked into it
+INDEX_CACHE_SIZE = int(os.getenv("EMBEDDING_INDEX_CACHE_SIZE", "256"))
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or the this to with copy copies original originals".split()
+)
+
+
+def _tokens(text: str) -> List[str]:
+    words = []
+    for word in _TOKEN.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        # Cheap plural folding so "invoices" meets "invoice"
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.append(word)
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+def embed(text: Optional[str]) -> np.ndarray:
+    """Hashing-vectorizer embedding of a text; all zeros when it has no usable words"""
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for token, count in Counter(_tokens(text or "")).items():
+        digest = zlib.crc32(token.encode("utf-8"))
+        sign = 1.0 if digest & 0x80000000 else -1.0
+        vector[digest & (EMBEDDING_DIM - 1)] += sign * (1.0 + math.log(count))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def to_blob(vector: np.ndarray) -> bytes:
+    return np.asarray(vector, dtype=np.float32).tobytes()
+
+
+def from_blob(blob: Optional[bytes]) -> Optional[np.ndarray]:
+    """Stored embedding, or None when missing or written with another dimension"""
+    if not blob or len(blob) != EMBEDDING_DIM * 4:
+        return None
+    return np.frombuffer(blob, dtype=np.float32)
+
+
+def document_text(name: Optional[str], summary: Optional[str]) -> str:
+    return f"{name or ''}\n{summary or ''}"
+
+
+def requirement_text(name: Optional[str], description: Optional[str]) -> str:
+    return f"{name or ''}\n{description or ''}"
+
+
+def document_embedding(doc: ExportDocModel) -> np.ndarray:
+    """Stored embedding of an export document, computed in memory when missing"""
+    vector = from_blob(doc.embedding)
+    if vector is None:
+        vector = embed(document_text(doc.document_name, doc.summary))
+    return vector
+
+
+def requirement_embedding(requirement: LCRequirementModel) -> np.ndarray:
+    """Stored embedding of an LC requirement, computed in memory when missing"""
+    vector = from_blob(requirement.embedding)
+    if vector is None:
+        vector = embed(requirement_text(requirement.name, requirement.description))
+    return vector
+
+
+class RequirementIndex:
+    """Requirement embeddings of one LC as a dense matrix, queried with a single matrix product"""
+
+    def __init__(self, requirements: Sequence[dict], matrix: np.ndarray):
+        self.requirements = list(requirements)
+        self.matrix = matrix
+
+    def __len__(self):
+        return len(self.requirements)
+
+    def scores(self, vectors: np.ndarray) -> np.ndarray:
+        """Cosine similarity of each query vector (rows) with every requirement (columns)"""
+        return np.atleast_2d(vectors) @ self.matrix.T
+
+    def top_k(self, vectors: np.ndarray, k: int) -> List[List[tuple]]:
+        """Per query vector, the k best (requirement, score) pairs, best first"""
+        scores = self.scores(vectors)
+        k = min(k, len(self))
+        if k <= 0:
+            return [[] for _ in range(len(scores))]
+        if k < len(self):
+            best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            best = np.broadcast_to(np.arange(len(self)), scores.shape)
+        results = []
+        for row, candidates in zip(scores, best):
+            ordered = sorted(candidates, key=lambda column: (-row[column], column))
+            results.append([(self.requirements[column], float(row[column])) for column in ordered])
+        return results
+
+
+# Embedding matrices keyed by the requirement texts they were built from
+_matrix_cache = OrderedDict()
+_matrix_lock = threading.Lock()
+
+
+def _requirement_matrix(requirements: List[dict]) -> np.ndarray:
+    """Embedding matrix of requirement dicts, cached by content so every document of a run shares one"""
+    key = tuple((r.get("name"), r.get("description")) for r in requirements)
+    with _matrix_lock:
+        matrix = _matrix_cache.get(key)
+        if matrix is not None:
+            _matrix_cache.move_to_end(key)
+            return matrix
+
+    rows = []
+    for requirement in requirements:
+        vector = from_blob(requirement.get("embedding"))
+        if vector is None:
+            vector = embed(requirement_text(requirement.get("name"), requirement.get("description")))
+        rows.append(vector)
+    matrix = np.vstack(rows) if rows else np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+
+    with _matrix_lock:
+        _matrix_cache[key] = matrix
+        while len(_matrix_cache) > INDEX_CACHE_SIZE:
+            _matrix_cache.popitem(last=False)
+    return matrix
+
+
+def requirement_index(requirements: Iterable[dict]) -> RequirementIndex:
+    """
+    Index over requirement dicts (id, document_id, name, description and optionally a stored embedding)
+    Only the matrix is shared between callers; results always carry the caller's own requirement dicts,
+    as LCs with identical requirement texts still have their own requirement ids
+    """
+    requirements = list(requirements)
+    return RequirementIndex(
+        [{k: v for k, v in r.items() if k != "embedding"} for r in requirements], _requirement_matrix(requirements)
+    )
+
+
+def _changed(target, *names) -> bool:
+    state = inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+@event.listens_for(ExportDocModel, "before_insert")
+@event.listens_for(ExportDocModel, "before_update")
+def _embed_export_document(mapper, connection, target):
+    if inspect(target).pending or _changed(target, "document_name", "summary"):
+        target.embedding = to_blob(embed(document_text(target.document_name, target.summary)))
+
+
+@event.listens_for(LCRequirementModel, "before_insert")
+@event.listens_for(LCRequirementModel, "before_update")
+def _embed_requirement(mapper, connection, target):
+    if inspect(target).pending or _changed(target, "name", "description"):
+        target.embedding = to_blob(embed(requirement_text(target.name, target.description)))
+
+
+def _backfill_table(db: Session, table, text_columns, to_text, batch_size: int) -> int:
+    # Bind names must differ from the column names in an executemany UPDATE
+    statement = update(table).where(table.c.id == bindparam("row_id")).values(embedding=bindparam("new_embedding"))
+    updated, last_id = 0, 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, *[table.c[column] for column in text_columns])
+            .where(table.c.id > last_id, table.c.embedding.is_(None)).order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            return updated
+        db.execute(statement, [
+            {"row_id": row[0], "new_embedding": to_blob(embed(to_text(*row[1:])))} for row in rows
+        ])
+        db.commit()
+        updated += len(rows)
+        last_id = rows[-1][0]
+
+
+def backfill(db: Session, batch_size: int = 500) -> dict:
+    """Store the embeddings of rows that have none, in id order and committing per batch; returns the rows updated"""
+    return {
+        "export_documents": _backfill_table(
+            db, ExportDocModel.__table__, ("document_name", "summary"), document_text, batch_size
+        ),
+        "lc_document_requirements": _backfill_table(
+            db, LCRequirementModel.__table__, ("name", "description"), requirement_text, batch_size
+        )
+    }
+
+
+def main():
+    """Store missing embeddings of export documents and LC requirements: python embeddings.py"""
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        updated = backfill(db)
+    print(f"✅ Embedded {updated['export_documents']} export documents and "
+          f"{updated['lc_document_requirements']} LC requirements")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Change notifications per LC, pushed to clients as server-sent events instead of being polled for
+Write paths call notify() inside their transaction (run created, run completed, document extracted,
+LC changed) or publish() outside one (document classified). On PostgreSQL each event is a pg_notify on
+EVENT_CHANNEL, delivered at commit; every worker LISTENs on a dedicated connection and fans the
+events out to its subscribers, and events written by other workers also invalidate this worker's
+cached responses. Other databases deliver events to subscribers of the committing process only
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from select import select as wait_readable
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import event as orm_event, func, select
+from sqlalchemy.orm import Session
+
+from response_cache import response_cache
+
+EVENT_CHANNEL = "lc_events"
+EVENT_TYPES = ("run_created", "document_classified", "run_completed", "document_extracted", "lc_changed")
+# lc_changed covers the other writes to an LC (created, updated, deleted, documents ingested, classifications
+# reset); its change field says which. Besides telling subscribers, it drops other workers' cached responses
+LC_CHANGES = ("created", "updated", "deleted", "documents_added", "classifications_reset")
+# Sent instead of events a subscriber missed (it fell behind, or LISTEN reconnected); refetch the LC
+RESYNC = "resync"
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE_SIZE", "256"))
+HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+# Streams end after this long and EventSource reconnects; kept below serve.py's GRACEFUL_TIMEOUT
+# so open streams do not hold a draining worker up
+STREAM_MAX_SECONDS = float(os.getenv("EVENT_STREAM_MAX_SECONDS", "90"))
+RECONNECT_RETRY_MS = 2000
+LISTEN_RECONNECT_SECONDS = 5
+
+_PENDING_KEY = "lc_events_pending"
+
+
+def make_event(lc_id: int, event_type: str, **data) -> dict:
+    if event_type not in EVENT_TYPES and event_type != RESYNC:
+        raise ValueError(f"Unknown event type: {event_type}")
+    return {"type": event_type, "lc_id": lc_id, "at": datetime.utcnow().isoformat(), **data}
+
+
+class Subscription:
+    """Events of one LC queued for one client stream"""
+
+    def __init__(self, lc_id: int, loop: asyncio.AbstractEventLoop):
+        self.lc_id = lc_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def offer(self, event: dict):
+        """Queue an event; runs on the subscriber's loop"""
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A client this far behind refetches rather than replaying a backlog
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(make_event(self.lc_id, RESYNC))
+
+
+class EventHub:
+    """Subscribers of this process by LC; dispatch() may be called from any thread"""
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, lc_id: int) -> Subscription:
+        subscription = Subscription(lc_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions[lc_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.lc_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.lc_id]
+
+    def subscriber_count(self, lc_id: Optional[int] = None) -> int:
+        with self._lock:
+            if lc_id is not None:
+                return len(self._subscriptions.get(lc_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscriptions.values())
+
+    def dispatch(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(event["lc_id"], ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's loop has closed; its stream is gone
+                self.unsubscribe(subscription)
+
+    def resync_all(self):
+        with self._lock:
+            lc_ids = list(self._subscriptions)
+        for lc_id in lc_ids:
+            self.dispatch(make_event(lc_id, RESYNC))
+
+
+# Subscribers of the API process
+hub = EventHub()
+
+
+def _is_postgres(bind) -> bool:
+    return bind.dialect.name == "postgresql"
+
+
+def _notify_statement(event: dict):
+    return select(func.pg_notify(EVENT_CHANNEL, json.dumps(event, separators=(",", ":"), default=str)))
+
+
+def notify(db: Session, lc_id: int, event_type: str, **data):
+    """Emit an event when the session's transaction commits; dropped if it rolls back"""
+    event = make_event(lc_id, event_type, **data)
+    if _is_postgres(db.get_bind()):
+        db.execute(_notify_statement(event))
+    else:
+        db.info.setdefault(_PENDING_KEY, []).append(event)
+
+
+def notify_changed(db: Session, lc_id: int, change: str):
+    """notify() an lc_changed event; async sessions call it through run_sync"""
+    if change not in LC_CHANGES:
+        raise ValueError(f"Unknown LC change: {change}")
+    notify(db, lc_id, "lc_changed", change=change)
+
+
+def publish(bind, lc_id: int, event_type: str, **data):
+    """Emit an event now, outside any transaction; bind is an engine"""
+    event = make_event(lc_id, event_type, **data)
+    if _is_postgres(bind):
+        with bind.begin() as connection:
+            connection.execute(_notify_statement(event))
+    else:
+        hub.dispatch(event)
+
+
+@orm_event.listens_for(Session, "after_commit")
+def _dispatch_committed(session):
+    for event in session.info.pop(_PENDING_KEY, ()):
+        hub.dispatch(event)
+
+
+@orm_event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def format_event(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'), default=str)}\n\n"
+
+
+async def stream(subscription: Subscription, max_seconds: Optional[float] = None) -> AsyncIterator[str]:
+    """Server-sent event stream of a subscription, with keep-alive comments while it is quiet"""
+    deadline = time.monotonic() + (STREAM_MAX_SECONDS if max_seconds is None else max_seconds)
+    try:
+        yield f"retry: {RECONNECT_RETRY_MS}\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), min(HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+class PostgresListener:
+    """LISTENs on EVENT_CHANNEL from a dedicated connection and hands every event to the hub"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="lc-events-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _connect(self):
+        pooled = self.engine.raw_connection()
+        # Kept out of the pool: the connection stays in LISTEN for the life of the worker
+        pooled.detach()
+        connection = pooled.dbapi_connection
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {EVENT_CHANNEL}")
+        return connection
+
+    def _run(self):
+        connected_before = False
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                if connected_before:
+                    # Events sent while disconnected are lost
+                    response_cache.clear()
+                    hub.resync_all()
+                connected_before = True
+                while not self._stop.is_set():
+                    if wait_readable([connection], [], [], 1.0) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self._deliver(connection.notifies.pop(0).payload)
+            except Exception as e:
+                print(f"⚠️  Event listener disconnected: {e}")
+                self._stop.wait(LISTEN_RECONNECT_SECONDS)
+            finally:
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+
+    def _deliver(self, payload: str):
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            return
+        # Covers writes made by other workers, whose cache versions this process never saw
+        response_cache.invalidate(event.get("lc_id"))
+        hub.dispatch(event)
@@ -0,0 +1,139 @@
+"""
+Streaming NDJSON/CSV exports for LC-Scanner
+Rows are selected as flat columns and fetched with yield_per (a server-side cursor on PostgreSQL),
+so memory stays constant regardless of how many rows are exported
+"""
+
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from models import (
+    LetterOfCredit as LCModel,
+    LCDocumentRequirement as LCRequirementModel,
+    ExportDocument as ExportDocModel,
+    DocumentClassification as ClassificationModel
+)
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+EXPORT_YIELD_PER = 1000
+# Bytes of encoded output gathered before a chunk is sent
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+
+def classifications_query(lc_id: Optional[int] = None, date_from: Optional[datetime] = None,
+                          date_to: Optional[datetime] = None):
+    """Flat classification rows with their document, requirement and LC identifiers"""
+    statement = (
+        select(
+            ClassificationModel.id,
+            ClassificationModel.classification_run_id,
+            LCModel.id.label("lc_id"),
+            LCModel.lc_reference,
+            ClassificationModel.export_document_id,
+            ExportDocModel.document_id.label("export_document_ref"),
+            ExportDocModel.filename,
+            ClassificationModel.lc_requirement_id,
+            LCRequirementModel.document_id.label("lc_requirement_ref"),
+            LCRequirementModel.name.label("lc_requirement_name"),
+            ClassificationModel.confidence_score,
+            ClassificationModel.is_matched,
+            ClassificationModel.reasoning,
+            ClassificationModel.classification_timestamp
+        )
+        .join(ExportDocModel, ExportDocModel.id == ClassificationModel.export_document_id)
+        .join(LCRequirementModel, LCRequirementModel.id == ClassificationModel.lc_requirement_id)
+        .join(LCModel, LCModel.id == ExportDocModel.lc_id)
+        .order_by(ClassificationModel.id)
+    )
+    if lc_id is not None:
+        statement = statement.where(ExportDocModel.lc_id == lc_id)
+    if date_from is not None:
+        statement = statement.where(ClassificationModel.classification_timestamp >= date_from)
+    if date_to is not None:
+        statement = statement.where(ClassificationModel.classification_timestamp < date_to)
+    return statement
+
+
+def export_documents_query(lc_id: Optional[int] = None, date_from: Optional[datetime] = None,
+                           date_to: Optional[datetime] = None):
+    """Flat export document rows with their extraction results"""
+    statement = (
+        select(
+            ExportDocModel.id,
+            ExportDocModel.lc_id,
+            LCModel.lc_reference,
+            ExportDocModel.document_id,
+            ExportDocModel.filename,
+            ExportDocModel.file_path,
+            ExportDocModel.file_size_bytes,
+            ExportDocModel.document_name,
+            ExportDocModel.summary,
+            ExportDocModel.full_description,
+            ExportDocModel.extraction_timestamp,
+            ExportDocModel.lc_requirement_id,
+            ExportDocModel.is_matched,
+            ExportDocModel.confidence_score,
+            ExportDocModel.created_at
+        )
+        .join(LCModel, LCModel.id == ExportDocModel.lc_id)
+        .order_by(ExportDocModel.id)
+    )
+    if lc_id is not None:
+        statement = statement.where(ExportDocModel.lc_id == lc_id)
+    if date_from is not None:
+        statement = statement.where(ExportDocModel.created_at >= date_from)
+    if date_to is not None:
+        statement = statement.where(ExportDocModel.created_at < date_to)
+    return statement
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_rows(bind: Engine | Connection, statement, export_format: str) -> Iterator[bytes]:
+    """
+    Encode query rows as NDJSON lines or CSV (with a header row) in ~64KB chunks
+    Runs on its own session so the export outlives the request's session
+    """
+    session = Session(bind=bind)
+    try:
+        result = session.execute(statement.execution_options(yield_per=EXPORT_YIELD_PER))
+        columns = list(result.keys())
+
+        buffer = io.StringIO()
+        writer = None
+        if export_format == "csv":
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+
+        for row in result:
+            if writer is not None:
+                writer.writerow([_csv_value(value) for value in row])
+            else:
+                buffer.write(json.dumps(dict(zip(columns, row)), default=_json_default))
+                buffer.write("\n")
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+    finally:
+        session.close()
@@ -0,0 +1,70 @@
+"""
+Sparse fieldsets for read endpoints
+Parses the fields= query parameter and turns it into load_only options,
+so heavy text columns and nested collections are neither fetched nor serialized unless asked for
+"""
+
+from typing import Dict, Iterable, List, Optional, Type
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+from schemas import LetterOfCredit, ExportDocument, ClassificationRun
+
+# Value of fields= that selects every field
+ALL_FIELDS = "*"
+
+# Fields left out of list responses unless requested with fields=
+HEAVY_FIELDS = {
+    LetterOfCredit: frozenset({"goods_description", "additional_conditions"}),
+    ExportDocument: frozenset({"full_description"}),
+    ClassificationRun: frozenset({"classifications"}),
+}
+
+
+def default_fields(schema: Type[BaseModel]) -> Optional[frozenset]:
+    """List-response fieldset of a schema; None when it has no heavy fields"""
+    heavy = HEAVY_FIELDS.get(schema)
+    if not heavy:
+        return None
+    return frozenset(schema.model_fields) - heavy
+
+
+def select_fields(schema: Type[BaseModel], fields: Optional[str], detail: bool = False) -> Optional[frozenset]:
+    """
+    Fieldset for a request: a comma-separated fields= value, "*" for everything,
+    or the default when absent (everything on detail endpoints). None means every field
+    """
+    if fields is None:
+        return None if detail else default_fields(schema)
+    if fields.strip() == ALL_FIELDS:
+        return None
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(schema.model_fields)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. "
+                   f"Available: {', '.join(schema.model_fields)}"
+        )
+    return frozenset(requested | {"id"})
+
+
+def load_options(model, selected: Optional[frozenset], relationships: Dict[str, object] = None,
+                 always: Iterable[str] = ()) -> List:
+    """
+    load_only for the selected columns plus the loader options of selected relationships
+    always names extra columns the handler reads itself, such as the pagination sort key
+    """
+    relationships = relationships or {}
+    if selected is None:
+        return list(relationships.values())
+
+    columns = inspect(model).column_attrs.keys()
+    wanted = [name for name in columns if name in selected or name in always]
+    options = [load_only(*[getattr(model, name) for name in wanted])]
+    options += [loader for name, loader in relationships.items() if name in selected]
+    return options
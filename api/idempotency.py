@@ -0,0 +1,227 @@
+"""
+Idempotency keys and in-flight request coalescing for the LLM-heavy endpoints
+A client may send Idempotency-Key with POST /lcs/upload and POST /classify/{lc_id}. The first request
+with a key claims a row in idempotency_keys; once it succeeds the row references the LC or run it
+produced, and a retry with the same key gets that resource back (Idempotent-Replayed: true) instead of
+paying for the pipeline again. Independently of keys, SingleFlight lets concurrent identical requests
+in one worker (the same PDF content) share a single execution
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from models import IdempotencyKey as IdempotencyKeyModel
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_KEY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_KEY_TTL_SECONDS", "86400"))
+# A key still in progress after this long belonged to a worker that died; the next request takes it over
+IDEMPOTENCY_LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "900"))
+IN_PROGRESS_RETRY_AFTER_SECONDS = 5
+MAX_KEY_LENGTH = 255
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+def request_hash(*parts) -> str:
+    """Fingerprint of what a request asked for, so a key cannot be reused for a different request"""
+    payload = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def in_progress_error() -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="A request with this Idempotency-Key is still in progress",
+        headers={"Retry-After": str(IN_PROGRESS_RETRY_AFTER_SECONDS)}
+    )
+
+
+class Claim:
+    """A request's hold on its Idempotency-Key; a no-op when the client sent none"""
+
+    def __init__(self, db: Session, key: Optional[str], owned: bool, resource_id: Optional[int] = None):
+        self.db = db
+        self.key = key
+        self.owned = owned
+        self.resource_id = resource_id
+
+    @property
+    def replay(self) -> bool:
+        """The key already completed; respond with resource_id instead of doing the work"""
+        return self.resource_id is not None
+
+    @property
+    def held_elsewhere(self) -> bool:
+        """Another request with the same key has not finished yet"""
+        return self.key is not None and not self.owned and not self.replay
+
+    def complete(self, resource_id: int):
+        if not self.owned:
+            return
+        now = datetime.utcnow()
+        self.db.execute(
+            update(IdempotencyKeyModel).where(IdempotencyKeyModel.key == self.key).values(
+                status=COMPLETED,
+                resource_id=resource_id,
+                completed_at=now,
+                expires_at=now + timedelta(seconds=IDEMPOTENCY_KEY_TTL_SECONDS)
+            )
+        )
+        self.db.commit()
+        self.owned = False
+
+    def abandon(self):
+        """Give the key up after a failure so a retry runs the request again"""
+        if not self.owned:
+            return
+        self.db.rollback()
+        self.db.execute(
+            delete(IdempotencyKeyModel)
+            .where(IdempotencyKeyModel.key == self.key, IdempotencyKeyModel.status == IN_PROGRESS)
+        )
+        self.db.commit()
+        self.owned = False
+
+
+def _insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert(IdempotencyKeyModel)
+    if dialect == "sqlite":
+        return sqlite.insert(IdempotencyKeyModel)
+    raise HTTPException(status_code=500, detail=f"Idempotency keys are not supported on {dialect}")
+
+
+def claim(db: Session, key: Optional[str], scope: str, fingerprint: str) -> Claim:
+    """
+    Claim an Idempotency-Key for a request to scope with the given request_hash()
+    The claim is owned when this request must do the work and then complete() or abandon() it;
+    raises 422 when the key was already used for a different request
+    """
+    if key is None:
+        return Claim(db, None, owned=False)
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_KEY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters")
+
+    # A second pass covers a key deleted (expired or abandoned) between the insert and the read
+    for _ in range(2):
+        now = datetime.utcnow()
+        inserted = db.execute(_insert(db).values(
+            key=key,
+            scope=scope,
+            request_hash=fingerprint,
+            status=IN_PROGRESS,
+            created_at=now,
+            expires_at=now + timedelta(seconds=IDEMPOTENCY_KEY_TTL_SECONDS)
+        ).on_conflict_do_nothing(index_elements=[IdempotencyKeyModel.key])).rowcount
+        db.commit()
+        if inserted:
+            return Claim(db, key, owned=True)
+
+        record = db.execute(select(IdempotencyKeyModel).where(IdempotencyKeyModel.key == key)).scalar_one_or_none()
+        if record is None:
+            continue
+        if record.expires_at < now:
+            db.execute(delete(IdempotencyKeyModel).where(
+                IdempotencyKeyModel.key == key, IdempotencyKeyModel.expires_at < now
+            ))
+            db.commit()
+            continue
+        if record.scope != scope or record.request_hash != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail=f"{IDEMPOTENCY_KEY_HEADER} {key!r} was already used for a different request"
+            )
+        if record.status == COMPLETED:
+            return Claim(db, key, owned=False, resource_id=record.resource_id)
+
+        stale_before = now - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+        if record.created_at < stale_before:
+            # Compare-and-set on created_at, so only one of several retries takes the key over
+            taken = db.execute(
+                update(IdempotencyKeyModel)
+                .where(IdempotencyKeyModel.key == key,
+                       IdempotencyKeyModel.status == IN_PROGRESS,
+                       IdempotencyKeyModel.created_at == record.created_at)
+                .values(created_at=now)
+            ).rowcount
+            db.commit()
+            return Claim(db, key, owned=bool(taken))
+        return Claim(db, key, owned=False)
+    return Claim(db, key, owned=False)
+
+
+def purge_expired(db: Session) -> int:
+    """Delete expired keys; returns how many went"""
+    deleted = db.execute(
+        delete(IdempotencyKeyModel).where(IdempotencyKeyModel.expires_at < datetime.utcnow())
+    ).rowcount
+    db.commit()
+    return deleted
+
+
+_executor = ThreadPoolExecutor(thread_name_prefix="singleflight")
+
+
+class SingleFlight:
+    """
+    Runs one call per key at a time in this process; concurrent callers with the same key await it
+    Calls run on a worker thread and finish even when the request that started them is cancelled,
+    so the requests sharing the result still get it
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        # Reentrant: a call that finishes before add_done_callback() is forgotten on the submitting thread
+        self._lock = threading.RLock()
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+    def __len__(self):
+        with self._lock:
+            return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[..., Any], *args) -> Tuple[Any, bool]:
+        """Result of fn(*args), and whether it came from a call another request started"""
+        with self._lock:
+            future = self._calls.get(key)
+            shared = future is not None
+            if not shared:
+                future = _executor.submit(contextvars.copy_context().run, fn, *args)
+                self._calls[key] = future
+                future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(asyncio.wrap_future(future)), shared
+
+    def _forget(self, key: Hashable, future: Future):
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+
+def main():
+    """Delete expired idempotency keys: python idempotency.py"""
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        deleted = purge_expired(db)
+    print(f"🗑️  Removed {deleted} expired idempotency keys")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Batch read of many LCs for the portfolio dashboard
+For every requested LC returns what GET /lcs/{id}, /lcs/{id}/requirements-with-matches and
+/classification-summary/{id} would, using five set-based queries however many LCs are asked for:
+the LCs, their requirements, the latest run per LC (a row_number() window), the matched
+classifications of those runs and the LCs' export documents. The JSON body is streamed LC by LC
+"""
+
+import os
+from typing import Dict, Iterator, List
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.orm.attributes import set_committed_value
+
+import serialization
+from exports import EXPORT_CHUNK_SIZE
+from models import (
+    LetterOfCredit as LCModel,
+    LCDocumentRequirement as LCRequirementModel,
+    ExportDocument as ExportDocModel,
+    DocumentClassification as ClassificationModel,
+    ClassificationRun as ClassificationRunModel
+)
+from schemas import ClassificationSummary, LetterOfCredit
+
+MAX_BATCH_SIZE = int(os.getenv("LC_BATCH_MAX_SIZE", "500"))
+
+
+def latest_runs_query(lc_ids: List[int]):
+    """The most recent classification run of each LC, in one pass over the runs"""
+    ranked = select(
+        ClassificationRunModel,
+        func.row_number().over(
+            partition_by=ClassificationRunModel.lc_id,
+            order_by=(ClassificationRunModel.run_timestamp.desc(), ClassificationRunModel.id.desc())
+        ).label("position")
+    ).where(ClassificationRunModel.lc_id.in_(lc_ids)).subquery("ranked_runs")
+    latest = aliased(ClassificationRunModel, ranked)
+    return select(latest).where(ranked.c.position == 1)
+
+
+def _load(db: Session, ids: List[int], references: List[str]) -> dict:
+    conditions = []
+    if ids:
+        conditions.append(LCModel.id.in_(ids))
+    if references:
+        conditions.append(LCModel.lc_reference.in_(references))
+    lcs = db.execute(select(LCModel).where(or_(*conditions)).order_by(LCModel.id)).scalars().all()
+    lc_ids = [lc.id for lc in lcs]
+
+    requirements: Dict[int, list] = {lc_id: [] for lc_id in lc_ids}
+    export_documents: Dict[int, list] = {lc_id: [] for lc_id in lc_ids}
+    latest_runs = {}
+    matches: Dict[int, list] = {}
+    if lc_ids:
+        for requirement in db.execute(
+            select(LCRequirementModel).where(LCRequirementModel.lc_id.in_(lc_ids))
+            .order_by(LCRequirementModel.lc_id, LCRequirementModel.id)
+        ).scalars():
+            requirements[requirement.lc_id].append(requirement)
+
+        latest_runs = {run.lc_id: run for run in db.execute(latest_runs_query(lc_ids)).scalars()}
+
+        if latest_runs:
+            matches = {run_id: [] for run_id in (run.id for run in latest_runs.values())}
+            for row in db.execute(
+                select(
+                    ClassificationModel.classification_run_id,
+                    ClassificationModel.lc_requirement_id,
+                    ClassificationModel.confidence_score,
+                    ClassificationModel.reasoning,
+                    ExportDocModel.id,
+                    ExportDocModel.document_id,
+                    ExportDocModel.filename,
+                    ExportDocModel.document_name,
+                    ExportDocModel.summary,
+                    ExportDocModel.file_size_bytes,
+                    ExportDocModel.extraction_timestamp
+                )
+                .join(ExportDocModel, ExportDocModel.id == ClassificationModel.export_document_id)
+                .where(ClassificationModel.classification_run_id.in_(list(matches)),
+                       ClassificationModel.is_matched == True)
+                .order_by(ClassificationModel.id)
+            ):
+                matches[row.classification_run_id].append(row)
+
+        for row in db.execute(
+            select(ExportDocModel.id, ExportDocModel.lc_id, ExportDocModel.document_name)
+            .where(ExportDocModel.lc_id.in_(lc_ids))
+            .order_by(ExportDocModel.lc_id, ExportDocModel.id)
+        ):
+            export_documents[row.lc_id].append(row)
+
+    for lc in lcs:
+        # The LC response lists its requirements; hand them over instead of lazy loading per LC
+        set_committed_value(lc, "document_requirements", requirements[lc.id])
+
+    found_ids = set(lc_ids)
+    found_references = {lc.lc_reference for lc in lcs}
+    return {
+        "lcs": lcs,
+        "requirements": requirements,
+        "export_documents": export_documents,
+        "latest_runs": latest_runs,
+        "matches": matches,
+        "not_found": {
+            "ids": [lc_id for lc_id in dict.fromkeys(ids) if lc_id not in found_ids],
+            "references": [ref for ref in dict.fromkeys(references) if ref not in found_references]
+        }
+    }
+
+
+def requirements_with_matches(lc, requirements: list, latest_run, matched_rows: list) -> dict:
+    """Same shape as GET /lcs/{lc_id}/requirements-with-matches"""
+    matches_by_requirement = {}
+    for row in matched_rows:
+        matches_by_requirement.setdefault(row.lc_requirement_id, []).append({
+            "export_document_id": row.id,
+            "document_id": row.document_id,
+            "filename": row.filename,
+            "document_name": row.document_name,
+            "summary": row.summary,
+            "confidence_score": row.confidence_score,
+            "reasoning": row.reasoning,
+            "file_size_bytes": row.file_size_bytes,
+            "extraction_timestamp": row.extraction_timestamp
+        })
+
+    result_requirements = []
+    for requirement in requirements:
+        matched_documents = matches_by_requirement.get(requirement.id, [])
+        result_requirements.append({
+            "requirement_id": requirement.id,
+            "document_id": requirement.document_id,
+            "name": requirement.name,
+            "description": requirement.description,
+            "quantity": requirement.quantity,
+            "validation_criteria": requirement.validation_criteria,
+            "matched_documents": matched_documents,
+            "match_count": len(matched_documents)
+        })
+
+    total_matches = sum(req["match_count"] for req in result_requirements)
+    return {
+        "lc_reference": lc.lc_reference,
+        "lc_id": lc.id,
+        "total_requirements": len(requirements),
+        "classification_run_id": latest_run.id if latest_run else None,
+        "classification_timestamp": latest_run.run_timestamp if latest_run else None,
+        "requirements": result_requirements,
+        "total_matches": total_matches,
+        "match_percentage": (total_matches / max(len(requirements), 1)) * 100 if requirements else 0
+    }
+
+
+def classification_summary(lc, requirements: list, export_documents: list, latest_run,
+                           matched_rows: list) -> ClassificationSummary:
+    """Same as GET /classification-summary/{lc_id}"""
+    if not latest_run:
+        return ClassificationSummary(
+            lc_reference=lc.lc_reference,
+            total_requirements=0,
+            total_export_docs=0,
+            total_matches=0,
+            match_percentage=0.0,
+            unmatched_requirements=[],
+            unmatched_export_docs=[]
+        )
+    matched_requirement_ids = {row.lc_requirement_id for row in matched_rows}
+    matched_export_doc_ids = {row.id for row in matched_rows}
+    return ClassificationSummary(
+        lc_reference=lc.lc_reference,
+        total_requirements=latest_run.total_lc_requirements,
+        total_export_docs=latest_run.total_export_docs,
+        total_matches=latest_run.total_matches_found,
+        match_percentage=(latest_run.total_matches_found / max(latest_run.total_lc_requirements, 1)) * 100,
+        unmatched_requirements=[r.name for r in requirements if r.id not in matched_requirement_ids],
+        unmatched_export_docs=[d.document_name for d in export_documents if d.id not in matched_export_doc_ids]
+    )
+
+
+def stream_batch(bind, ids: List[int], references: List[str]) -> Iterator[bytes]:
+    """
+    {"not_found": {"ids": [...], "references": [...]}, "lcs": [{"lc", "requirements_with_matches",
+    "classification_summary"}, ...]} in ~64KB chunks, LCs in id order
+    Runs on its own session so the stream outlives the request's session
+    """
+    session = Session(bind=bind)
+    try:
+        loaded = _load(session, ids, references)
+        buffer = bytearray(b'{"not_found":' + serialization.dumps(loaded["not_found"]) + b',"lcs":[')
+        for position, lc in enumerate(loaded["lcs"]):
+            requirements = loaded["requirements"][lc.id]
+            latest_run = loaded["latest_runs"].get(lc.id)
+            matched_rows = loaded["matches"].get(latest_run.id, []) if latest_run else []
+            item = {
+                "lc": serialization.from_rows(LetterOfCredit, [lc])[0],
+                "requirements_with_matches": requirements_with_matches(lc, requirements, latest_run, matched_rows),
+                "classification_summary": classification_summary(
+                    lc, requirements, loaded["export_documents"][lc.id], latest_run, matched_rows
+                )
+            }
+            if position:
+                buffer += b","
+            buffer += serialization.dumps(item)
+            if len(buffer) >= EXPORT_CHUNK_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b"]}"
+        yield bytes(buffer)
+    finally:
+        session.close()
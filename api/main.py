@@ -1,12 +1,18 @@
-from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile
+from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile, Request, Response, Query, Header
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, load_only, selectinload, undefer
+import numpy as np
+from typing import List, Optional, Tuple
+from contextlib import asynccontextmanager
 import uvicorn
-import tempfile
 import os
+import threading
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime, timedelta
 import sys
 
 # Add document extraction service to path
@@ -18,13 +24,35 @@ from document_extraction_service import (
     DefaultDocumentSchema
 )
 
-from database import get_db, create_tables
+from database import get_db, get_read_db, get_async_db, primary_reads, create_tables, engine, replica_engines, async_engine, async_replica_engines
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, paginate_async, set_next_cursor
+from response_cache import response_cache
+import classifier_runner
+import admission
+import circuit_breaker
+import readiness
+import metrics
+import tracing
+import bulk_ingest
+import exports
+import serialization
+import search
+import embeddings
+import idempotency
+import events
+import lc_batch
+import mt700
+import portfolio
+from fieldsets import select_fields, load_options
+from document_ids import allocate_document_ids
+from blob_store import blob_store, add_reference, release_reference
 from models import (
     LetterOfCredit as LCModel,
     LCDocumentRequirement as LCRequirementModel,
     ExportDocument as ExportDocModel,
     DocumentClassification as ClassificationModel,
-    ClassificationRun as ClassificationRunModel
+    ClassificationRun as ClassificationRunModel,
+    ExportDocumentCounter as ExportDocumentCounterModel
 )
 from schemas import (
     LetterOfCredit,
@@ -35,14 +63,86 @@ from schemas import (
     DocumentClassificationCreate,
     ClassificationRun,
     ClassificationRunCreate,
+    ClassificationProgress,
     ClassificationSummary,
+    LCBatchRequest,
+    PortfolioExposure,
+    ExpiringLCs,
+    MatchSuggestion,
+    SearchResult,
     APIResponse
 )
 
+# Development convenience; serve.py applies the Alembic migrations before forking workers instead
+AUTO_CREATE_TABLES = os.getenv("AUTO_CREATE_TABLES", "true").lower() in ("1", "true", "yes")
+# How long shutdown waits for background classification runs
+SHUTDOWN_DRAIN_SECONDS = float(os.getenv("SHUTDOWN_DRAIN_SECONDS", "60"))
+
+def warm_up():
+    """Open a pooled database connection and build the extractor and classifier graph"""
+    for pooled_engine in [engine, *replica_engines]:
+        with pooled_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    print(f"✅ Database connection pools warmed ({len(replica_engines)} read replicas)")
+    
+    try:
+        get_extractor()
+        print("✅ Document extractor initialized")
+    except ValueError as e:
+        print(f"⚠️  Document extractor not initialized: {e}")
+    
+    try:
+        classifier_runner.warm_up()
+        print("✅ Classifier graph loaded")
+    except Exception as e:
+        print(f"⚠️  Classifier graph not loaded: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm this worker before /ready reports it, and drain background runs on shutdown"""
+    if AUTO_CREATE_TABLES:
+        try:
+            create_tables()
+            print("✅ Database tables checked/created successfully")
+        except Exception as e:
+            print(f"⚠️  Database table creation warning: {e}")
+    
+    try:
+        await run_in_threadpool(warm_up)
+        for pooled_engine in [async_engine, *async_replica_engines]:
+            async with pooled_engine.connect() as connection:
+                await connection.execute(text("SELECT 1"))
+    except Exception as e:
+        print(f"⚠️  Warm-up failed: {e}")
+    
+    # Events from every worker reach this worker's subscribers and invalidate its cache
+    listener = None
+    if engine.dialect.name == "postgresql":
+        listener = events.PostgresListener(engine)
+        listener.start()
+    readiness.mark_serving()
+    
+    yield
+    
+    # Uvicorn has stopped accepting connections and waits for in-flight requests; finish background runs too
+    readiness.mark_draining()
+    cancelled = await run_in_threadpool(classifier_runner.drain, SHUTDOWN_DRAIN_SECONDS)
+    if cancelled:
+        print(f"⚠️  Cancelled {cancelled} queued classification runs on shutdown")
+    if listener:
+        await run_in_threadpool(listener.stop)
+    tracing.flush()
+    engine.dispose()
+    for replica_engine in replica_engines:
+        replica_engine.dispose()
+    for pooled_engine in [async_engine, *async_replica_engines]:
+        await pooled_engine.dispose()
+
 app = FastAPI(
     title="LC Scanner API",
     description="API for managing Letter of Credit document requirements and export document classifications",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -52,34 +152,52 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Link", "ETag", tracing.TRACE_ID_HEADER, idempotency.REPLAYED_HEADER],
 )
+app.add_middleware(metrics.PrometheusMiddleware)
+metrics.instrument_engine(engine)
+tracing.setup_tracing()
+app.add_middleware(tracing.TracingMiddleware)
+tracing.instrument_engine(engine)
+for position, replica_engine in enumerate(replica_engines):
+    metrics.instrument_engine(replica_engine, role=f"replica{position}")
+    tracing.instrument_engine(replica_engine)
+metrics.instrument_engine(async_engine.sync_engine, role="async")
+tracing.instrument_engine(async_engine.sync_engine)
+for position, replica_engine in enumerate(async_replica_engines):
+    metrics.instrument_engine(replica_engine.sync_engine, role=f"async_replica{position}")
+    tracing.instrument_engine(replica_engine.sync_engine)
+
+def create_extractor() -> DocumentExtractor:
+    """Document extractor reporting stage timings and LLM usage to the metrics, guarded by the LLM breaker"""
+    return DocumentExtractor(
+        callbacks=classifier_runner.LLM_CALLBACKS,
+        on_stage=metrics.observe_extraction_stage
+    )
+
+_extractor: Optional[DocumentExtractor] = None
+
+def get_extractor() -> DocumentExtractor:
+    """Per-process extractor, created at startup so requests reuse its LLM client"""
+    global _extractor
+    if _extractor is None:
+        _extractor = create_extractor()
+    return _extractor
 
 # File handling utilities
-async def save_temp_file(upload_file: UploadFile) -> Path:
-    """Save uploaded file to temporary location."""
+async def store_upload(upload_file: UploadFile) -> Tuple[str, int]:
+    """Keep an uploaded PDF in the blob store (once per distinct content); returns (sha256, size)."""
     if not upload_file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
     
-    # Create temporary file
-    temp_dir = Path(tempfile.gettempdir()) / "lc_scanner_uploads"
-    temp_dir.mkdir(exist_ok=True)
-    
-    temp_file = temp_dir / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{upload_file.filename}"
-    
-    # Save uploaded content
     content = await upload_file.read()
-    with open(temp_file, 'wb') as f:
-        f.write(content)
-    
-    return temp_file
+    return await run_in_threadpool(blob_store.put_bytes, content)
 
-def cleanup_temp_file(file_path: Path):
-    """Clean up temporary file."""
-    try:
-        if file_path.exists():
-            file_path.unlink()
-    except Exception:
-        pass  # Ignore cleanup errors
+def stored_file_response(blob_sha256: Optional[str], filename: str) -> FileResponse:
+    """Stream an original PDF from the blob store."""
+    if not blob_sha256 or not blob_store.exists(blob_sha256):
+        raise HTTPException(status_code=404, detail="Original PDF not stored")
+    return FileResponse(blob_store.path(blob_sha256), media_type="application/pdf", filename=filename)
 
 def detect_document_type(filename: str) -> str:
     """Detect document type from filename."""
@@ -106,8 +224,8 @@ def get_schema_for_document_type(doc_type: str):
         return SimpleDocumentSchema()  # Default fallback
 
 # Schema mapping functions
-def map_lc_extraction_to_models(extraction_data: dict, db: Session):
-    """Map LC extraction results to database models."""
+def map_lc_extraction_to_models(extraction_data: dict, db: Session, blob: Optional[Tuple[str, int]] = None):
+    """Map LC extraction results to database models; blob is the (sha256, size) of the original PDF."""
     # Extract document requirements
     documents_required = extraction_data.pop("DOCUMENTS_REQUIRED", []) or []
     
@@ -159,6 +277,10 @@ def map_lc_extraction_to_models(extraction_data: dict, db: Session):
     if existing_lc:
         raise HTTPException(status_code=400, detail=f"LC with reference {lc_record.lc_reference} already exists")
     
+    mt700.normalize(lc_record)
+    if blob:
+        lc_record.blob_sha256 = blob[0]
+        add_reference(db, *blob)
     db.add(lc_record)
     db.commit()
     db.refresh(lc_record)
@@ -175,18 +297,19 @@ def map_lc_extraction_to_models(extraction_data: dict, db: Session):
         )
         db.add(requirement)
     
+    events.notify_changed(db, lc_record.id, "created")
     db.commit()
     db.refresh(lc_record)
     return lc_record
 
-def map_export_extraction_to_model(extraction_data: dict, lc_id: int, file_info: dict, doc_counter: int):
-    """Map export document extraction results to database model."""
+def map_export_extraction_to_model(extraction_data: dict, lc_id: int, file_info: dict):
+    """Map export document extraction results to database model (document_id is allocated before commit)."""
     return ExportDocModel(
         lc_id=lc_id,
-        document_id=f"export_doc_{doc_counter:03d}",
         filename=file_info["filename"],
         file_path=file_info.get("file_path"),
         file_size_bytes=file_info["file_size_bytes"],
+        blob_sha256=file_info.get("blob_sha256"),
         document_name=extraction_data.get("document_name"),
         summary=extraction_data.get("summary"),
         full_description=extraction_data.get("full_description"),
@@ -198,41 +321,56 @@ def map_export_extraction_to_model(extraction_data: dict, lc_id: int, file_info:
         }
     )
 
-# Create tables on startup (only if they don't exist)
-@app.on_event("startup")
-async def startup_event():
-    try:
-        create_tables()
-        print("✅ Database tables checked/created successfully")
-    except Exception as e:
-        print(f"⚠️  Database table creation warning: {e}")
-
 # Health check
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "service": "LC Scanner API"}
 
-# Letter of Credit upload endpoint
-@app.post("/lcs/upload", response_model=LetterOfCredit)
-async def upload_lc_document(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db)
-):
-    """Upload and process a Letter of Credit PDF document"""
-    temp_file = None
-    
-    try:
-        # Save uploaded file temporarily
-        temp_file = await save_temp_file(file)
+@app.get("/ready")
+def readiness_check(db: Session = Depends(get_db)):
+    """Database, connection pool, classifier pool and LLM breaker health; 503 when the node should be drained"""
+    body = readiness.readiness(db, engine, [async_engine, *async_replica_engines])
+    return JSONResponse(content=body, status_code=200 if body["ready"] else 503)
+
+# Operational stats
+@app.get("/admission")
+async def get_admission_stats():
+    """Current admissions, queue depth and rejections of each admission controller"""
+    return admission.stats()
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus metrics"""
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+async def respond_cached(request: Request, db: AsyncSession, lc_id: int, build):
+    """
+    response_cache.respond_async with build() reading the primary
+    A response built from a lagging replica would be served until the LC's next write.
+    """
+    with primary_reads(db.sync_session):
+        return await response_cache.respond_async(request, lc_id, build)
+
+# Concurrent uploads of the same PDF in this worker share one extraction
+lc_upload_flights = idempotency.SingleFlight()
+
+def extract_lc_from_blob(bind, blob_sha256: str, size_bytes: int, filename: str) -> Tuple[int, bool]:
+    """Extract and store the LC in a stored PDF unless one was already made from it; returns (lc_id, created)."""
+    with Session(bind=bind, autoflush=False) as db:
+        existing = db.query(LCModel.id).filter(LCModel.blob_sha256 == blob_sha256).first()
+        if existing:
+            return existing.id, False
         
         # Initialize document extractor
-        extractor = DocumentExtractor()
+        extractor = get_extractor()
         schema = LetterOfCreditSchema()
         
         # Extract LC data
         result = extractor.extract(
-            file_path=temp_file,
+            file_path=blob_store.path(blob_sha256),
             schema=schema,
+            filename=filename,
             output_path=None  # Don't save to file
         )
         
@@ -245,33 +383,114 @@ async def upload_lc_document(
             extraction_data = dict(result)
         
         # Map extraction data to database models
-        lc_record = map_lc_extraction_to_models(extraction_data, db)
+        with metrics.extraction_stage("persist"):
+            lc_record = map_lc_extraction_to_models(extraction_data, db, (blob_sha256, size_bytes))
+        return lc_record.id, True
+
+def load_lc_record(db: Session, lc_id: int) -> Optional[LCModel]:
+    """An LC with its requirements loaded, so serializing it on the event loop runs no lazy loads."""
+    return db.query(LCModel).options(selectinload(LCModel.document_requirements)).filter(LCModel.id == lc_id).first()
+
+# Letter of Credit upload endpoint
+@app.post("/lcs/upload", response_model=LetterOfCredit)
+async def upload_lc_document(
+    response: Response,
+    file: UploadFile = File(...),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_KEY_HEADER),
+    _: None = Depends(circuit_breaker.require_closed(circuit_breaker.llm_breaker)),
+    ticket: admission.Ticket = Depends(admission.admit("lc_upload")),
+    db: Session = Depends(get_db)
+):
+    """
+    Upload and process a Letter of Credit PDF document
+    A PDF an LC was already extracted from returns that LC, and concurrent uploads of the same
+    PDF share one extraction; with an Idempotency-Key a retry returns the first request's LC
+    """
+    claim = None
+    try:
+        # Keep the original so the LC can be re-extracted without another upload
+        blob_sha256, size_bytes = await store_upload(file)
+        
+        claim = await run_in_threadpool(
+            idempotency.claim, db, idempotency_key, "lc_upload", idempotency.request_hash(blob_sha256)
+        )
+        if claim.replay:
+            lc_id, created, shared = claim.resource_id, False, False
+        elif claim.held_elsewhere and not lc_upload_flights.in_flight(blob_sha256):
+            raise idempotency.in_progress_error()
+        else:
+            (lc_id, created), shared = await lc_upload_flights.do(
+                blob_sha256, extract_lc_from_blob, db.get_bind(), blob_sha256, size_bytes, file.filename
+            )
+            await run_in_threadpool(claim.complete, lc_id)
+        if created and not shared:
+            response_cache.invalidate(lc_id)
+        else:
+            response.headers[idempotency.REPLAYED_HEADER] = "true"
         
+        lc_record = await run_in_threadpool(load_lc_record, db, lc_id)
+        if not lc_record:
+            raise HTTPException(status_code=404, detail="Letter of Credit not found")
         return lc_record
         
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await run_in_threadpool(db.rollback)
+        open_error = circuit_breaker.open_error_in(e)
+        if open_error:
+            raise circuit_breaker.unavailable(open_error)
         raise HTTPException(status_code=500, detail=f"Error processing LC document: {str(e)}")
     finally:
-        # Clean up temporary file
-        if temp_file:
-            cleanup_temp_file(temp_file)
+        # No-op once completed; otherwise a retry with the key runs again
+        if claim:
+            await run_in_threadpool(claim.abandon)
 
 # Letter of Credit endpoints
 @app.get("/lcs/", response_model=List[LetterOfCredit])
-async def get_all_lcs(db: Session = Depends(get_db)):
-    """Get all Letter of Credits"""
-    lcs = db.query(LCModel).all()
-    return lcs
+async def get_all_lcs(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query("id", pattern="^(id|created_at)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, or * for all (default omits long texts)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of Letter of Credits (next page cursor in the X-Next-Cursor header)"""
+    selected = select_fields(LetterOfCredit, fields)
+    statement = select(LCModel).options(*load_options(
+        LCModel, selected, {"document_requirements": selectinload(LCModel.document_requirements)}, always=[sort]
+    ))
+    if created_from:
+        statement = statement.where(LCModel.created_at >= created_from)
+    if created_to:
+        statement = statement.where(LCModel.created_at < created_to)
+    
+    sort_column = LCModel.id if sort == "id" else LCModel.created_at
+    lcs, next_cursor = await paginate_async(
+        db, statement, sort, sort_column, LCModel.id, limit, cursor, descending=order == "desc"
+    )
+    set_next_cursor(request, response, next_cursor)
+    return serialization.list_response(LetterOfCredit, lcs, response, selected)
+
+async def load_lc_with_requirements(db: AsyncSession, lc_id: int) -> Optional[LCModel]:
+    """An LC with its requirements loaded, re-read even when the session already holds it."""
+    result = await db.execute(
+        select(LCModel).options(selectinload(LCModel.document_requirements))
+        .where(LCModel.id == lc_id).execution_options(populate_existing=True)
+    )
+    return result.scalars().first()
 
 @app.post("/lcs/", response_model=LetterOfCredit)
-async def create_lc(lc: LetterOfCreditCreate, db: Session = Depends(get_db)):
+async def create_lc(lc: LetterOfCreditCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new Letter of Credit"""
     
     # Check if LC reference already exists
-    existing_lc = db.query(LCModel).filter(LCModel.lc_reference == lc.lc_reference).first()
+    existing_lc = await db.scalar(select(LCModel.id).where(LCModel.lc_reference == lc.lc_reference))
     if existing_lc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -280,39 +499,103 @@ async def create_lc(lc: LetterOfCreditCreate, db: Session = Depends(get_db)):
     
     # Create LC
     db_lc = LCModel(**lc.model_dump(exclude={"document_requirements"}))
+    mt700.normalize(db_lc)
     db.add(db_lc)
-    db.commit()
-    db.refresh(db_lc)
+    await db.commit()
     
     # Create document requirements
     for req in lc.document_requirements:
         db_req = LCRequirementModel(**req.model_dump(), lc_id=db_lc.id)
         db.add(db_req)
     
-    db.commit()
-    db.refresh(db_lc)
-    return db_lc
+    await db.run_sync(events.notify_changed, db_lc.id, "created")
+    await db.commit()
+    response_cache.invalidate(db_lc.id)
+    return await load_lc_with_requirements(db, db_lc.id)
+
+@app.post("/lcs/batch")
+async def get_lcs_batch(batch: LCBatchRequest, db: Session = Depends(get_read_db)):
+    """
+    Many LCs by id or reference, each with its requirements-with-matches and classification summary
+    Streams {"not_found": {...}, "lcs": [...]} built from a fixed number of queries
+    """
+    requested = len(batch.ids) + len(batch.references)
+    if not requested:
+        raise HTTPException(status_code=400, detail="Provide ids or references")
+    if requested > lc_batch.MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {lc_batch.MAX_BATCH_SIZE} LCs per batch")
+    return StreamingResponse(
+        lc_batch.stream_batch(db.read_bind(), batch.ids, batch.references),
+        media_type="application/json"
+    )
 
 @app.get("/lcs/{lc_id}", response_model=LetterOfCredit)
-async def get_lc(lc_id: int, db: Session = Depends(get_db)):
+async def get_lc(
+    lc_id: int,
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields (default all)"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get a specific Letter of Credit by ID"""
-    lc = db.query(LCModel).filter(LCModel.id == lc_id).first()
-    if not lc:
-        raise HTTPException(status_code=404, detail="Letter of Credit not found")
-    return lc
+    selected = select_fields(LetterOfCredit, fields, detail=True)
+    
+    async def build():
+        lc = (await db.execute(select(LCModel).options(*load_options(
+            LCModel, selected, {"document_requirements": selectinload(LCModel.document_requirements)}
+        )).where(LCModel.id == lc_id))).scalars().first()
+        if not lc:
+            raise HTTPException(status_code=404, detail="Letter of Credit not found")
+        return serialization.from_rows(LetterOfCredit, [lc], selected)[0]
+    
+    return await respond_cached(request, db, lc_id, build)
 
 @app.get("/lcs/reference/{lc_reference}", response_model=LetterOfCredit)
-async def get_lc_by_reference(lc_reference: str, db: Session = Depends(get_db)):
+async def get_lc_by_reference(
+    lc_reference: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields (default all)"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get a Letter of Credit by reference number"""
-    lc = db.query(LCModel).filter(LCModel.lc_reference == lc_reference).first()
+    selected = select_fields(LetterOfCredit, fields, detail=True)
+    lc = (await db.execute(select(LCModel).options(*load_options(
+        LCModel, selected, {"document_requirements": selectinload(LCModel.document_requirements)}
+    )).where(LCModel.lc_reference == lc_reference))).scalars().first()
     if not lc:
         raise HTTPException(status_code=404, detail="Letter of Credit not found")
-    return lc
+    return serialization.item_response(LetterOfCredit, lc, selected)
+
+@app.get("/lcs/{lc_id}/file")
+async def get_lc_file(lc_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Download the original LC PDF from the blob store"""
+    lc = (await db.execute(
+        select(LCModel.lc_reference, LCModel.blob_sha256).where(LCModel.id == lc_id)
+    )).first()
+    if not lc:
+        raise HTTPException(status_code=404, detail="Letter of Credit not found")
+    return stored_file_response(lc.blob_sha256, f"{lc.lc_reference}.pdf")
+
+@app.get("/lcs/{lc_id}/events")
+async def stream_lc_events(lc_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Server-sent events for an LC (run_created, document_classified, run_completed, document_extracted, lc_changed)
+    Replaces polling the runs and classifications; on a resync event refetch them once
+    """
+    if not await db.scalar(select(LCModel.id).where(LCModel.id == lc_id)):
+        raise HTTPException(status_code=404, detail="Letter of Credit not found")
+    # Give the pooled connection back instead of holding it for the life of the stream
+    await db.close()
+    
+    subscription = events.hub.subscribe(lc_id)
+    return StreamingResponse(
+        events.stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.put("/lcs/{lc_id}", response_model=LetterOfCredit)
-async def update_lc(lc_id: int, lc_update: LetterOfCreditCreate, db: Session = Depends(get_db)):
+async def update_lc(lc_id: int, lc_update: LetterOfCreditCreate, db: AsyncSession = Depends(get_async_db)):
     """Update a Letter of Credit"""
-    db_lc = db.query(LCModel).filter(LCModel.id == lc_id).first()
+    db_lc = await db.get(LCModel, lc_id)
     if not db_lc:
         raise HTTPException(status_code=404, detail="Letter of Credit not found")
     
@@ -320,65 +603,79 @@ async def update_lc(lc_id: int, lc_update: LetterOfCreditCreate, db: Session = D
     for key, value in lc_update.model_dump(exclude={"document_requirements"}).items():
         if value is not None:
             setattr(db_lc, key, value)
+    mt700.normalize(db_lc)
     
-    db.commit()
-    db.refresh(db_lc)
-    return db_lc
+    await db.run_sync(events.notify_changed, lc_id, "updated")
+    await db.commit()
+    response_cache.invalidate(lc_id)
+    return await load_lc_with_requirements(db, lc_id)
 
 @app.delete("/lcs/{lc_id}")
-async def delete_lc(lc_id: int, db: Session = Depends(get_db)):
+async def delete_lc(lc_id: int, db: AsyncSession = Depends(get_async_db)):
     """Delete a Letter of Credit"""
-    db_lc = db.query(LCModel).filter(LCModel.id == lc_id).first()
+    db_lc = await db.get(LCModel, lc_id)
     if not db_lc:
         raise HTTPException(status_code=404, detail="Letter of Credit not found")
     
-    db.delete(db_lc)
-    db.commit()
+    await db.execute(delete(ExportDocumentCounterModel).where(ExportDocumentCounterModel.lc_id == lc_id))
+    await db.run_sync(release_reference, db_lc.blob_sha256)
+    await db.delete(db_lc)
+    await db.run_sync(events.notify_changed, lc_id, "deleted")
+    await db.commit()
+    response_cache.invalidate(lc_id)
     return {"message": "Letter of Credit deleted successfully"}
 
-# Export Documents upload endpoint
-@app.post("/export-documents/upload/{lc_id}", response_model=List[ExportDocument])
-async def upload_export_documents(
-    lc_id: int,
-    files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db)
+# Portfolio endpoints
+@app.get("/portfolio/exposure", response_model=PortfolioExposure)
+async def get_portfolio_exposure(
+    as_of: Optional[date] = Query(None, description="Count LCs not expired on this date (default today)"),
+    include_expired: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Upload and process multiple export document PDF files for a specific LC"""
-    
-    # Check if LC exists
-    lc = db.query(LCModel).filter(LCModel.id == lc_id).first()
-    if not lc:
-        raise HTTPException(status_code=404, detail="Letter of Credit not found")
-    
-    if not files:
-        raise HTTPException(status_code=400, detail="No files provided")
-    
-    temp_files = []
+    """Credit amount and maximum exposure per currency, from the typed MT700 columns"""
+    return await portfolio.exposure(db, as_of or date.today(), include_expired)
+
+@app.get("/portfolio/expiring", response_model=ExpiringLCs)
+async def get_expiring_lcs(
+    date_from: Optional[date] = Query(None, description="First expiry date (default today)"),
+    date_to: Optional[date] = Query(None, description=f"Last expiry date (default {portfolio.DEFAULT_EXPIRING_DAYS} days on)"),
+    currency: Optional[str] = Query(None, min_length=3, max_length=3),
+    limit: int = Query(portfolio.DEFAULT_EXPIRING_LIMIT, ge=1, le=portfolio.MAX_EXPIRING_LIMIT),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """LCs expiring in a date window, soonest first, with totals per currency"""
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=portfolio.DEFAULT_EXPIRING_DAYS)
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to is before date_from")
+    return await portfolio.expiring(db, date_from, date_to, currency.upper() if currency else None, limit)
+
+def extract_export_documents(db: Session, lc_id: int, uploads: List[tuple]) -> List[ExportDocModel]:
+    """
+    Extract uploads stored as (filename, (blob_sha256, size), storage error) and commit them as export documents.
+    Blocks on the extractor and the session, so the upload endpoint runs it in the threadpool.
+    """
     created_documents = []
     
     try:
         # Initialize document extractor
-        extractor = DocumentExtractor()
+        extractor = get_extractor()
         
-        # Get current document count for ID generation
-        existing_docs = db.query(ExportDocModel).filter(ExportDocModel.lc_id == lc_id).count()
-        doc_counter = existing_docs + 1
-        
-        for file in files:
-            temp_file = None
+        for filename, blob, upload_error in uploads:
             try:
-                # Save uploaded file temporarily
-                temp_file = await save_temp_file(file)
-                temp_files.append(temp_file)
+                # Recorded like a failed extraction
+                if upload_error:
+                    raise upload_error
                 
                 # Detect document type and get appropriate schema
-                doc_type = detect_document_type(file.filename)
+                doc_type = detect_document_type(filename)
                 schema = get_schema_for_document_type(doc_type)
                 
                 # Extract document data
                 result = extractor.extract(
-                    file_path=temp_file,
+                    file_path=blob_store.path(blob[0]),
                     schema=schema,
+                    filename=filename,
                     output_path=None  # Don't save to file
                 )
                 
@@ -392,44 +689,34 @@ async def upload_export_documents(
                 
                 # Prepare file info
                 file_info = {
-                    "filename": file.filename,
-                    "file_path": file.filename,  # Store original filename
-                    "file_size_bytes": temp_file.stat().st_size,
+                    "filename": filename,
+                    "file_path": filename,  # Store original filename
+                    "file_size_bytes": blob[1],
+                    "blob_sha256": blob[0],
                     "schema_used": schema.__class__.__name__,
                     "doc_type_detected": doc_type
                 }
                 
                 # Map extraction data to database model
-                export_doc = map_export_extraction_to_model(
-                    extraction_data, lc_id, file_info, doc_counter
-                )
-                
-                # Check if document already exists
-                existing_doc = db.query(ExportDocModel).filter(
-                    ExportDocModel.document_id == export_doc.document_id,
-                    ExportDocModel.lc_id == lc_id
-                ).first()
-                
-                if existing_doc:
-                    # Update document ID to avoid conflicts
-                    doc_counter += 1
-                    export_doc.document_id = f"export_doc_{doc_counter:03d}"
+                export_doc = map_export_extraction_to_model(extraction_data, lc_id, file_info)
                 
                 db.add(export_doc)
                 created_documents.append(export_doc)
-                doc_counter += 1
                 
             except Exception as e:
+                # The remaining files would fail the same way while the provider is down
+                if circuit_breaker.open_error_in(e):
+                    raise
                 # Log individual file error but continue with others
-                print(f"Error processing file {file.filename}: {str(e)}")
+                print(f"Error processing file {filename}: {str(e)}")
                 # Create error document entry
                 error_doc = ExportDocModel(
                     lc_id=lc_id,
-                    document_id=f"export_doc_{doc_counter:03d}",
-                    filename=file.filename,
-                    file_path=file.filename,
-                    file_size_bytes=temp_file.stat().st_size if temp_file and temp_file.exists() else 0,
-                    document_name=f"Failed: {file.filename}",
+                    filename=filename,
+                    file_path=filename,
+                    file_size_bytes=blob[1] if blob else 0,
+                    blob_sha256=blob[0] if blob else None,
+                    document_name=f"Failed: {filename}",
                     summary=f"Processing failed: {str(e)}",
                     full_description=f"Error occurred during document extraction: {str(e)}",
                     extraction_timestamp=datetime.utcnow(),
@@ -440,10 +727,25 @@ async def upload_export_documents(
                 )
                 db.add(error_doc)
                 created_documents.append(error_doc)
-                doc_counter += 1
+        
+        for doc in created_documents:
+            if doc.blob_sha256:
+                add_reference(db, doc.blob_sha256, doc.file_size_bytes)
+        
+        # Number the documents only now, so the LC's counter row stays locked just until the commit
+        for doc, document_id in zip(created_documents, allocate_document_ids(db, lc_id, len(created_documents))):
+            doc.document_id = document_id
+        db.flush()
+        for doc in created_documents:
+            events.notify(
+                db, lc_id, "document_extracted",
+                export_document_id=doc.id, document_id=doc.document_id, document_name=doc.document_name
+            )
         
         # Commit all documents
-        db.commit()
+        with metrics.extraction_stage("persist"):
+            db.commit()
+        response_cache.invalidate(lc_id)
         
         # Refresh all documents to get complete data
         for doc in created_documents:
@@ -453,123 +755,385 @@ async def upload_export_documents(
         
     except Exception as e:
         db.rollback()
+        open_error = circuit_breaker.open_error_in(e)
+        if open_error:
+            raise circuit_breaker.unavailable(open_error)
         raise HTTPException(status_code=500, detail=f"Error processing export documents: {str(e)}")
-    finally:
-        # Clean up all temporary files
-        for temp_file in temp_files:
-            cleanup_temp_file(temp_file)
+
+# Export Documents upload endpoint
+@app.post("/export-documents/upload/{lc_id}", response_model=List[ExportDocument])
+async def upload_export_documents(
+    lc_id: int,
+    files: List[UploadFile] = File(...),
+    _: None = Depends(circuit_breaker.require_closed(circuit_breaker.llm_breaker)),
+    ticket: admission.Ticket = Depends(admission.admit("export_upload")),
+    db: Session = Depends(get_db)
+):
+    """Upload and process multiple export document PDF files for a specific LC"""
+    
+    # Check if LC exists
+    if not await run_in_threadpool(db.get, LCModel, lc_id):
+        raise HTTPException(status_code=404, detail="Letter of Credit not found")
+    
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+    
+    # Keep the originals so the documents can be re-extracted without another upload
+    uploads = []
+    for file in files:
+        try:
+            uploads.append((file.filename, await store_upload(file), None))
+        except Exception as e:
+            uploads.append((file.filename, None, e))
+    
+    return await run_in_threadpool(extract_export_documents, db, lc_id, uploads)
 
 # Export Document endpoints
 @app.get("/export-documents/", response_model=List[ExportDocument])
-async def get_all_export_documents(db: Session = Depends(get_db)):
-    """Get all export documents"""
-    docs = db.query(ExportDocModel).all()
-    return docs
+async def get_all_export_documents(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query("id", pattern="^(id|created_at)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    lc_id: Optional[int] = None,
+    is_matched: Optional[bool] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, or * for all (default omits full_description)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of export documents (next page cursor in the X-Next-Cursor header)"""
+    selected = select_fields(ExportDocument, fields)
+    statement = select(ExportDocModel).options(*load_options(ExportDocModel, selected, always=[sort]))
+    if lc_id is not None:
+        statement = statement.where(ExportDocModel.lc_id == lc_id)
+    if is_matched is not None:
+        statement = statement.where(ExportDocModel.is_matched == is_matched)
+    if created_from:
+        statement = statement.where(ExportDocModel.created_at >= created_from)
+    if created_to:
+        statement = statement.where(ExportDocModel.created_at < created_to)
+    
+    sort_column = ExportDocModel.id if sort == "id" else ExportDocModel.created_at
+    docs, next_cursor = await paginate_async(
+        db, statement, sort, sort_column, ExportDocModel.id, limit, cursor, descending=order == "desc"
+    )
+    set_next_cursor(request, response, next_cursor)
+    return serialization.list_response(ExportDocument, docs, response, selected)
 
 @app.post("/export-documents/", response_model=ExportDocument)
-async def create_export_document(doc: ExportDocumentCreate, db: Session = Depends(get_db)):
+async def create_export_document(doc: ExportDocumentCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new export document"""
     
     # Check if document ID already exists
-    existing_doc = db.query(ExportDocModel).filter(ExportDocModel.document_id == doc.document_id).first()
+    existing_doc = await db.scalar(select(ExportDocModel.id).where(ExportDocModel.document_id == doc.document_id))
     if existing_doc:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Export document with ID {doc.document_id} already exists"
         )
+    if not await db.scalar(select(LCModel.id).where(LCModel.id == doc.lc_id)):
+        raise HTTPException(status_code=404, detail="Letter of Credit not found")
     
     db_doc = ExportDocModel(**doc.model_dump())
     db.add(db_doc)
-    db.commit()
-    db.refresh(db_doc)
+    await db.run_sync(events.notify_changed, doc.lc_id, "documents_added")
+    await db.commit()
+    response_cache.invalidate(doc.lc_id)
+    await db.refresh(db_doc)
     return db_doc
 
 @app.get("/export-documents/{doc_id}", response_model=ExportDocument)
-async def get_export_document(doc_id: int, db: Session = Depends(get_db)):
+async def get_export_document(
+    doc_id: int,
+    fields: Optional[str] = Query(None, description="Comma-separated fields (default all)"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get a specific export document by ID"""
-    doc = db.query(ExportDocModel).filter(ExportDocModel.id == doc_id).first()
+    selected = select_fields(ExportDocument, fields, detail=True)
+    doc = (await db.execute(select(ExportDocModel).options(*load_options(ExportDocModel, selected)).where(
+        ExportDocModel.id == doc_id
+    ))).scalars().first()
     if not doc:
         raise HTTPException(status_code=404, detail="Export document not found")
-    return doc
+    return serialization.item_response(ExportDocument, doc, selected)
 
 @app.get("/export-documents/document-id/{document_id}", response_model=ExportDocument)
-async def get_export_document_by_document_id(document_id: str, db: Session = Depends(get_db)):
+async def get_export_document_by_document_id(
+    document_id: str,
+    fields: Optional[str] = Query(None, description="Comma-separated fields (default all)"),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get an export document by document_id"""
-    doc = db.query(ExportDocModel).filter(ExportDocModel.document_id == document_id).first()
+    selected = select_fields(ExportDocument, fields, detail=True)
+    doc = (await db.execute(select(ExportDocModel).options(*load_options(ExportDocModel, selected)).where(
+        ExportDocModel.document_id == document_id
+    ))).scalars().first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Export document not found")
+    return serialization.item_response(ExportDocument, doc, selected)
+
+@app.get("/export-documents/{doc_id}/file")
+async def get_export_document_file(doc_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Download the original PDF of an export document from the blob store"""
+    doc = (await db.execute(
+        select(ExportDocModel.filename, ExportDocModel.blob_sha256).where(ExportDocModel.id == doc_id)
+    )).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Export document not found")
+    return stored_file_response(doc.blob_sha256, doc.filename)
+
+def reextract_from_blob(db: Session, doc_id: int) -> ExportDocModel:
+    """Extract an export document again from its stored PDF and commit it; blocking, so run in the threadpool."""
+    doc = db.query(ExportDocModel).filter(ExportDocModel.id == doc_id).first()
+    if not doc:
+        raise HTTPException(status_code=404, detail="Export document not found")
+    if not doc.blob_sha256 or not blob_store.exists(doc.blob_sha256):
+        raise HTTPException(status_code=409, detail="The original PDF of this document was not stored; upload it again")
+    
+    doc_type = detect_document_type(doc.filename)
+    schema = get_schema_for_document_type(doc_type)
+    try:
+        result = get_extractor().extract(
+            file_path=blob_store.path(doc.blob_sha256),
+            schema=schema,
+            filename=doc.filename,
+            output_path=None
+        )
+    except Exception as e:
+        open_error = circuit_breaker.open_error_in(e)
+        if open_error:
+            raise circuit_breaker.unavailable(open_error)
+        raise HTTPException(status_code=500, detail=f"Error re-extracting export document: {str(e)}")
+    
+    extraction_data = result.model_dump() if hasattr(result, 'model_dump') else dict(result)
+    doc.document_name = extraction_data.get("document_name")
+    doc.summary = extraction_data.get("summary")
+    doc.full_description = extraction_data.get("full_description")
+    doc.extraction_timestamp = datetime.utcnow()
+    metadata = {key: value for key, value in (doc.extraction_metadata or {}).items() if key != "error"}
+    doc.extraction_metadata = {
+        **metadata,
+        "schema_used": schema.__class__.__name__,
+        "extraction_timestamp": doc.extraction_timestamp.isoformat(),
+        "doc_type_detected": doc_type,
+        "reextracted_from_blob": doc.blob_sha256
+    }
+    events.notify(
+        db, doc.lc_id, "document_extracted",
+        export_document_id=doc.id, document_id=doc.document_id, document_name=doc.document_name
+    )
+    with metrics.extraction_stage("persist"):
+        db.commit()
+    response_cache.invalidate(doc.lc_id)
+    db.refresh(doc)
     return doc
 
-# Classification endpoints
-@app.post("/classify/{lc_id}", response_model=ClassificationRun)
-async def run_classification(
-    lc_id: int, 
-    export_doc_ids: Optional[List[int]] = None,
+@app.post("/export-documents/{doc_id}/reextract", response_model=ExportDocument)
+async def reextract_export_document(
+    doc_id: int,
+    _: None = Depends(circuit_breaker.require_closed(circuit_breaker.llm_breaker)),
+    ticket: admission.Ticket = Depends(admission.admit("export_upload")),
     db: Session = Depends(get_db)
 ):
-    """Run classification for an LC against export documents"""
-    
+    """Extract an export document again from its stored original PDF, without a new upload"""
+    return await run_in_threadpool(reextract_from_blob, db, doc_id)
+
+# Search endpoints
+@app.get("/search", response_model=List[SearchResult])
+async def search_documents(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=500, description='Words, "quoted phrases", or -excluded words'),
+    kind: Optional[List[str]] = Query(None, description=f"Limit to {', '.join(search.SEARCH_KINDS)}"),
+    lc_id: Optional[int] = None,
+    limit: int = Query(search.DEFAULT_SEARCH_LIMIT, ge=1, le=search.MAX_SEARCH_LIMIT),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Ranked full-text search over export documents, LC clauses and requirements (next page cursor in X-Next-Cursor)"""
+    results, next_cursor = await db.run_sync(search.search, q, kinds=kind, lc_id=lc_id, limit=limit, cursor=cursor)
+    set_next_cursor(request, response, next_cursor)
+    return results
+
+# Classification endpoints
+def load_run(db: Session, run_id: int) -> Optional[ClassificationRunModel]:
+    """A classification run with its classifications loaded, so serializing it on the event loop runs no lazy loads."""
+    return db.query(ClassificationRunModel).options(
+        selectinload(ClassificationRunModel.classifications).options(
+            selectinload(ClassificationModel.export_document), selectinload(ClassificationModel.lc_requirement)
+        )
+    ).filter(ClassificationRunModel.id == run_id).first()
+
+def existing_run_response(db: Session, response: Response, run_id: int) -> ClassificationRunModel:
+    """An earlier classification run, returned in place of starting a new one."""
+    db_run = load_run(db, run_id)
+    if not db_run:
+        raise HTTPException(status_code=404, detail="Classification run not found")
+    response.headers[idempotency.REPLAYED_HEADER] = "true"
+    return db_run
+
+def share_run(db: Session, response: Response, claim: idempotency.Claim, run_id: int) -> ClassificationRunModel:
+    """Complete the claim with a run this worker is already classifying and return that run."""
+    claim.complete(run_id)
+    return existing_run_response(db, response, run_id)
+
+def count_classification_work(db: Session, lc_id: int, export_doc_ids: Optional[List[int]]) -> Tuple[int, int]:
+    """The LC's export documents to classify and its requirements; 404 when the LC does not exist."""
     # Check if LC exists
-    lc = db.query(LCModel).filter(LCModel.id == lc_id).first()
-    if not lc:
+    if not db.query(LCModel.id).filter(LCModel.id == lc_id).first():
         raise HTTPException(status_code=404, detail="Letter of Credit not found")
     
-    # Get export documents (all if not specified)
+    # Get this LC's export documents (all if not specified)
+    export_docs_query = db.query(ExportDocModel.id).filter(ExportDocModel.lc_id == lc_id)
     if export_doc_ids:
-        export_docs = db.query(ExportDocModel).filter(ExportDocModel.id.in_(export_doc_ids)).all()
-    else:
-        export_docs = db.query(ExportDocModel).all()
+        export_docs_query = export_docs_query.filter(ExportDocModel.id.in_(export_doc_ids))
+    total_export_docs = export_docs_query.count()
     
     # Get LC requirements
-    lc_requirements = db.query(LCRequirementModel).filter(LCRequirementModel.lc_id == lc_id).all()
+    total_requirements = db.query(LCRequirementModel).filter(LCRequirementModel.lc_id == lc_id).count()
+    return total_export_docs, total_requirements
+
+# Held from the last check for an active run until the new run is submitted, so concurrent requests
+# of this worker for the same documents share one run
+classification_start_lock = threading.Lock()
+
+def start_classification_run(
+    db: Session, response: Response, claim: idempotency.Claim, lc_id: int, export_doc_ids: Optional[List[int]],
+    total_export_docs: int, total_requirements: int, ticket: Optional[admission.Ticket]
+) -> ClassificationRunModel:
+    """Record a classification run and submit it to the classifier pool (a completed empty run without a ticket)."""
+    with classification_start_lock:
+        # Checked again after waiting for admission
+        active_run_id = classifier_runner.find_active_run(lc_id, export_doc_ids) if ticket else None
+        if active_run_id is not None:
+            ticket.release()
+            return share_run(db, response, claim, active_run_id)
+        
+        # Create classification run
+        run_data = ClassificationRunCreate(
+            lc_id=lc_id,
+            total_export_docs=total_export_docs,
+            total_lc_requirements=total_requirements,
+            model_used=classifier_runner.CLASSIFIER_MODEL_NAME,
+            status="running" if ticket else "completed"
+        )
+        
+        try:
+            db_run = ClassificationRunModel(
+                **run_data.model_dump(exclude={"run_metadata"}),
+                trace_id=tracing.current_trace_id()
+            )
+            db.add(db_run)
+            db.flush()
+            events.notify(
+                db, lc_id, "run_created",
+                run_id=db_run.id, status=db_run.status, total_export_docs=total_export_docs
+            )
+            db.commit()
+            
+            if ticket:
+                classifier_runner.submit_classification(
+                    db_run.id, lc_id, total_export_docs, export_doc_ids, on_finish=ticket.release
+                )
+        except Exception:
+            if ticket:
+                ticket.release()
+            raise
     
-    # Create classification run
-    run_data = ClassificationRunCreate(
-        lc_id=lc_id,
-        total_export_docs=len(export_docs),
-        total_lc_requirements=len(lc_requirements),
-        model_used="manual_api_call",
-        status="completed"
+    claim.complete(db_run.id)
+    response_cache.invalidate(lc_id)
+    return load_run(db, db_run.id)
+
+@app.post("/classify/{lc_id}", response_model=ClassificationRun)
+async def run_classification(
+    lc_id: int, 
+    request: Request,
+    response: Response,
+    export_doc_ids: Optional[List[int]] = None,
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_KEY_HEADER),
+    db: Session = Depends(get_db)
+):
+    """
+    Start a background classification run of the LC's export documents against its requirements
+    While this worker is still classifying the same documents, that run is returned instead of
+    starting another; with an Idempotency-Key a retry returns the first request's run
+    Database work runs in the threadpool; only the wait for admission stays on the event loop
+    """
+    total_export_docs, total_requirements = await run_in_threadpool(
+        count_classification_work, db, lc_id, export_doc_ids
     )
     
-    db_run = ClassificationRunModel(**run_data.model_dump())
-    db.add(db_run)
-    db.commit()
-    db.refresh(db_run)
-    
-    # For now, create placeholder classifications
-    # In a real implementation, this would call the LangGraph classification system
-    matches_found = 0
-    for export_doc in export_docs:
-        for lc_req in lc_requirements:
-            # Placeholder logic - in reality, this would use AI classification
-            is_matched = "invoice" in export_doc.document_name.lower() and "invoice" in lc_req.name.lower()
-            confidence = 0.8 if is_matched else 0.2
-            
-            if is_matched:
-                matches_found += 1
-            
-            classification = ClassificationModel(
-                export_document_id=export_doc.id,
-                lc_requirement_id=lc_req.id,
-                classification_run_id=db_run.id,
-                confidence_score=confidence,
-                reasoning=f"Document type matching based on keywords",
-                is_matched=is_matched
-            )
-            db.add(classification)
+    # Nothing to classify - record an empty completed run without starting the classifier
+    has_work = total_export_docs > 0 and total_requirements > 0
     
-    # Update run with matches found
-    db_run.total_matches_found = matches_found
-    db_run.status = "completed"
+    claim = await run_in_threadpool(
+        idempotency.claim,
+        db, idempotency_key, "classify", idempotency.request_hash(lc_id, sorted(export_doc_ids or []))
+    )
+    try:
+        if claim.replay:
+            return await run_in_threadpool(existing_run_response, db, response, claim.resource_id)
+        if claim.held_elsewhere:
+            raise idempotency.in_progress_error()
+        
+        active_run_id = classifier_runner.find_active_run(lc_id, export_doc_ids) if has_work else None
+        if active_run_id is not None:
+            return await run_in_threadpool(share_run, db, response, claim, active_run_id)
+        
+        # Fail fast while the LLM provider is down; the admission slot is held until the background run finishes
+        if has_work:
+            try:
+                circuit_breaker.llm_breaker.check()
+            except circuit_breaker.CircuitOpenError as e:
+                raise circuit_breaker.unavailable(e)
+        ticket = await admission.acquire("classify", request) if has_work else None
+        
+        return await run_in_threadpool(
+            start_classification_run,
+            db, response, claim, lc_id, export_doc_ids, total_export_docs, total_requirements, ticket
+        )
+    finally:
+        # No-op once completed; otherwise a retry with the key runs again
+        await run_in_threadpool(claim.abandon)
+
+@app.get("/classification-runs/{run_id}/progress", response_model=ClassificationProgress)
+async def get_classification_progress(run_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Report how many documents a classification run has classified so far"""
+    progress = classifier_runner.get_progress(run_id)
+    if progress:
+        return ClassificationProgress(**progress)
     
-    db.commit()
-    db.refresh(db_run)
-    return db_run
+    # Run started by another process or before a restart - report what the database knows
+    run = await db.get(ClassificationRunModel, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Classification run not found")
+    
+    if run.status == "completed":
+        documents_classified = run.total_export_docs
+    else:
+        # Only matched documents are persisted while a run is in progress
+        classified_documents = select(ClassificationModel.export_document_id).where(
+            ClassificationModel.classification_run_id == run_id
+        ).distinct().subquery()
+        documents_classified = await db.scalar(select(func.count()).select_from(classified_documents))
+    
+    return ClassificationProgress(
+        run_id=run.id,
+        lc_id=run.lc_id,
+        status=run.status,
+        documents_classified=documents_classified,
+        total_documents=run.total_export_docs,
+        matches_found=run.total_matches_found or 0,
+        error_message=run.error_message,
+        started_at=run.run_timestamp,
+        updated_at=run.updated_at
+    )
 
-@app.get("/classifications/{lc_id}", response_model=List[DocumentClassification])
-async def get_classifications(lc_id: int, db: Session = Depends(get_db)):
-    """Get classification results for an LC"""
+def build_classifications(db: Session, lc_id: int) -> List[DocumentClassification]:
+    """Load the classification results of the latest run for an LC"""
     
     # Check if LC exists
     lc = db.query(LCModel).filter(LCModel.id == lc_id).first()
@@ -584,21 +1148,64 @@ async def get_classifications(lc_id: int, db: Session = Depends(get_db)):
     if not latest_run:
         return []
     
-    classifications = db.query(ClassificationModel).filter(
+    classifications = db.query(ClassificationModel).options(
+        selectinload(ClassificationModel.export_document),
+        selectinload(ClassificationModel.lc_requirement)
+    ).filter(
         ClassificationModel.classification_run_id == latest_run.id
     ).all()
     
-    return classifications
+    return serialization.from_rows(DocumentClassification, classifications)
+
+@app.get("/classifications/{lc_id}", response_model=List[DocumentClassification])
+async def get_classifications(lc_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get classification results for an LC"""
+    return await respond_cached(request, db, lc_id, lambda: db.run_sync(build_classifications, lc_id))
 
 @app.get("/classification-runs/", response_model=List[ClassificationRun])
-async def get_classification_runs(db: Session = Depends(get_db)):
-    """Get all classification runs"""
-    runs = db.query(ClassificationRunModel).order_by(ClassificationRunModel.run_timestamp.desc()).all()
-    return runs
+async def get_classification_runs(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: str = Query("run_timestamp", pattern="^(id|run_timestamp)$"),
+    order: str = Query("desc", pattern="^(asc|desc)$"),
+    lc_id: Optional[int] = None,
+    run_status: Optional[str] = Query(None, alias="status"),
+    run_from: Optional[datetime] = None,
+    run_to: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, or * for all (default omits classifications)"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of classification runs, newest first by default"""
+    selected = select_fields(ClassificationRun, fields)
+    document_loader = selectinload(ClassificationModel.export_document)
+    if selected is not None:
+        document_loader = document_loader.defer(ExportDocModel.full_description)
+    classifications_loader = selectinload(ClassificationRunModel.classifications).options(
+        document_loader, selectinload(ClassificationModel.lc_requirement)
+    )
+    statement = select(ClassificationRunModel).options(*load_options(
+        ClassificationRunModel, selected, {"classifications": classifications_loader}, always=[sort]
+    ))
+    if lc_id is not None:
+        statement = statement.where(ClassificationRunModel.lc_id == lc_id)
+    if run_status:
+        statement = statement.where(ClassificationRunModel.status == run_status)
+    if run_from:
+        statement = statement.where(ClassificationRunModel.run_timestamp >= run_from)
+    if run_to:
+        statement = statement.where(ClassificationRunModel.run_timestamp < run_to)
+    
+    sort_column = ClassificationRunModel.id if sort == "id" else ClassificationRunModel.run_timestamp
+    runs, next_cursor = await paginate_async(
+        db, statement, sort, sort_column, ClassificationRunModel.id, limit, cursor, descending=order == "desc"
+    )
+    set_next_cursor(request, response, next_cursor)
+    return serialization.list_response(ClassificationRun, runs, response, selected)
 
-@app.get("/classification-summary/{lc_id}", response_model=ClassificationSummary)
-async def get_classification_summary(lc_id: int, db: Session = Depends(get_db)):
-    """Get classification summary for an LC"""
+def build_classification_summary(db: Session, lc_id: int) -> ClassificationSummary:
+    """Compute the classification summary of the latest run for an LC"""
     
     # Check if LC exists
     lc = db.query(LCModel).filter(LCModel.id == lc_id).first()
@@ -621,21 +1228,22 @@ async def get_classification_summary(lc_id: int, db: Session = Depends(get_db)):
             unmatched_export_docs=[]
         )
     
-    # Get classifications
-    classifications = db.query(ClassificationModel).filter(
+    # Requirements and export documents of this LC with no match in the latest run
+    matched = db.query(ClassificationModel).filter(
         ClassificationModel.classification_run_id == latest_run.id,
         ClassificationModel.is_matched == True
-    ).all()
-    
-    matched_requirements = set(c.lc_requirement_id for c in classifications)
-    matched_export_docs = set(c.export_document_id for c in classifications)
-    
-    # Get all requirements and export docs for this LC
-    all_requirements = db.query(LCRequirementModel).filter(LCRequirementModel.lc_id == lc_id).all()
-    all_export_docs = db.query(ExportDocModel).all()  # Assuming all export docs are relevant
+    )
+    matched_requirement_ids = matched.with_entities(ClassificationModel.lc_requirement_id)
+    matched_export_doc_ids = matched.with_entities(ClassificationModel.export_document_id)
     
-    unmatched_req_names = [req.name for req in all_requirements if req.id not in matched_requirements]
-    unmatched_doc_names = [doc.document_name for doc in all_export_docs if doc.id not in matched_export_docs]
+    unmatched_req_names = [name for (name,) in db.query(LCRequirementModel.name).filter(
+        LCRequirementModel.lc_id == lc_id,
+        LCRequirementModel.id.not_in(matched_requirement_ids)
+    ).order_by(LCRequirementModel.id)]
+    unmatched_doc_names = [name for (name,) in db.query(ExportDocModel.document_name).filter(
+        ExportDocModel.lc_id == lc_id,
+        ExportDocModel.id.not_in(matched_export_doc_ids)
+    ).order_by(ExportDocModel.id)]
     
     match_percentage = (latest_run.total_matches_found / max(latest_run.total_lc_requirements, 1)) * 100
     
@@ -649,47 +1257,55 @@ async def get_classification_summary(lc_id: int, db: Session = Depends(get_db)):
         unmatched_export_docs=unmatched_doc_names
     )
 
+@app.get("/classification-summary/{lc_id}", response_model=ClassificationSummary)
+async def get_classification_summary(lc_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get classification summary for an LC"""
+    return await respond_cached(request, db, lc_id, lambda: db.run_sync(build_classification_summary, lc_id))
+
 # Reset classifications endpoint
 @app.delete("/classifications/reset/{lc_id}", response_model=APIResponse)
-async def reset_classifications(lc_id: int, db: Session = Depends(get_db)):
+async def reset_classifications(lc_id: int, db: AsyncSession = Depends(get_async_db)):
     """Reset all classifications for a given LC's export documents"""
     
     # Check if LC exists
-    lc = db.query(LCModel).filter(LCModel.id == lc_id).first()
+    lc = await db.get(LCModel, lc_id)
     if not lc:
         raise HTTPException(status_code=404, detail="Letter of Credit not found")
     
     try:
         # Get all classification runs for this LC
-        classification_runs = db.query(ClassificationRunModel).filter(
-            ClassificationRunModel.lc_id == lc_id
-        ).all()
-        
-        run_ids = [run.id for run in classification_runs]
+        run_ids = (await db.execute(
+            select(ClassificationRunModel.id).where(ClassificationRunModel.lc_id == lc_id)
+        )).scalars().all()
         
         # Delete all document classifications for these runs
         classifications_deleted = 0
         if run_ids:
-            classifications_deleted = db.query(ClassificationModel).filter(
-                ClassificationModel.classification_run_id.in_(run_ids)
-            ).delete(synchronize_session=False)
+            classifications_deleted = (await db.execute(
+                delete(ClassificationModel).where(ClassificationModel.classification_run_id.in_(run_ids)),
+                execution_options={"synchronize_session": False}
+            )).rowcount
         
         # Delete all classification runs for this LC
-        runs_deleted = db.query(ClassificationRunModel).filter(
-            ClassificationRunModel.lc_id == lc_id
-        ).delete(synchronize_session=False)
+        runs_deleted = (await db.execute(
+            delete(ClassificationRunModel).where(ClassificationRunModel.lc_id == lc_id),
+            execution_options={"synchronize_session": False}
+        )).rowcount
         
         # Reset classification fields in export documents for this LC
-        export_docs_updated = db.query(ExportDocModel).filter(
-            ExportDocModel.lc_id == lc_id
-        ).update({
-            ExportDocModel.lc_requirement_id: None,
-            ExportDocModel.confidence_score: None,
-            ExportDocModel.reasoning: None,
-            ExportDocModel.is_matched: False
-        }, synchronize_session=False)
+        export_docs_updated = (await db.execute(
+            update(ExportDocModel).where(ExportDocModel.lc_id == lc_id).values(
+                lc_requirement_id=None,
+                confidence_score=None,
+                reasoning=None,
+                is_matched=False
+            ),
+            execution_options={"synchronize_session": False}
+        )).rowcount
         
-        db.commit()
+        await db.run_sync(events.notify_changed, lc_id, "classifications_reset")
+        await db.commit()
+        response_cache.invalidate(lc_id)
         
         return APIResponse(
             success=True,
@@ -704,13 +1320,12 @@ async def reset_classifications(lc_id: int, db: Session = Depends(get_db)):
         )
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error resetting classifications: {str(e)}")
 
 # New endpoint: Get LC requirements with matched documents
-@app.get("/lcs/{lc_id}/requirements-with-matches")
-async def get_lc_requirements_with_matches(lc_id: int, db: Session = Depends(get_db)):
-    """Get all required documents for a given LC and their matched export documents"""
+def build_requirements_with_matches(db: Session, lc_id: int) -> dict:
+    """Collect the requirements of an LC with their matched export documents from the latest run"""
     
     # Check if LC exists
     lc = db.query(LCModel).filter(LCModel.id == lc_id).first()
@@ -718,85 +1333,192 @@ async def get_lc_requirements_with_matches(lc_id: int, db: Session = Depends(get
         raise HTTPException(status_code=404, detail="Letter of Credit not found")
     
     # Get all requirements for this LC
-    requirements = db.query(LCRequirementModel).filter(LCRequirementModel.lc_id == lc_id).all()
+    requirements = db.query(LCRequirementModel).filter(
+        LCRequirementModel.lc_id == lc_id
+    ).order_by(LCRequirementModel.id).all()
     
     # Get latest classification run for this LC
     latest_run = db.query(ClassificationRunModel).filter(
         ClassificationRunModel.lc_id == lc_id
     ).order_by(ClassificationRunModel.run_timestamp.desc()).first()
     
-    result = {
-        "lc_reference": lc.lc_reference,
-        "lc_id": lc_id,
-        "total_requirements": len(requirements),
-        "classification_run_id": latest_run.id if latest_run else None,
-        "classification_timestamp": latest_run.run_timestamp if latest_run else None,
-        "requirements": []
-    }
+    # Load every matched document of the latest run in one query
+    matched_rows = []
+    if latest_run:
+        matched_rows = db.query(
+            ClassificationModel.lc_requirement_id,
+            ClassificationModel.confidence_score,
+            ClassificationModel.reasoning,
+            ExportDocModel.id,
+            ExportDocModel.document_id,
+            ExportDocModel.filename,
+            ExportDocModel.document_name,
+            ExportDocModel.summary,
+            ExportDocModel.file_size_bytes,
+            ExportDocModel.extraction_timestamp
+        ).join(
+            ExportDocModel, ExportDocModel.id == ClassificationModel.export_document_id
+        ).filter(
+            ClassificationModel.classification_run_id == latest_run.id,
+            ClassificationModel.is_matched == True
+        ).order_by(ClassificationModel.id).all()
     
-    for requirement in requirements:
-        req_data = {
-            "requirement_id": requirement.id,
-            "document_id": requirement.document_id,
-            "name": requirement.name,
-            "description": requirement.description,
-            "quantity": requirement.quantity,
-            "validation_criteria": requirement.validation_criteria,
-            "matched_documents": [],
-            "match_count": 0
-        }
-        
-        if latest_run:
-            # Get all matched documents for this requirement
-            matched_classifications = db.query(ClassificationModel).filter(
-                ClassificationModel.lc_requirement_id == requirement.id,
-                ClassificationModel.classification_run_id == latest_run.id,
-                ClassificationModel.is_matched == True
-            ).all()
-            
-            req_data["match_count"] = len(matched_classifications)
-            
-            for classification in matched_classifications:
-                export_doc = db.query(ExportDocModel).filter(
-                    ExportDocModel.id == classification.export_document_id
-                ).first()
-                
-                if export_doc:
-                    matched_doc = {
-                        "export_document_id": export_doc.id,
-                        "document_id": export_doc.document_id,
-                        "filename": export_doc.filename,
-                        "document_name": export_doc.document_name,
-                        "summary": export_doc.summary,
-                        "confidence_score": classification.confidence_score,
-                        "reasoning": classification.reasoning,
-                        "file_size_bytes": export_doc.file_size_bytes,
-                        "extraction_timestamp": export_doc.extraction_timestamp
-                    }
-                    req_data["matched_documents"].append(matched_doc)
-        
-        result["requirements"].append(req_data)
+    return lc_batch.requirements_with_matches(lc, requirements, latest_run, matched_rows)
+
+@app.get("/lcs/{lc_id}/requirements-with-matches")
+async def get_lc_requirements_with_matches(lc_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get all required documents for a given LC and their matched export documents"""
+    return await respond_cached(
+        request, db, lc_id, lambda: db.run_sync(build_requirements_with_matches, lc_id)
+    )
+
+def build_match_suggestions(db: Session, lc_id: int, k: int, export_document_id: Optional[int] = None) -> List[dict]:
+    """Top-k candidate requirements per export document of an LC from the local embedding index"""
+    if not db.query(LCModel.id).filter(LCModel.id == lc_id).first():
+        raise HTTPException(status_code=404, detail="Letter of Credit not found")
+    
+    requirements = db.query(LCRequirementModel).options(undefer(LCRequirementModel.embedding)).filter(
+        LCRequirementModel.lc_id == lc_id
+    ).order_by(LCRequirementModel.id).all()
+    docs_query = db.query(ExportDocModel).options(
+        load_only(ExportDocModel.id, ExportDocModel.document_id, ExportDocModel.document_name,
+                  ExportDocModel.summary, ExportDocModel.embedding)
+    ).filter(ExportDocModel.lc_id == lc_id)
+    if export_document_id is not None:
+        docs_query = docs_query.filter(ExportDocModel.id == export_document_id)
+    docs = docs_query.order_by(ExportDocModel.id).all()
+    if not docs or not requirements:
+        return []
     
-    # Add summary statistics
-    total_matches = sum(req["match_count"] for req in result["requirements"])
-    result["total_matches"] = total_matches
-    result["match_percentage"] = (total_matches / max(len(requirements), 1)) * 100 if requirements else 0
+    # A read endpoint: rows stored without embeddings get them in memory only (python embeddings.py stores them)
+    index = embeddings.requirement_index([
+        {"id": r.id, "document_id": r.document_id, "name": r.name, "description": r.description,
+         "embedding": r.embedding}
+        for r in requirements
+    ])
+    vectors = np.vstack([embeddings.document_embedding(doc) for doc in docs])
     
-    return result
+    return [
+        {
+            "export_document_id": doc.id,
+            "document_id": doc.document_id,
+            "document_name": doc.document_name,
+            "candidates": [
+                {"lc_requirement_id": requirement["id"], "document_id": requirement["document_id"],
+                 "name": requirement["name"], "score": max(score, 0.0)}
+                for requirement, score in candidates
+            ]
+        }
+        for doc, candidates in zip(docs, index.top_k(vectors, k))
+    ]
+
+@app.get("/lcs/{lc_id}/suggest-matches", response_model=List[MatchSuggestion])
+async def suggest_matches(
+    lc_id: int,
+    request: Request,
+    k: int = Query(3, ge=1, le=50),
+    export_document_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Candidate LC requirements for each export document, ranked by local embedding similarity (no LLM call)"""
+    return await respond_cached(
+        request, db, lc_id, lambda: db.run_sync(build_match_suggestions, lc_id, k, export_document_id)
+    )
 
 # Bulk operations
+def _export_response(db: Session, statement, export_format: str, name: str) -> StreamingResponse:
+    """Stream an export query as an NDJSON or CSV attachment"""
+    return StreamingResponse(
+        exports.stream_rows(db.read_bind(), statement, export_format),
+        media_type=exports.EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'}
+    )
+
+@app.get("/export/classifications")
+def export_classifications(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    lc_id: Optional[int] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    db: Session = Depends(get_db)
+):
+    """Stream classification rows for one LC and/or a classification timestamp range [from, to)"""
+    if lc_id is not None and not db.query(LCModel.id).filter(LCModel.id == lc_id).first():
+        raise HTTPException(status_code=404, detail="Letter of Credit not found")
+    
+    statement = exports.classifications_query(lc_id, date_from, date_to)
+    return _export_response(db, statement, export_format, "classifications")
+
+@app.get("/export/export-documents")
+def export_export_documents(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$"),
+    lc_id: Optional[int] = None,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    db: Session = Depends(get_db)
+):
+    """Stream export documents and their extraction results for one LC and/or a creation date range [from, to)"""
+    if lc_id is not None and not db.query(LCModel.id).filter(LCModel.id == lc_id).first():
+        raise HTTPException(status_code=404, detail="Letter of Credit not found")
+    
+    statement = exports.export_documents_query(lc_id, date_from, date_to)
+    return _export_response(db, statement, export_format, "export_documents")
+
 @app.post("/bulk/populate-from-files", response_model=APIResponse)
 async def populate_from_files(db: Session = Depends(get_db)):
-    """Populate database from existing JSON files"""
+    """Populate database from output/LC.json and output/Export_docs.json"""
     try:
-        # This endpoint will be implemented by the population script
-        return APIResponse(
-            success=True,
-            message="Database population endpoint ready. Use the populate_db.py script to load data.",
-            data={"endpoint": "/bulk/populate-from-files"}
+        ingestor = await run_in_threadpool(
+            bulk_ingest.populate_from_output, db, Path(__file__).parent.parent / "output"
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except bulk_ingest.BulkIngestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for lc_id in ingestor.touched_lc_ids:
+        response_cache.invalidate(lc_id)
+    
+    summary = ingestor.summary()
+    return APIResponse(
+        success=True,
+        message=f"Loaded {summary['rows_written']} rows from output files",
+        data=summary
+    )
+
+@app.post("/bulk/ingest", response_model=APIResponse)
+async def bulk_ingest_stream(
+    request: Request,
+    ingest_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|batch)$"),
+    lc_reference: Optional[str] = Query(None, description="LC for export documents that do not name one"),
+    batch_size: int = Query(bulk_ingest.BULK_BATCH_SIZE, ge=1, le=bulk_ingest.MAX_BULK_BATCH_SIZE),
+    db: Session = Depends(get_db)
+):
+    """
+    Stream NDJSON or extract_document.py --batch JSON into the database
+    Records are parsed as they arrive and written in batched transactions; LCs must precede their export documents
+    """
+    ingest_format = ingest_format or bulk_ingest.format_from_content_type(request.headers.get("content-type"))
+    parser = bulk_ingest.make_parser(ingest_format)
+    ingestor = bulk_ingest.BulkIngestor(db, batch_size=batch_size, default_lc_reference=lc_reference)
+    
+    try:
+        await bulk_ingest.ingest_stream(request.stream(), parser, ingestor, run_in_threadpool)
+    except bulk_ingest.BulkIngestError as e:
+        # Batches written before the error stay committed
+        raise HTTPException(status_code=400, detail={"message": str(e), **ingestor.summary()})
+    finally:
+        for lc_id in ingestor.touched_lc_ids:
+            response_cache.invalidate(lc_id)
+    
+    summary = ingestor.summary()
+    print(f"✅ Bulk ingest: {summary['rows_written']} rows in {summary['elapsed_seconds']}s "
+          f"({summary['rows_per_second']} rows/sec)")
+    return APIResponse(
+        success=True,
+        message=f"Ingested {summary['rows_written']} rows at {summary['rows_per_second']} rows/sec",
+        data=summary
+    )
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
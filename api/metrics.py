@@ -0,0 +1,224 @@
+"""
+Prometheus metrics for the API
+Route latency and in-flight requests, document extraction stages, LLM calls and tokens,
+classification throughput and SQLAlchemy pool usage, served from /metrics
+With several worker processes, set PROMETHEUS_MULTIPROC_DIR (serve.py does) so /metrics
+aggregates every worker rather than reporting whichever one answered
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from sqlalchemy import event
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from prometheus_client.core import GaugeMetricFamily, REGISTRY
+from starlette.routing import Match
+
+HTTP_REQUEST_DURATION = Histogram(
+    "lc_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "lc_http_requests_in_progress",
+    "HTTP requests currently being handled",
+    ["method", "route"],
+    multiprocess_mode="livesum"
+)
+EXTRACTION_STAGE_DURATION = Histogram(
+    "lc_extraction_stage_duration_seconds",
+    "Document extraction time per stage (parse, ocr, llm, persist)",
+    ["stage"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+LLM_CALLS = Counter("lc_llm_calls_total", "LLM calls", ["model"])
+LLM_ERRORS = Counter("lc_llm_errors_total", "LLM calls that raised", ["model"])
+LLM_TOKENS = Counter("lc_llm_tokens_total", "LLM tokens used", ["model", "kind"])
+LLM_CALL_DURATION = Histogram(
+    "lc_llm_call_duration_seconds",
+    "LLM call latency",
+    ["model"],
+    buckets=(0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600)
+)
+# Documents per second is rate(lc_classification_documents_total[5m])
+CLASSIFICATION_DOCUMENTS = Counter("lc_classification_documents_total", "Export documents classified")
+CLASSIFICATION_RUNS = Counter("lc_classification_runs_total", "Finished classification runs", ["status"])
+DB_POOL_WAIT = Histogram(
+    "lc_db_pool_wait_seconds",
+    "Time spent waiting for a pooled database connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+# Pool collectors of this process; in multiprocess mode they report the answering worker's pool
+_pool_collectors = []
+
+
+def route_template(scope) -> str:
+    """Path template of the route serving a request, keeping label cardinality bounded"""
+    app = scope.get("app")
+    for route in getattr(app, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """ASGI middleware recording per-route latency and in-flight requests"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            HTTP_REQUEST_DURATION.labels(method, route, str(status["code"])).observe(
+                time.perf_counter() - started
+            )
+
+
+def observe_extraction_stage(stage: str, seconds: float):
+    """Stage callback for DocumentExtractor"""
+    EXTRACTION_STAGE_DURATION.labels(stage).observe(seconds)
+
+
+@contextmanager
+def extraction_stage(stage: str):
+    """Time a block as an extraction stage"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_extraction_stage(stage, time.perf_counter() - started)
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """LangChain callback counting LLM calls, tokens, errors and latency per model"""
+
+    def __init__(self):
+        self._started = {}
+        # Shared by the request threads and the classifier pool
+        self._lock = threading.Lock()
+
+    def _start(self, run_id, serialized: Optional[dict], invocation_params: Optional[dict]):
+        params = invocation_params or {}
+        model = params.get("model") or params.get("model_name") or (serialized or {}).get("kwargs", {}).get("model")
+        with self._lock:
+            self._started[run_id] = (model or "unknown", time.perf_counter())
+
+    def _finish(self, run_id, default: tuple) -> tuple:
+        with self._lock:
+            return self._started.pop(run_id, default)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, invocation_params=None, **kwargs):
+        self._start(run_id, serialized, invocation_params)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, invocation_params=None, **kwargs):
+        self._start(run_id, serialized, invocation_params)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started_model, started = self._finish(run_id, (None, None))
+        llm_output = response.llm_output or {}
+        model = llm_output.get("model_name") or started_model or "unknown"
+
+        LLM_CALLS.labels(model).inc()
+        if started is not None:
+            LLM_CALL_DURATION.labels(model).observe(time.perf_counter() - started)
+        usage = llm_output.get("token_usage") or {}
+        for kind in ("prompt_tokens", "completion_tokens"):
+            if usage.get(kind):
+                LLM_TOKENS.labels(model, kind.removesuffix("_tokens")).inc(usage[kind])
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        model, _ = self._finish(run_id, ("unknown", None))
+        LLM_CALLS.labels(model).inc()
+        LLM_ERRORS.labels(model).inc()
+
+
+class PoolCollector:
+    """Reads SQLAlchemy QueuePool occupancy of every instrumented engine at scrape time"""
+
+    def __init__(self):
+        self.engines = []  # (role, engine), e.g. ("primary", engine) or ("replica0", engine)
+
+    def collect(self):
+        for name, documentation, read in (
+            ("lc_db_pool_size", "Configured pool size", "size"),
+            ("lc_db_pool_checked_out", "Connections currently checked out", "checkedout"),
+            ("lc_db_pool_overflow", "Connections open beyond the pool size", "overflow"),
+            ("lc_db_pool_checked_in", "Idle connections in the pool", "checkedin"),
+        ):
+            family = GaugeMetricFamily(name, documentation, labels=["engine"])
+            for role, engine in self.engines:
+                if hasattr(engine.pool, read):
+                    family.add_metric([role], getattr(engine.pool, read)())
+            yield family
+
+
+def instrument_engine(engine, role: str = "primary"):
+    """Register pool gauges for an engine and time connection checkouts"""
+    if not _pool_collectors:
+        collector = PoolCollector()
+        REGISTRY.register(collector)
+        _pool_collectors.append(collector)
+    _pool_collectors[0].engines.append((role, engine))
+
+    _time_checkouts(engine.pool)
+    # engine.dispose() swaps in a new pool
+    event.listen(engine, "engine_disposed", lambda disposed: _time_checkouts(disposed.pool))
+
+
+def _time_checkouts(pool):
+    # Pool.connect() blocks while the pool is exhausted; time it as the pool wait. SQLAlchemy's pool
+    # events only fire once a connection has been checked out, so they cannot mark the start
+    connect = pool.connect
+
+    def timed_connect():
+        started = time.perf_counter()
+        try:
+            return connect()
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started)
+
+    pool.connect = timed_connect
+
+
+def render():
+    """Body and content type of the /metrics response"""
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return generate_latest(), CONTENT_TYPE_LATEST
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _pool_collectors:
+        registry.register(collector)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+# Shared handler passed to LLM calls made on behalf of the API
+llm_metrics = LLMMetricsHandler()
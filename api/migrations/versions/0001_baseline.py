@@ -0,0 +1,147 @@
+"""
+Baseline schema as created by create_tables() before migrations were introduced
+
+Tables that already exist are left alone, so databases created with create_all can be
+upgraded in place without stamping them first
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _timestamps():
+    return [sa.Column("created_at", sa.DateTime()), sa.Column("updated_at", sa.DateTime())]
+
+
+def upgrade():
+    # Offline (--sql) runs cannot inspect the database and emit the full schema
+    existing = set() if context.is_offline_mode() else set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "letter_of_credits" not in existing:
+        op.create_table(
+            "letter_of_credits",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("lc_reference", sa.String(255), nullable=False),
+            sa.Column("sequence_of_total", sa.String(50)),
+            sa.Column("date_of_issue", sa.String(50)),
+            sa.Column("applicable_rules", sa.String(255)),
+            sa.Column("applicant", sa.Text()),
+            sa.Column("applicant_bank", sa.Text()),
+            sa.Column("beneficiary", sa.Text()),
+            sa.Column("available_with_bank", sa.Text()),
+            sa.Column("reimbursing_bank", sa.Text()),
+            sa.Column("advising_bank", sa.Text()),
+            sa.Column("instructions_to_bank", sa.Text()),
+            sa.Column("credit_amount", sa.String(100)),
+            sa.Column("percent_tolerance", sa.String(50)),
+            sa.Column("max_credit_amount", sa.String(100)),
+            sa.Column("additional_amounts", sa.Text()),
+            sa.Column("form_of_credit", sa.String(100)),
+            sa.Column("availability", sa.String(100)),
+            sa.Column("draft_tenor", sa.String(100)),
+            sa.Column("drawee", sa.Text()),
+            sa.Column("mixed_payment_details", sa.Text()),
+            sa.Column("deferred_payment_details", sa.Text()),
+            sa.Column("confirmation_instructions", sa.String(100)),
+            sa.Column("expiry_date_and_place", sa.String(255)),
+            sa.Column("period_for_presentation", sa.String(255)),
+            sa.Column("partial_shipments", sa.String(50)),
+            sa.Column("transshipment", sa.String(50)),
+            sa.Column("latest_shipment_date", sa.String(50)),
+            sa.Column("shipment_period", sa.String(255)),
+            sa.Column("dispatch_place", sa.String(255)),
+            sa.Column("port_of_loading", sa.String(255)),
+            sa.Column("port_of_discharge", sa.String(255)),
+            sa.Column("final_destination", sa.String(255)),
+            sa.Column("goods_description", sa.Text()),
+            sa.Column("additional_conditions", sa.Text()),
+            sa.Column("charges", sa.Text()),
+            sa.Column("incoterm_rule", sa.String(50)),
+            sa.Column("incoterm_year", sa.String(10)),
+            sa.Column("incoterm_named_place", sa.String(255)),
+            sa.Column("rulebook_versions", sa.JSON()),
+            *_timestamps()
+        )
+        op.create_index("ix_letter_of_credits_lc_reference", "letter_of_credits", ["lc_reference"], unique=True)
+
+    if "lc_document_requirements" not in existing:
+        op.create_table(
+            "lc_document_requirements",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("lc_id", sa.Integer(), sa.ForeignKey("letter_of_credits.id"), nullable=False),
+            sa.Column("document_id", sa.String(50), nullable=False),
+            sa.Column("name", sa.String(500), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("quantity", sa.Integer()),
+            sa.Column("validation_criteria", sa.JSON()),
+            *_timestamps()
+        )
+        op.create_index("ix_lc_document_requirements_document_id", "lc_document_requirements", ["document_id"])
+
+    if "export_documents" not in existing:
+        op.create_table(
+            "export_documents",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("lc_id", sa.Integer(), sa.ForeignKey("letter_of_credits.id"), nullable=False),
+            sa.Column("lc_requirement_id", sa.Integer(), sa.ForeignKey("lc_document_requirements.id")),
+            sa.Column("document_id", sa.String(50), nullable=False),
+            sa.Column("filename", sa.String(500), nullable=False),
+            sa.Column("file_path", sa.String(1000)),
+            sa.Column("file_size_bytes", sa.BigInteger()),
+            sa.Column("document_name", sa.String(500)),
+            sa.Column("summary", sa.Text()),
+            sa.Column("full_description", sa.Text()),
+            sa.Column("extraction_timestamp", sa.DateTime()),
+            sa.Column("extraction_metadata", sa.JSON()),
+            sa.Column("confidence_score", sa.Float()),
+            sa.Column("reasoning", sa.Text()),
+            sa.Column("is_matched", sa.Boolean()),
+            *_timestamps()
+        )
+        op.create_index("ix_export_documents_document_id", "export_documents", ["document_id"], unique=True)
+
+    if "classification_runs" not in existing:
+        op.create_table(
+            "classification_runs",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("lc_id", sa.Integer(), sa.ForeignKey("letter_of_credits.id"), nullable=False),
+            sa.Column("run_timestamp", sa.DateTime()),
+            sa.Column("total_export_docs", sa.Integer(), nullable=False),
+            sa.Column("total_lc_requirements", sa.Integer(), nullable=False),
+            sa.Column("total_matches_found", sa.Integer()),
+            sa.Column("model_used", sa.String(100)),
+            sa.Column("status", sa.String(50)),
+            sa.Column("error_message", sa.Text()),
+            *_timestamps()
+        )
+
+    if "document_classifications" not in existing:
+        op.create_table(
+            "document_classifications",
+            sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column("export_document_id", sa.Integer(), sa.ForeignKey("export_documents.id"), nullable=False),
+            sa.Column("lc_requirement_id", sa.Integer(), sa.ForeignKey("lc_document_requirements.id"), nullable=False),
+            sa.Column("classification_run_id", sa.Integer(), sa.ForeignKey("classification_runs.id"), nullable=False),
+            sa.Column("confidence_score", sa.Float(), nullable=False),
+            sa.Column("reasoning", sa.Text()),
+            sa.Column("is_matched", sa.Boolean()),
+            sa.Column("classification_timestamp", sa.DateTime()),
+            *_timestamps()
+        )
+
+
+def downgrade():
+    op.drop_table("document_classifications")
+    op.drop_table("classification_runs")
+    op.drop_table("export_documents")
+    op.drop_table("lc_document_requirements")
+    op.drop_table("letter_of_credits")
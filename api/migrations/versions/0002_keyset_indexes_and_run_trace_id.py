@@ -0,0 +1,47 @@
+"""
+Keyset pagination indexes and classification_runs.trace_id
+
+Brings databases created before migrations up to the model: the pagination indexes
+added for the list endpoints and the trace id recorded on classification runs
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_letter_of_credits_created_at_id", "letter_of_credits", ["created_at", "id"]),
+    ("ix_export_documents_lc_id_id", "export_documents", ["lc_id", "id"]),
+    ("ix_export_documents_created_at_id", "export_documents", ["created_at", "id"]),
+    ("ix_classification_runs_run_timestamp_id", "classification_runs", ["run_timestamp", "id"]),
+    ("ix_classification_runs_lc_id_run_timestamp_id", "classification_runs", ["lc_id", "run_timestamp", "id"]),
+]
+
+
+def upgrade():
+    if context.is_offline_mode():
+        columns = set()
+    else:
+        columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("classification_runs")}
+    if "trace_id" not in columns:
+        op.add_column("classification_runs", sa.Column("trace_id", sa.String(32)))
+    op.create_index("ix_classification_runs_trace_id", "classification_runs", ["trace_id"], if_not_exists=True)
+
+    for name, table, index_columns in INDEXES:
+        op.create_index(name, table, index_columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    op.drop_index("ix_classification_runs_trace_id", table_name="classification_runs")
+    with op.batch_alter_table("classification_runs") as batch:
+        batch.drop_column("trace_id")
@@ -0,0 +1,47 @@
+"""
+Composite indexes for the classification and requirement hot paths
+
+- document_classifications (classification_run_id, is_matched, lc_requirement_id): the latest-run
+  lookups in the summary, requirements-with-matches and run finalisation filter on run and match flag
+  and read the requirement id straight from the index
+- document_classifications (export_document_id): foreign key used when export documents are reset
+  or deleted
+- document_classifications (classification_timestamp): date-range filter of /export/classifications
+- lc_document_requirements (lc_id, id): every LC detail and classification load reads an LC's
+  requirements in id order
+
+On PostgreSQL the indexes are built CONCURRENTLY so large tables stay writable during the upgrade
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_document_classifications_run_matched_requirement", "document_classifications",
+     ["classification_run_id", "is_matched", "lc_requirement_id"]),
+    ("ix_document_classifications_export_document_id", "document_classifications", ["export_document_id"]),
+    ("ix_document_classifications_classification_timestamp", "document_classifications",
+     ["classification_timestamp"]),
+    ("ix_lc_document_requirements_lc_id_id", "lc_document_requirements", ["lc_id", "id"]),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
@@ -0,0 +1,121 @@
+"""
+Partition document_classifications by month of classification_timestamp
+
+On PostgreSQL the table becomes range-partitioned with one partition per month from the oldest
+existing row to three months ahead, plus a default partition. The primary key becomes
+(id, classification_timestamp) as PostgreSQL requires the partition key in it; ids keep their
+sequence. Old months can then be archived by detaching and dropping a partition (see retention.py)
+instead of deleting rows. Other databases keep a single table
+
+classification_timestamp becomes NOT NULL everywhere, backfilled from created_at
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+from datetime import datetime
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+TABLE = "document_classifications"
+COLUMNS = (
+    "id, export_document_id, lc_requirement_id, classification_run_id, confidence_score, reasoning, "
+    "is_matched, classification_timestamp, created_at, updated_at"
+)
+INDEXES = [
+    ("ix_document_classifications_run_matched_requirement",
+     "classification_run_id, is_matched, lc_requirement_id"),
+    ("ix_document_classifications_export_document_id", "export_document_id"),
+    ("ix_document_classifications_classification_timestamp", "classification_timestamp"),
+]
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _month_partitions(first: datetime, last: datetime):
+    month = datetime(first.year, first.month, 1)
+    while month <= last:
+        following = _add_months(month, 1)
+        yield f"{TABLE}_p{month:%Y%m}", month, following
+        month = following
+
+
+def _create_table_sql(name: str, partitioned: bool) -> str:
+    key = "PRIMARY KEY (id, classification_timestamp)" if partitioned else "PRIMARY KEY (id)"
+    suffix = " PARTITION BY RANGE (classification_timestamp)" if partitioned else ""
+    return f"""
+        CREATE TABLE {name} (
+            id INTEGER NOT NULL DEFAULT nextval('{TABLE}_id_seq'::regclass),
+            export_document_id INTEGER NOT NULL REFERENCES export_documents (id),
+            lc_requirement_id INTEGER NOT NULL REFERENCES lc_document_requirements (id),
+            classification_run_id INTEGER NOT NULL REFERENCES classification_runs (id),
+            confidence_score FLOAT NOT NULL,
+            reasoning TEXT,
+            is_matched BOOLEAN,
+            classification_timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            updated_at TIMESTAMP WITHOUT TIME ZONE,
+            {key}
+        ){suffix}
+    """
+
+
+def _swap_table(partitioned: bool):
+    """Rebuild document_classifications as a (non-)partitioned table and copy the rows across"""
+    old = f"{TABLE}_old"
+    op.execute(f"ALTER TABLE {TABLE} RENAME TO {old}")
+    op.execute(f"ALTER TABLE {old} RENAME CONSTRAINT {TABLE}_pkey TO {old}_pkey")
+    for name, _ in INDEXES:
+        op.execute(f"ALTER INDEX IF EXISTS {name} RENAME TO {name}_old")
+    op.execute(_create_table_sql(TABLE, partitioned))
+
+    if partitioned:
+        bind = op.get_bind()
+        first = bind.execute(sa.text(f"SELECT min(classification_timestamp) FROM {old}")).scalar()
+        now = datetime.utcnow()
+        for name, start, end in _month_partitions(first or now, _add_months(now, MONTHS_AHEAD)):
+            op.execute(
+                f"CREATE TABLE {name} PARTITION OF {TABLE} "
+                f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+            )
+        op.execute(f"CREATE TABLE {TABLE}_default PARTITION OF {TABLE} DEFAULT")
+
+    op.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {old}")
+    op.execute(f"ALTER SEQUENCE {TABLE}_id_seq OWNED BY {TABLE}.id")
+    op.execute(f"DROP TABLE {old}")
+    for name, columns in INDEXES:
+        op.execute(f"CREATE INDEX {name} ON {TABLE} ({columns})")
+
+
+def upgrade():
+    op.execute(
+        f"UPDATE {TABLE} SET classification_timestamp = COALESCE(created_at, CURRENT_TIMESTAMP) "
+        f"WHERE classification_timestamp IS NULL"
+    )
+    if op.get_context().dialect.name != "postgresql":
+        with op.batch_alter_table(TABLE) as batch:
+            batch.alter_column("classification_timestamp", existing_type=sa.DateTime(), nullable=False)
+        return
+    if context.is_offline_mode():
+        raise RuntimeError("Partitioning needs the existing data range; run this revision online")
+    _swap_table(partitioned=True)
+
+
+def downgrade():
+    if op.get_context().dialect.name != "postgresql":
+        with op.batch_alter_table(TABLE) as batch:
+            batch.alter_column("classification_timestamp", existing_type=sa.DateTime(), nullable=True)
+        return
+    _swap_table(partitioned=False)
+    op.execute(f"ALTER TABLE {TABLE} ALTER COLUMN classification_timestamp DROP NOT NULL")
@@ -0,0 +1,58 @@
+"""
+Full-text search vectors for export documents, LC clauses and LC document requirements
+
+On PostgreSQL each table gets a stored generated tsvector column, weighted so title hits rank
+above body hits, and a GIN index built CONCURRENTLY. Adding a stored generated column rewrites the
+table once. Other databases search with LIKE and get nothing here
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# table: (column, weight) pairs, mirrored by search._sources()
+SEARCHED = {
+    "export_documents": [("document_name", "A"), ("summary", "B"), ("full_description", "C")],
+    "letter_of_credits": [("lc_reference", "A"), ("goods_description", "B"), ("additional_conditions", "B")],
+    "lc_document_requirements": [("name", "A"), ("description", "B")],
+}
+
+
+def _vector_sql(columns) -> str:
+    return " || ".join(
+        f"setweight(to_tsvector('english'::regconfig, coalesce({column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def upgrade():
+    if op.get_context().dialect.name != "postgresql":
+        return
+    for table, columns in SEARCHED.items():
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            f"GENERATED ALWAYS AS ({_vector_sql(columns)}) STORED"
+        )
+    with op.get_context().autocommit_block():
+        for table in SEARCHED:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_search_vector "
+                f"ON {table} USING gin (search_vector)"
+            )
+
+
+def downgrade():
+    if op.get_context().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for table in SEARCHED:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS ix_{table}_search_vector")
+    for table in SEARCHED:
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,36 @@
+"""
+Embedding columns for export documents and LC document requirements
+
+float32 hashing-vectorizer vectors (see embeddings.py). Existing rows stay NULL and are
+embedded lazily the first time their LC's match suggestions are requested
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+TABLES = ["export_documents", "lc_document_requirements"]
+
+
+def upgrade():
+    for table in TABLES:
+        if context.is_offline_mode():
+            columns = set()
+        else:
+            columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+        if "embedding" not in columns:
+            op.add_column(table, sa.Column("embedding", sa.LargeBinary()))
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.drop_column("embedding")
@@ -0,0 +1,36 @@
+"""
+Per-LC counters for export document id allocation
+
+Replaces counting an LC's documents on every upload. Counters start at each LC's current
+document count
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not context.is_offline_mode() and "export_document_counters" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table(
+        "export_document_counters",
+        sa.Column("lc_id", sa.Integer(), sa.ForeignKey("letter_of_credits.id"), primary_key=True),
+        sa.Column("last_number", sa.Integer(), nullable=False)
+    )
+    op.execute(
+        "INSERT INTO export_document_counters (lc_id, last_number) "
+        "SELECT lc_id, count(*) FROM export_documents GROUP BY lc_id"
+    )
+
+
+def downgrade():
+    op.drop_table("export_document_counters")
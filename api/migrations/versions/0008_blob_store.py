@@ -0,0 +1,49 @@
+"""
+Content-addressed blob store references for original PDFs
+
+Adds the blobs table (one row per stored file with its reference count) and blob_sha256 on
+letter_of_credits and export_documents. Rows uploaded before this revision have no blob
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+TABLES = ["letter_of_credits", "export_documents"]
+
+
+def upgrade():
+    inspector = None if context.is_offline_mode() else sa.inspect(op.get_bind())
+    if inspector is None or "blobs" not in inspector.get_table_names():
+        op.create_table(
+            "blobs",
+            sa.Column("sha256", sa.String(64), primary_key=True),
+            sa.Column("size_bytes", sa.BigInteger(), nullable=False),
+            sa.Column("ref_count", sa.Integer(), nullable=False),
+            sa.Column("last_released_at", sa.DateTime()),
+            sa.Column("created_at", sa.DateTime())
+        )
+    for table in TABLES:
+        if inspector is not None and "blob_sha256" in {c["name"] for c in inspector.get_columns(table)}:
+            continue
+        with op.batch_alter_table(table) as batch:
+            batch.add_column(sa.Column("blob_sha256", sa.String(64)))
+            batch.create_foreign_key(f"fk_{table}_blob_sha256", "blobs", ["blob_sha256"], ["sha256"])
+            batch.create_index(f"ix_{table}_blob_sha256", ["blob_sha256"])
+
+
+def downgrade():
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch:
+            batch.drop_index(f"ix_{table}_blob_sha256")
+            batch.drop_constraint(f"fk_{table}_blob_sha256", type_="foreignkey")
+            batch.drop_column("blob_sha256")
+    op.drop_table("blobs")
@@ -0,0 +1,71 @@
+"""
+Typed MT700 columns on letter_of_credits
+
+Adds the amount, ISO currency, tolerance, date and expiry place columns mt700.py derives from the
+free-text 32B, 39A, 39B, 31C, 31D and 44C fields, backfills them for existing LCs (online upgrades
+only; run `python mt700.py` after an offline one) and indexes them for the portfolio endpoints.
+On PostgreSQL the indexes are built CONCURRENTLY after the backfill
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+COLUMNS = [
+    ("credit_amount_value", sa.Numeric(18, 2)),
+    ("credit_currency", sa.String(3)),
+    ("max_credit_amount_value", sa.Numeric(18, 2)),
+    ("tolerance_plus_percent", sa.Numeric(5, 2)),
+    ("tolerance_minus_percent", sa.Numeric(5, 2)),
+    ("issued_on", sa.Date()),
+    ("expires_on", sa.Date()),
+    ("expiry_place", sa.String(255)),
+    ("latest_shipment_on", sa.Date()),
+]
+
+INDEXES = [
+    ("ix_letter_of_credits_expires_on", ["expires_on"]),
+    ("ix_letter_of_credits_currency_expires_on", ["credit_currency", "expires_on"]),
+    ("ix_letter_of_credits_issued_on", ["issued_on"]),
+    ("ix_letter_of_credits_latest_shipment_on", ["latest_shipment_on"]),
+]
+
+
+def upgrade():
+    if context.is_offline_mode():
+        existing = set()
+    else:
+        existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("letter_of_credits")}
+    missing = [(name, type_) for name, type_ in COLUMNS if name not in existing]
+    if missing:
+        with op.batch_alter_table("letter_of_credits") as batch:
+            for name, type_ in missing:
+                batch.add_column(sa.Column(name, type_))
+
+    if not context.is_offline_mode():
+        from sqlalchemy.orm import Session
+        import mt700
+
+        mt700.backfill(Session(bind=op.get_bind()))
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(name, "letter_of_credits", columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name="letter_of_credits", postgresql_concurrently=True)
+    with op.batch_alter_table("letter_of_credits") as batch:
+        for name, _ in reversed(COLUMNS):
+            batch.drop_column(name)
@@ -0,0 +1,50 @@
+"""
+Source document ids of bulk-ingested export documents
+
+extract_document.py --batch numbers every batch export_doc_001, export_doc_002, ... so those ids
+repeat across LCs. Bulk ingest now allocates each document a per-LC id like the upload endpoint
+and keeps the batch id in source_document_id, unique per LC. Documents ingested before this
+revision kept the batch id as document_id; it is copied over so re-ingesting them stays a no-op
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+INDEX = "uq_export_documents_lc_id_source_document_id"
+
+
+def upgrade():
+    if context.is_offline_mode() or "source_document_id" not in {
+        column["name"] for column in sa.inspect(op.get_bind()).get_columns("export_documents")
+    }:
+        with op.batch_alter_table("export_documents") as batch:
+            batch.add_column(sa.Column("source_document_id", sa.String(50)))
+
+    # Only bulk ingest records the batch file's metadata under original_metadata
+    op.execute(
+        "UPDATE export_documents SET source_document_id = document_id "
+        "WHERE source_document_id IS NULL AND CAST(extraction_metadata AS TEXT) LIKE '%\"original_metadata\"%'"
+    )
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            INDEX, "export_documents", ["lc_id", "source_document_id"], unique=True,
+            if_not_exists=True, postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(INDEX, table_name="export_documents", postgresql_concurrently=True)
+    with op.batch_alter_table("export_documents") as batch:
+        batch.drop_column("source_document_id")
@@ -1,12 +1,31 @@
-from sqlalchemy import Column, String, Text, Integer, Float, Boolean, DateTime, BigInteger, ForeignKey, JSON
+from sqlalchemy import Column, String, Text, Integer, Float, Boolean, Date, DateTime, BigInteger, ForeignKey, JSON, Index, LargeBinary, Numeric
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from datetime import datetime
 
 Base = declarative_base()
 
+class Blob(Base):
+    # Original file in the content-addressed blob store (blob_store.py)
+    __tablename__ = "blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    size_bytes = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # Export documents and LCs referencing it
+    last_released_at = Column(DateTime)  # When ref_count last went down; garbage collection waits a grace period
+    created_at = Column(DateTime, default=datetime.utcnow)
+
 class LetterOfCredit(Base):
     __tablename__ = "letter_of_credits"
+    __table_args__ = (
+        # Keyset pagination on GET /lcs/
+        Index("ix_letter_of_credits_created_at_id", "created_at", "id"),
+        # Portfolio queries (/portfolio/*) on the typed MT700 columns
+        Index("ix_letter_of_credits_expires_on", "expires_on"),
+        Index("ix_letter_of_credits_currency_expires_on", "credit_currency", "expires_on"),
+        Index("ix_letter_of_credits_issued_on", "issued_on"),
+        Index("ix_letter_of_credits_latest_shipment_on", "latest_shipment_on"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     lc_reference = Column(String(255), unique=True, nullable=False, index=True)
@@ -48,6 +67,17 @@ class LetterOfCredit(Base):
     incoterm_year = Column(String(10))
     incoterm_named_place = Column(String(255))
     rulebook_versions = Column(JSON)
+    # Parsed from the strings above by mt700.py; NULL where the text could not be parsed
+    credit_amount_value = Column(Numeric(18, 2))  # 32B
+    credit_currency = Column(String(3))  # ISO 4217, from 32B (or 39B)
+    max_credit_amount_value = Column(Numeric(18, 2))  # 39B
+    tolerance_plus_percent = Column(Numeric(5, 2))  # 39A
+    tolerance_minus_percent = Column(Numeric(5, 2))
+    issued_on = Column(Date)  # 31C
+    expires_on = Column(Date)  # 31D
+    expiry_place = Column(String(255))
+    latest_shipment_on = Column(Date)  # 44C
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), index=True)  # Original PDF
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -57,6 +87,10 @@ class LetterOfCredit(Base):
 
 class LCDocumentRequirement(Base):
     __tablename__ = "lc_document_requirements"
+    __table_args__ = (
+        # An LC's requirements in id order, read by every detail and classification load
+        Index("ix_lc_document_requirements_lc_id_id", "lc_id", "id"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     lc_id = Column(Integer, ForeignKey("letter_of_credits.id"), nullable=False)
@@ -65,6 +99,7 @@ class LCDocumentRequirement(Base):
     description = Column(Text)
     quantity = Column(Integer, default=1)
     validation_criteria = Column(JSON)  # Array of validation rules
+    embedding = deferred(Column(LargeBinary))  # float32 vector of name + description (embeddings.py)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -73,19 +108,29 @@ class LCDocumentRequirement(Base):
 
 class ExportDocument(Base):
     __tablename__ = "export_documents"
+    __table_args__ = (
+        # Keyset pagination and lc_id filtering on GET /export-documents/
+        Index("ix_export_documents_lc_id_id", "lc_id", "id"),
+        Index("ix_export_documents_created_at_id", "created_at", "id"),
+        # Bulk ingest matches documents on the id they had in the batch file, per LC
+        Index("uq_export_documents_lc_id_source_document_id", "lc_id", "source_document_id", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     lc_id = Column(Integer, ForeignKey("letter_of_credits.id"), nullable=False)
     lc_requirement_id = Column(Integer, ForeignKey("lc_document_requirements.id"), nullable=True)  # Classification target
-    document_id = Column(String(50), unique=True, nullable=False, index=True)  # e.g., "export_doc_001"
+    document_id = Column(String(50), unique=True, nullable=False, index=True)  # e.g., "export_doc_12_001" (LC 12)
+    source_document_id = Column(String(50))  # Id in the ingested batch, e.g. "export_doc_001"; null for uploads
     filename = Column(String(500), nullable=False)
     file_path = Column(String(1000))
     file_size_bytes = Column(BigInteger)
+    blob_sha256 = Column(String(64), ForeignKey("blobs.sha256"), index=True)  # Original PDF
     document_name = Column(String(500))  # AI-extracted name
     summary = Column(Text)  # AI-generated summary
     full_description = Column(Text)  # Complete extracted content
     extraction_timestamp = Column(DateTime)
     extraction_metadata = Column(JSON)  # Model used, schema, etc.
+    embedding = deferred(Column(LargeBinary))  # float32 vector of document_name + summary (embeddings.py)
     # Classification fields
     confidence_score = Column(Float)  # 0.0 to 1.0
     reasoning = Column(Text)  # AI explanation
@@ -97,8 +142,20 @@ class ExportDocument(Base):
     letter_of_credit = relationship("LetterOfCredit", back_populates="export_documents")
     lc_requirement = relationship("LCDocumentRequirement")
 
+class ExportDocumentCounter(Base):
+    # Last export document number allocated per LC (document_ids.py)
+    __tablename__ = "export_document_counters"
+    
+    lc_id = Column(Integer, ForeignKey("letter_of_credits.id"), primary_key=True)
+    last_number = Column(Integer, nullable=False, default=0)
+
 class ClassificationRun(Base):
     __tablename__ = "classification_runs"
+    __table_args__ = (
+        # Keyset pagination and lc_id filtering on GET /classification-runs/
+        Index("ix_classification_runs_run_timestamp_id", "run_timestamp", "id"),
+        Index("ix_classification_runs_lc_id_run_timestamp_id", "lc_id", "run_timestamp", "id"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     lc_id = Column(Integer, ForeignKey("letter_of_credits.id"), nullable=False)
@@ -109,6 +166,7 @@ class ClassificationRun(Base):
     model_used = Column(String(100))
     status = Column(String(50), default="pending")  # pending, running, completed, failed
     error_message = Column(Text)
+    trace_id = Column(String(32), index=True)  # OpenTelemetry trace of the request that started the run
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -117,7 +175,16 @@ class ClassificationRun(Base):
     classifications = relationship("DocumentClassification", back_populates="classification_run")
 
 class DocumentClassification(Base):
+    # On PostgreSQL this table is partitioned by month of classification_timestamp (migration 0004)
     __tablename__ = "document_classifications"
+    __table_args__ = (
+        # Matched classifications of a run, with the requirement id read from the index
+        Index("ix_document_classifications_run_matched_requirement",
+              "classification_run_id", "is_matched", "lc_requirement_id"),
+        Index("ix_document_classifications_export_document_id", "export_document_id"),
+        # Date-range filter of /export/classifications
+        Index("ix_document_classifications_classification_timestamp", "classification_timestamp"),
+    )
     
     id = Column(Integer, primary_key=True, autoincrement=True)
     export_document_id = Column(Integer, ForeignKey("export_documents.id"), nullable=False)
@@ -126,7 +193,7 @@ class DocumentClassification(Base):
     confidence_score = Column(Float, nullable=False)  # 0.0 to 1.0
     reasoning = Column(Text)  # AI explanation for the classification
     is_matched = Column(Boolean, default=False)
-    classification_timestamp = Column(DateTime, default=datetime.utcnow)
+    classification_timestamp = Column(DateTime, nullable=False, default=datetime.utcnow)  # Partition key
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -135,3 +202,16 @@ class DocumentClassification(Base):
     lc_requirement = relationship("LCDocumentRequirement")
     classification_run = relationship("ClassificationRun", back_populates="classifications")
 
+
+class IdempotencyKey(Base):
+    # Idempotency-Key sent with an LLM-heavy request and the resource it produced (idempotency.py)
+    __tablename__ = "idempotency_keys"
+    
+    key = Column(String(255), primary_key=True)
+    scope = Column(String(50), nullable=False)  # Endpoint the key was first used with, e.g. "lc_upload"
+    request_hash = Column(String(64), nullable=False)  # SHA-256 of what the request asked for
+    status = Column(String(20), nullable=False)  # in_progress, completed
+    resource_id = Column(Integer)  # LC or classification run returned on replay
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    completed_at = Column(DateTime)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,239 @@
+"""
+Typed values of the free-text MT700 fields of an LC
+The extractor stores tags 31C, 32B, 39A, 39B, 31D and 44C as the strings it read. normalize() and
+typed_columns() parse them into an amount and ISO currency, tolerance percentages and dates (plus the
+place of expiry) kept in indexed columns, so portfolio questions such as exposure by currency or LCs
+expiring this week are answered by the database. Strings that cannot be parsed leave the typed
+columns NULL; the original text is never changed
+"""
+
+import re
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Mapping, Optional, Tuple
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from models import LetterOfCredit as LCModel
+
+# Active ISO 4217 codes
+CURRENCIES = frozenset("""
+AED AFN ALL AMD ANG AOA ARS AUD AWG AZN BAM BBD BDT BGN BHD BIF BMD BND BOB BRL BSD BTN BWP BYN BZD
+CAD CDF CHF CLP CNY COP CRC CUP CVE CZK DJF DKK DOP DZD EGP ERN ETB EUR FJD FKP GBP GEL GHS GIP GMD
+GNF GTQ GYD HKD HNL HTG HUF IDR ILS INR IQD IRR ISK JMD JOD JPY KES KGS KHR KMF KPW KRW KWD KYD KZT
+LAK LBP LKR LRD LSL LYD MAD MDL MGA MKD MMK MNT MOP MRU MUR MVR MWK MXN MYR MZN NAD NGN NIO NOK NPR
+NZD OMR PAB PEN PGK PHP PKR PLN PYG QAR RON RSD RUB RWF SAR SBD SCR SDG SEK SGD SHP SLE SOS SRD SSP
+STN SVC SYP SZL THB TJS TMT TND TOP TRY TTD TWD TZS UAH UGX USD UYU UZS VES VND VUV WST XAF XCD XOF
+XPF YER ZAR ZMW ZWL
+""".split())
+CURRENCY_SYMBOLS = {"US$": "USD", "€": "EUR", "£": "GBP"}
+
+MONTHS = {
+    name: number
+    for number, names in enumerate([
+        ("JAN", "JANUARY"), ("FEB", "FEBRUARY"), ("MAR", "MARCH"), ("APR", "APRIL"), ("MAY",),
+        ("JUN", "JUNE"), ("JUL", "JULY"), ("AUG", "AUGUST"), ("SEP", "SEPT", "SEPTEMBER"),
+        ("OCT", "OCTOBER"), ("NOV", "NOVEMBER"), ("DEC", "DECEMBER")
+    ], start=1)
+    for name in names
+}
+
+# Columns derived from the source strings below
+TYPED_COLUMNS = (
+    "credit_amount_value", "credit_currency", "max_credit_amount_value",
+    "tolerance_plus_percent", "tolerance_minus_percent",
+    "issued_on", "expires_on", "expiry_place", "latest_shipment_on"
+)
+SOURCE_FIELDS = (
+    "credit_amount", "max_credit_amount", "percent_tolerance",
+    "date_of_issue", "expiry_date_and_place", "latest_shipment_date"
+)
+
+# Digit groups split by separators; a space only before a group of three (50 000,00)
+_NUMBER = r"\d+(?:(?:[.,']|\s(?=\d{3}\b))\d+)*"
+_AMOUNT_AFTER_CURRENCY = re.compile(rf"(?P<currency>US\$|€|£|\b[A-Z]{{3}})\s*(?P<number>{_NUMBER})")
+_AMOUNT_BEFORE_CURRENCY = re.compile(rf"(?P<number>{_NUMBER})\s*(?P<currency>[A-Z]{{3}}\b|€|£)")
+_MONTH_NAME = r"[A-Z]{3,9}\.?"
+_DATE_PATTERNS = [
+    # 2025-03-15
+    re.compile(r"\b(?P<y>\d{4})-(?P<m>\d{1,2})-(?P<d>\d{1,2})\b"),
+    # 15/03/2025, 15.03.2025, 15-03-2025 (day first, as in trade documents)
+    re.compile(r"\b(?P<d>\d{1,2})[/.-](?P<m>\d{1,2})[/.-](?P<y>\d{4}|\d{2})\b"),
+    # 15 March 2025, 15-MAR-25, 15TH MARCH, 2025
+    re.compile(
+        rf"\b(?P<d>\d{{1,2}})(?:ST|ND|RD|TH)?[\s-]+(?P<month>{_MONTH_NAME})[\s,-]+(?P<y>\d{{4}}|\d{{2}})\b"
+    ),
+    # March 15, 2025
+    re.compile(
+        rf"\b(?P<month>{_MONTH_NAME})\s+(?P<d>\d{{1,2}})(?:ST|ND|RD|TH)?,?\s+(?P<y>\d{{4}})\b"
+    ),
+    # SWIFT YYMMDD or YYYYMMDD, optionally followed directly by the place: 251231LONDON
+    re.compile(r"(?<!\d)(?P<y>\d{2}|\d{4})(?P<m>\d{2})(?P<d>\d{2})(?!\d)"),
+]
+_PLACE_LABELS = re.compile(r"^(?:(?:EXPIRY|DATE|PLACE|AND|IN|AT|OF)\b[\s:,-]*)+", re.IGNORECASE)
+
+
+def parse_number(text: str) -> Optional[Decimal]:
+    """
+    Amount in any of the usual notations: 125000,00 (SWIFT), 125,000.00, 1.250.000,00, 50 000
+    A single separator followed by exactly three digits is read as a thousands separator
+    """
+    digits = re.sub(r"[\s']", "", text)
+    separators = [char for char in digits if char in ".,"]
+    if separators:
+        last = separators[-1]
+        integer, _, fraction = digits.rpartition(last)
+        if separators.count(last) > 1 or (len(separators) == 1 and len(fraction) == 3):
+            # Every separator groups thousands
+            integer, fraction = digits, ""
+        digits = re.sub(r"[.,]", "", integer) + ("." + fraction if fraction else "")
+    try:
+        return Decimal(digits)
+    except InvalidOperation:
+        return None
+
+
+def parse_amount(text: Optional[str]) -> Tuple[Optional[Decimal], Optional[str]]:
+    """(amount, ISO currency) of a 32B/39B value such as USD125000,00 or 125,000.00 EUR"""
+    if not text:
+        return None, None
+    upper = text.upper()
+    for pattern in (_AMOUNT_AFTER_CURRENCY, _AMOUNT_BEFORE_CURRENCY):
+        for match in pattern.finditer(upper):
+            currency = CURRENCY_SYMBOLS.get(match.group("currency"), match.group("currency"))
+            if currency not in CURRENCIES:
+                continue
+            amount = parse_number(match.group("number"))
+            if amount is not None:
+                return amount, currency
+    # Labelled values: CURRENCY: JPY AMOUNT: 3000000
+    currency = next((code for code in re.findall(r"\b[A-Z]{3}\b", upper) if code in CURRENCIES), None)
+    number = re.search(_NUMBER, upper)
+    if currency and number:
+        return parse_number(number.group()), currency
+    return None, None
+
+
+def parse_tolerance(text: Optional[str]) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+    """(plus, minus) percentages of a 39A value: 10/05, +/- 5 PCT, 5% MORE OR LESS, PLUS 10 MINUS 0"""
+    if not text:
+        return None, None
+    upper = text.upper()
+    numbers = [Decimal(number.replace(",", ".")) for number in re.findall(r"\d+(?:[.,]\d+)?", upper)]
+    if not numbers:
+        return None, None
+    split = re.search(r"(\d+(?:[.,]\d+)?)\s*/\s*(\d+(?:[.,]\d+)?)", upper)
+    if split and "+/" not in upper:
+        return Decimal(split.group(1).replace(",", ".")), Decimal(split.group(2).replace(",", "."))
+    plus = re.search(r"(?:PLUS|\+|MORE)\s*(\d+(?:[.,]\d+)?)", upper)
+    minus = re.search(r"(?:MINUS|LESS)\s*(\d+(?:[.,]\d+)?)", upper)
+    if plus and minus and "+/" not in upper and "MORE OR LESS" not in upper:
+        return Decimal(plus.group(1).replace(",", ".")), Decimal(minus.group(1).replace(",", "."))
+    return numbers[0], numbers[0]
+
+
+def _build_date(match) -> Optional[date]:
+    parts = match.groupdict()
+    if "month" in parts:
+        month = MONTHS.get(parts["month"].rstrip(".").upper())
+    else:
+        month = int(parts["m"])
+    year = int(parts["y"])
+    if year < 100:
+        year += 2000
+    if not month:
+        return None
+    try:
+        return date(year, month, int(parts["d"]))
+    except ValueError:
+        return None
+
+
+def find_date(text: Optional[str]) -> Tuple[Optional[date], Optional[Tuple[int, int]]]:
+    """First date in a 31C/31D/44C value and its (start, end) span in the text"""
+    if not text:
+        return None, None
+    upper = text.upper()
+    for pattern in _DATE_PATTERNS:
+        for match in pattern.finditer(upper):
+            parsed = _build_date(match)
+            if parsed:
+                return parsed, match.span()
+    return None, None
+
+
+def parse_date(text: Optional[str]) -> Optional[date]:
+    return find_date(text)[0]
+
+
+def parse_expiry(text: Optional[str]) -> Tuple[Optional[date], Optional[str]]:
+    """(date, place) of a 31D value such as 251231LONDON or 31 December 2025 in London"""
+    expires_on, span = find_date(text)
+    if expires_on is None:
+        return None, None
+    remainder = f"{text[:span[0]]} {text[span[1]:]}".strip(" \t\r\n,;:-/")
+    place = _PLACE_LABELS.sub("", remainder).strip(" \t\r\n,;:-/")
+    return expires_on, place[:255] or None
+
+
+def typed_columns(fields: Mapping[str, Optional[str]]) -> dict:
+    """Typed column values from an LC's source strings (keyed by column name); every key is present"""
+    credit_amount, currency = parse_amount(fields.get("credit_amount"))
+    max_amount, max_currency = parse_amount(fields.get("max_credit_amount"))
+    plus, minus = parse_tolerance(fields.get("percent_tolerance"))
+    expires_on, expiry_place = parse_expiry(fields.get("expiry_date_and_place"))
+    return {
+        "credit_amount_value": credit_amount,
+        "credit_currency": currency or max_currency,
+        "max_credit_amount_value": max_amount,
+        "tolerance_plus_percent": plus,
+        "tolerance_minus_percent": minus,
+        "issued_on": parse_date(fields.get("date_of_issue")),
+        "expires_on": expires_on,
+        "expiry_place": expiry_place,
+        "latest_shipment_on": parse_date(fields.get("latest_shipment_date"))
+    }
+
+
+def normalize(lc: LCModel):
+    """Set an LC's typed columns from its current source strings"""
+    for column, value in typed_columns({field: getattr(lc, field) for field in SOURCE_FIELDS}).items():
+        setattr(lc, column, value)
+
+
+def backfill(db: Session, batch_size: int = 500) -> int:
+    """Recompute the typed columns of every LC in id order, committing per batch; returns the LCs updated"""
+    table = LCModel.__table__
+    source = [table.c.id] + [table.c[field] for field in SOURCE_FIELDS]
+    # Bind names must differ from the column names in an executemany UPDATE
+    statement = update(table).where(table.c.id == bindparam("lc_id")).values(
+        {column: bindparam(f"new_{column}") for column in TYPED_COLUMNS}
+    )
+    updated, last_id = 0, 0
+    while True:
+        rows = db.execute(
+            select(*source).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        ).mappings().all()
+        if not rows:
+            return updated
+        db.execute(statement, [
+            {"lc_id": row["id"], **{f"new_{column}": value for column, value in typed_columns(row).items()}}
+            for row in rows
+        ])
+        db.commit()
+        updated += len(rows)
+        last_id = rows[-1]["id"]
+
+
+def main():
+    """Re-derive the typed MT700 columns of all LCs: python mt700.py"""
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        updated = backfill(db)
+    print(f"✅ Normalized MT700 fields of {updated} LCs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Keyset (cursor) pagination helpers for list endpoints
+Cursors are opaque base64 tokens holding the sort value and id of the last row returned
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_key: str, value: Any, row_id: int) -> str:
+    """Encode the position of the last row of a page into an opaque cursor"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"k": sort_key, "v": value, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, sort_key: str, sort_column) -> Tuple[Any, int]:
+    """Decode a cursor produced by encode_cursor for the given sort key"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if payload["k"] != sort_key:
+            raise ValueError("cursor was issued for a different sort order")
+        value = payload["v"]
+        if value is not None and sort_column.type.python_type is datetime:
+            value = datetime.fromisoformat(value)
+        return value, int(payload["id"])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def _keyset(query, sort_key: str, sort_column, id_column, limit: int,
+            cursor: Optional[str], descending: bool):
+    """Keyset filter, stable (sort_column, id) ordering and limit of a Query or select()"""
+    same_column = sort_column is id_column
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort_key, sort_column)
+        if same_column:
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        else:
+            position = tuple_(sort_column, id_column)
+            query = query.filter(
+                position < (last_value, last_id) if descending else position > (last_value, last_id)
+            )
+
+    if same_column:
+        ordering = [id_column.desc() if descending else id_column.asc()]
+    elif descending:
+        ordering = [sort_column.desc(), id_column.desc()]
+    else:
+        ordering = [sort_column.asc(), id_column.asc()]
+
+    # Fetch one extra row to find out whether another page exists
+    return query.order_by(*ordering).limit(limit + 1)
+
+
+def _page(rows: List, sort_key: str, sort_column, id_column, limit: int) -> Tuple[List, Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    next_cursor = encode_cursor(sort_key, getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+
+def paginate(query, sort_key: str, sort_column, id_column, limit: int,
+             cursor: Optional[str] = None, descending: bool = False) -> Tuple[List, Optional[str]]:
+    """
+    Apply a stable (sort_column, id) ordering and keyset filter to a query
+    Returns: (rows, next_cursor) where next_cursor is None on the last page
+    """
+    rows = _keyset(query, sort_key, sort_column, id_column, limit, cursor, descending).all()
+    return _page(rows, sort_key, sort_column, id_column, limit)
+
+
+async def paginate_async(db: AsyncSession, statement, sort_key: str, sort_column, id_column, limit: int,
+                         cursor: Optional[str] = None, descending: bool = False) -> Tuple[List, Optional[str]]:
+    """paginate() for a select() of one entity run on an AsyncSession"""
+    statement = _keyset(statement, sort_key, sort_column, id_column, limit, cursor, descending)
+    rows = (await db.execute(statement)).scalars().all()
+    return _page(list(rows), sort_key, sort_column, id_column, limit)
+
+
+def set_next_cursor(request: Request, response: Response, next_cursor: Optional[str]):
+    """Expose the next page cursor through the X-Next-Cursor and Link headers"""
+    if not next_cursor:
+        return
+    response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    next_url = request.url.include_query_params(cursor=next_cursor)
+    response.headers["Link"] = f'<{next_url}>; rel="next"'
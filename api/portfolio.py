@@ -0,0 +1,80 @@
+"""
+Portfolio aggregates over the typed MT700 columns (see mt700.py)
+Exposure by currency and the LCs expiring in a date window are computed by the database as range
+scans of the expires_on and (credit_currency, expires_on) indexes instead of loading every LC
+"""
+
+import os
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import LetterOfCredit as LCModel
+from schemas import CurrencyExposure, ExpiringLC, ExpiringLCs, PortfolioExposure
+
+DEFAULT_EXPIRING_DAYS = int(os.getenv("PORTFOLIO_EXPIRING_DAYS", "7"))
+DEFAULT_EXPIRING_LIMIT = 100
+MAX_EXPIRING_LIMIT = 1000
+
+# 39B where given, otherwise 32B plus the 39A plus tolerance
+max_exposure = func.coalesce(
+    LCModel.max_credit_amount_value,
+    LCModel.credit_amount_value * (100 + func.coalesce(LCModel.tolerance_plus_percent, 0)) / 100
+)
+
+
+def exposure_query(expiring_from: Optional[date], expiring_to: Optional[date] = None, currency: Optional[str] = None):
+    """LC count, credit amount and maximum exposure per currency of the LCs expiring in [from, to]"""
+    statement = select(
+        LCModel.credit_currency,
+        func.count(LCModel.id),
+        func.sum(LCModel.credit_amount_value),
+        func.sum(max_exposure)
+    ).where(LCModel.credit_currency.is_not(None), LCModel.credit_amount_value.is_not(None))
+    if expiring_from is not None:
+        statement = statement.where(LCModel.expires_on >= expiring_from)
+    if expiring_to is not None:
+        statement = statement.where(LCModel.expires_on <= expiring_to)
+    if currency:
+        statement = statement.where(LCModel.credit_currency == currency)
+    return statement.group_by(LCModel.credit_currency).order_by(LCModel.credit_currency)
+
+
+def _currencies(rows) -> list:
+    return [
+        CurrencyExposure(
+            currency=currency, lc_count=lc_count,
+            credit_amount=float(credit_amount or 0), max_exposure=float(exposure or 0)
+        )
+        for currency, lc_count, credit_amount, exposure in rows
+    ]
+
+
+async def exposure(db: AsyncSession, as_of: date, include_expired: bool = False) -> PortfolioExposure:
+    """Exposure per currency of the LCs not expired on as_of (or of all LCs)"""
+    rows = (await db.execute(exposure_query(None if include_expired else as_of))).all()
+    unparsed = select(func.count(LCModel.id)).where(or_(
+        LCModel.credit_currency.is_(None), LCModel.credit_amount_value.is_(None), LCModel.expires_on.is_(None)
+    ))
+    return PortfolioExposure(as_of=as_of, currencies=_currencies(rows), unparsed_lcs=await db.scalar(unparsed))
+
+
+async def expiring(
+    db: AsyncSession, date_from: date, date_to: date, currency: Optional[str] = None,
+    limit: int = DEFAULT_EXPIRING_LIMIT
+) -> ExpiringLCs:
+    """LCs expiring between date_from and date_to inclusive, soonest first, with totals per currency"""
+    statement = select(
+        LCModel.id, LCModel.lc_reference, LCModel.applicant, LCModel.beneficiary,
+        LCModel.credit_currency, LCModel.credit_amount_value, LCModel.expires_on, LCModel.expiry_place
+    ).where(LCModel.expires_on >= date_from, LCModel.expires_on <= date_to)
+    if currency:
+        statement = statement.where(LCModel.credit_currency == currency)
+    rows = (await db.execute(statement.order_by(LCModel.expires_on, LCModel.id).limit(limit))).mappings().all()
+    totals = (await db.execute(exposure_query(date_from, date_to, currency))).all()
+    return ExpiringLCs(
+        date_from=date_from, date_to=date_to,
+        lcs=[ExpiringLC(**row) for row in rows], totals=_currencies(totals)
+    )
@@ -0,0 +1,105 @@
+"""
+Deep readiness checks for the load balancer
+A node is ready once its worker has warmed up and until it starts draining for shutdown, while its
+database answers, its connection pools (sync and async engines) are not exhausted and its classifier pool is not backed up. An open LLM breaker is reported but only fails readiness when
+READY_REQUIRES_LLM is set, since every node shares the same provider and draining them all would
+turn a degraded service into an outage
+"""
+
+import os
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+import admission
+import circuit_breaker
+import classifier_runner
+
+STARTING = "starting"
+SERVING = "serving"
+DRAINING = "draining"
+
+# Lifecycle of this worker process, advanced by the app lifespan
+phase = STARTING
+
+READY_REQUIRES_LLM = os.getenv("READY_REQUIRES_LLM", "false").lower() in ("1", "true", "yes")
+# Classification runs waiting for a worker before the node reports itself saturated
+READY_MAX_CLASSIFIER_QUEUE = int(os.getenv("READY_MAX_CLASSIFIER_QUEUE", str(classifier_runner.CLASSIFIER_MAX_WORKERS)))
+
+
+def mark_serving():
+    global phase
+    phase = SERVING
+
+
+def mark_draining():
+    global phase
+    phase = DRAINING
+
+
+def database_check(db: Session) -> dict:
+    started = time.perf_counter()
+    try:
+        db.execute(text("SELECT 1"))
+    except Exception as e:
+        return {"ok": False, "error": str(e)}
+    return {"ok": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+
+def pool_check(engine) -> dict:
+    pool = engine.pool
+    if not hasattr(pool, "checkedout") or not hasattr(pool, "size"):
+        return {"ok": True, "pool": type(pool).__name__}
+    capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+    checked_out = pool.checkedout()
+    return {
+        "ok": checked_out < capacity,
+        "checked_out": checked_out,
+        "capacity": capacity,
+        "overflow": pool.overflow()
+    }
+
+
+def async_pools_check(async_engines) -> dict:
+    """Pools of the AsyncEngines serving the async endpoints, primary first"""
+    pools = [pool_check(async_engine) for async_engine in async_engines]
+    return {"ok": all(pool["ok"] for pool in pools), "pools": pools}
+
+
+def classifier_check() -> dict:
+    stats = classifier_runner.executor_stats()
+    return {"ok": stats["queued"] < READY_MAX_CLASSIFIER_QUEUE, **stats}
+
+
+def admission_check() -> dict:
+    """Controllers whose wait queue is full; informational, as they already shed load with 429"""
+    full = [
+        name for name, stats in admission.stats().items()
+        if stats["max_queue"] and stats["queued"] >= stats["max_queue"]
+    ]
+    return {"ok": True, "full_queues": full}
+
+
+def llm_check() -> dict:
+    stats = circuit_breaker.llm_breaker.stats()
+    return {"ok": stats["state"] != circuit_breaker.OPEN or not READY_REQUIRES_LLM, **stats}
+
+
+def readiness(db: Session, engine, async_engines=()) -> dict:
+    pool = pool_check(engine)
+    # Checking out a connection from an exhausted pool would block until its timeout
+    database = database_check(db) if pool["ok"] else {"ok": False, "error": "Connection pool exhausted"}
+    checks = {
+        "lifecycle": {"ok": phase == SERVING, "phase": phase},
+        "database": database,
+        "db_pool": pool,
+        "async_db_pools": async_pools_check(async_engines),
+        "classifier": classifier_check(),
+        "admission": admission_check(),
+        "llm": llm_check()
+    }
+    ready = all(check["ok"] for check in checks.values())
+    degraded = checks["llm"]["state"] != circuit_breaker.CLOSED
+    status = "not_ready" if not ready else "degraded" if degraded else "ready"
+    return {"status": status, "ready": ready, "checks": checks}
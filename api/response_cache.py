@@ -0,0 +1,123 @@
+"""
+In-process LRU cache for read endpoint responses
+Entries are keyed by route, query parameters and a per-LC version counter;
+write paths bump the counter so stale entries are never served again and age out of the LRU
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from fastapi import Request, Response
+
+import serialization
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+
+
+class ResponseCache:
+    """LRU of serialized JSON bodies and their strong ETags"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def version(self, lc_id: int) -> int:
+        """Current version of everything cached for an LC"""
+        with self._lock:
+            return self._versions.get(lc_id, 0)
+
+    def invalidate(self, lc_id: Optional[int]):
+        """Bump the LC version so its cached responses stop being served"""
+        if lc_id is None:
+            return
+        with self._lock:
+            self._versions[lc_id] = self._versions.get(lc_id, 0) + 1
+
+    def clear(self):
+        """Drop all entries and version counters"""
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _get(self, key) -> Optional[Tuple[str, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _put(self, key, entry: Tuple[str, bytes]):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _key(self, request: Request, lc_id: int):
+        # Read the version before building so a concurrent write makes this entry unreachable
+        version = self.version(lc_id)
+        return (request.url.path, tuple(sorted(request.query_params.multi_items())), lc_id, version)
+
+    def _store(self, key, content: Any) -> Tuple[str, bytes]:
+        body = serialization.dumps(content)
+        entry = (f'"{hashlib.sha256(body).hexdigest()[:32]}"', body)
+        self._put(key, entry)
+        return entry
+
+    def respond(self, request: Request, lc_id: int, build: Callable[[], Any]) -> Response:
+        """
+        Serve a read endpoint from the cache, computing it with build() on a miss
+        Answers 304 Not Modified when If-None-Match carries the current ETag
+        """
+        key = self._key(request, lc_id)
+        entry = self._get(key) or self._store(key, build())
+        return _response(request, entry)
+
+    async def respond_async(self, request: Request, lc_id: int, build: Callable[[], Awaitable[Any]]) -> Response:
+        """respond() for a build() coroutine function, e.g. one querying an AsyncSession"""
+        key = self._key(request, lc_id)
+        entry = self._get(key) or self._store(key, await build())
+        return _response(request, entry)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+def _response(request: Request, entry: Tuple[str, bytes]) -> Response:
+    etag, body = entry
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
+
+# Shared cache instance for the API process
+response_cache = ResponseCache()
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Retention and archival for classification history
+Months of document_classifications older than the retention period are written to gzipped NDJSON
+archives and removed from the database. On PostgreSQL the month's partition is detached and dropped
+(or rebuilt with only the rows that stay); elsewhere rows are deleted in batches. Classification runs
+of that month are archived with them, except the latest run of each LC and runs still in progress,
+whose rows are kept so summaries stay intact. Archives can be loaded back with `restore`
+
+Monthly partitions must exist before rows for that month arrive, or they land in the default
+partition. serve.py runs ensure_partitions at startup and every PARTITION_CHECK_HOURS; deployments
+that start the API another way should schedule `ensure-partitions`, e.g. a daily cron entry:
+    0 3 * * * cd /app && python retention.py ensure-partitions
+Rows already in the default partition are moved into their month's partition when it is created
+
+Usage:
+    python retention.py archive --older-than-days 180 [--dir archive]
+    python retention.py restore archive/document_classifications_2026_01.ndjson.gz
+    python retention.py ensure-partitions [--months-ahead 3]
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import MetaData, delete, func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from models import (
+    ClassificationRun as ClassificationRunModel,
+    DocumentClassification as ClassificationModel
+)
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+RETENTION_DAYS = int(os.getenv("CLASSIFICATION_RETENTION_DAYS", "365"))
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+# Rows per INSERT when restoring, and per DELETE on databases without partitions
+BATCH_SIZE = 1000
+
+CLASSIFICATIONS = ClassificationModel.__table__
+RUNS = ClassificationRunModel.__table__
+PARTITION_PREFIX = f"{CLASSIFICATIONS.name}_p"
+DEFAULT_PARTITION = f"{CLASSIFICATIONS.name}_default"
+# Serializes partition maintenance between workers and cron jobs
+PARTITION_LOCK_ID = 704001
+
+
+def month_start(moment: datetime) -> datetime:
+    return datetime(moment.year, moment.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y%m}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    return bool(connection.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = CAST(:table AS regclass)"),
+        {"table": CLASSIFICATIONS.name}
+    ).scalar())
+
+
+def monthly_partitions(connection: Connection) -> List[Tuple[str, datetime]]:
+    """Attached monthly partitions of document_classifications, oldest first"""
+    names = connection.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+    ), {"table": CLASSIFICATIONS.name}).scalars()
+    partitions = []
+    for name in names:
+        if name.startswith(PARTITION_PREFIX):
+            try:
+                partitions.append((name, datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m")))
+            except ValueError:
+                continue
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def _bounds(month: datetime) -> str:
+    return f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+
+
+def _in_month(month: datetime) -> str:
+    return (f"classification_timestamp >= '{month:%Y-%m-%d}' "
+            f"AND classification_timestamp < '{add_months(month, 1):%Y-%m-%d}'")
+
+
+def _has_default_partition(connection: Connection) -> bool:
+    return connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": DEFAULT_PARTITION}).scalar()
+
+
+def _default_partition_months(connection: Connection) -> List[datetime]:
+    """Months that have rows in the default partition"""
+    months = connection.execute(text(
+        f"SELECT DISTINCT date_trunc('month', classification_timestamp) FROM {DEFAULT_PARTITION}"
+    )).scalars()
+    return [month_start(month) for month in months]
+
+
+def _create_standalone(connection: Connection, name: str) -> None:
+    """Table shaped like document_classifications, to fill before attaching it as a partition"""
+    connection.execute(text(
+        f"CREATE TABLE {name} (LIKE {CLASSIFICATIONS.name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+
+
+def _attach(connection: Connection, name: str, month: datetime) -> None:
+    # Creates the partition's copies of the parent's indexes and foreign keys
+    connection.execute(text(f"ALTER TABLE {CLASSIFICATIONS.name} ATTACH PARTITION {name} {_bounds(month)}"))
+
+
+def ensure_partitions(engine: Engine, months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Create the partitions for this month, the next months_ahead months and every month with rows in the
+    default partition; returns the new ones
+    A partition cannot be created over rows the default partition holds for its range, so those rows are
+    moved into a standalone table that is then attached as the month's partition
+    """
+    created = []
+    with engine.begin() as connection:
+        if not is_partitioned(connection):
+            return created
+        connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID})
+        existing = {name for name, _ in monthly_partitions(connection)}
+        has_default = _has_default_partition(connection)
+        current = month_start(datetime.utcnow())
+        months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+        if has_default:
+            months.update(_default_partition_months(connection))
+
+        for month in sorted(months):
+            name = partition_name(month)
+            if name in existing:
+                continue
+            in_default = has_default and connection.execute(
+                text(f"SELECT 1 FROM {DEFAULT_PARTITION} WHERE {_in_month(month)} LIMIT 1")
+            ).scalar()
+            if in_default:
+                _create_standalone(connection, name)
+                connection.execute(text(
+                    f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {_in_month(month)} RETURNING *) "
+                    f"INSERT INTO {name} SELECT * FROM moved"
+                ))
+                _attach(connection, name, month)
+            else:
+                connection.execute(text(f"CREATE TABLE {name} PARTITION OF {CLASSIFICATIONS.name} {_bounds(month)}"))
+            created.append(name)
+    return created
+
+
+def protected_run_ids():
+    """Latest run of every LC and runs still in progress; their classifications are never archived"""
+    ranked = select(
+        RUNS.c.id,
+        func.row_number().over(
+            partition_by=RUNS.c.lc_id,
+            order_by=(RUNS.c.run_timestamp.desc(), RUNS.c.id.desc())
+        ).label("position")
+    ).subquery()
+    latest = select(ranked.c.id).where(ranked.c.position == 1)
+    running = select(RUNS.c.id).where(RUNS.c.status.in_(("pending", "running")))
+    return latest.union(running)
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot archive {type(value).__name__}")
+
+
+def _write_line(archive, table: str, row) -> None:
+    archive.write(json.dumps({"table": table, "row": dict(row._mapping)}, default=_json_default))
+    archive.write("\n")
+
+
+class MonthArchive:
+    """Gzipped NDJSON archive of one month, written to a temporary file until commit()"""
+
+    def __init__(self, archive_dir: str, month: datetime):
+        Path(archive_dir).mkdir(parents=True, exist_ok=True)
+        self.path = Path(archive_dir) / f"{CLASSIFICATIONS.name}_{month:%Y_%m}.ndjson.gz"
+        # A month archived again (rows kept last time are no longer protected) gets a new file
+        copy = 1
+        while self.path.exists():
+            copy += 1
+            self.path = Path(archive_dir) / f"{CLASSIFICATIONS.name}_{month:%Y_%m}_{copy}.ndjson.gz"
+        self._temp_path = self.path.with_suffix(".gz.partial")
+        self._file = gzip.open(self._temp_path, "wt", encoding="utf-8")
+        self.rows = {"classification_runs": 0, "document_classifications": 0}
+
+    def write(self, table: str, rows) -> None:
+        for row in rows:
+            _write_line(self._file, table, row)
+            self.rows[table] += 1
+
+    def commit(self) -> Path:
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+        return self.path
+
+    def discard(self) -> None:
+        self._file.close()
+        self._temp_path.unlink(missing_ok=True)
+
+
+def _archive_runs(connection: Connection, archive: MonthArchive, start: datetime, end: datetime) -> None:
+    """Archive and delete the month's unprotected runs that no longer have classifications"""
+    runs = select(RUNS).where(
+        RUNS.c.run_timestamp >= start,
+        RUNS.c.run_timestamp < end,
+        RUNS.c.id.not_in(protected_run_ids()),
+        ~select(CLASSIFICATIONS.c.id).where(CLASSIFICATIONS.c.classification_run_id == RUNS.c.id).exists()
+    ).order_by(RUNS.c.id)
+    rows = connection.execute(runs).all()
+    archive.write(RUNS.name, rows)
+    ids = [row.id for row in rows]
+    for offset in range(0, len(ids), BATCH_SIZE):
+        connection.execute(delete(RUNS).where(RUNS.c.id.in_(ids[offset:offset + BATCH_SIZE])))
+
+
+def _archive_partition(connection: Connection, archive: MonthArchive, name: str, month: datetime) -> None:
+    """
+    Detach a month's partition, archive its unprotected rows and drop it
+    Protected rows are copied into a replacement table attached as the same month; sent through the
+    parent instead they would land in the default partition
+    """
+    partition = CLASSIFICATIONS.to_metadata(MetaData(), name=name)
+    protected = partition.c.classification_run_id.in_(protected_run_ids())
+    has_unprotected = connection.execute(select(partition.c.id).where(~protected).limit(1)).first() is not None
+    has_protected = connection.execute(select(partition.c.id).where(protected).limit(1)).first() is not None
+    if has_protected and not has_unprotected:
+        return
+
+    connection.execute(text(f"ALTER TABLE {CLASSIFICATIONS.name} DETACH PARTITION {name}"))
+    rows = connection.execute(
+        select(partition).where(~protected).order_by(partition.c.id).execution_options(yield_per=BATCH_SIZE)
+    )
+    archive.write(CLASSIFICATIONS.name, rows)
+
+    if has_protected:
+        replacement = f"{name}_kept"
+        _create_standalone(connection, replacement)
+        columns = [column.name for column in CLASSIFICATIONS.c]
+        connection.execute(CLASSIFICATIONS.to_metadata(MetaData(), name=replacement).insert().from_select(
+            columns, select(partition).where(protected)
+        ))
+    connection.execute(text(f"DROP TABLE {name}"))
+    if has_protected:
+        connection.execute(text(f"ALTER TABLE {replacement} RENAME TO {name}"))
+        _attach(connection, name, month)
+
+
+def _archive_rows(connection: Connection, archive: MonthArchive, start: datetime, end: datetime) -> None:
+    """Archive and delete a month's unprotected classifications on databases without partitions"""
+    in_month = (
+        CLASSIFICATIONS.c.classification_timestamp >= start,
+        CLASSIFICATIONS.c.classification_timestamp < end,
+        CLASSIFICATIONS.c.classification_run_id.not_in(protected_run_ids())
+    )
+    rows = connection.execute(select(CLASSIFICATIONS).where(*in_month).order_by(CLASSIFICATIONS.c.id)).all()
+    archive.write(CLASSIFICATIONS.name, rows)
+    ids = [row.id for row in rows]
+    for offset in range(0, len(ids), BATCH_SIZE):
+        connection.execute(delete(CLASSIFICATIONS).where(CLASSIFICATIONS.c.id.in_(ids[offset:offset + BATCH_SIZE])))
+
+
+def _months_to_archive(connection: Connection, cutoff: datetime) -> List[Tuple[datetime, Optional[str]]]:
+    """Whole months ending on or before the cutoff, with their partition name when partitioned"""
+    if is_partitioned(connection):
+        return [(month, name) for name, month in monthly_partitions(connection) if add_months(month, 1) <= cutoff]
+    oldest = connection.execute(select(func.min(CLASSIFICATIONS.c.classification_timestamp))).scalar()
+    if oldest is None:
+        return []
+    months = []
+    month = month_start(oldest)
+    while add_months(month, 1) <= cutoff:
+        months.append((month, None))
+        month = add_months(month, 1)
+    return months
+
+
+def archive_older_than(engine: Engine, cutoff: datetime, archive_dir: str = ARCHIVE_DIR) -> List[dict]:
+    """Archive every whole month of classifications before the cutoff, one transaction per month"""
+    with engine.connect() as connection:
+        months = _months_to_archive(connection, cutoff)
+
+    results = []
+    for month, partition in months:
+        end = add_months(month, 1)
+        archive = MonthArchive(archive_dir, month)
+        try:
+            with engine.begin() as connection:
+                if partition:
+                    _archive_partition(connection, archive, partition, month)
+                else:
+                    _archive_rows(connection, archive, month, end)
+                _archive_runs(connection, archive, month, end)
+        except Exception:
+            archive.discard()
+            raise
+        if not any(archive.rows.values()):
+            archive.discard()
+            continue
+        results.append({"month": f"{month:%Y-%m}", "archive": str(archive.commit()), **archive.rows})
+    return results
+
+
+def _read_archive(path: str, table: str) -> Iterator[dict]:
+    columns = {column.name: column for column in (RUNS if table == RUNS.name else CLASSIFICATIONS).c}
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            entry = json.loads(line)
+            if entry["table"] != table:
+                continue
+            row = entry["row"]
+            for name, value in row.items():
+                if value is not None and name in columns and columns[name].type.python_type is datetime:
+                    row[name] = datetime.fromisoformat(value)
+            yield row
+
+
+def _batches(rows: Iterator[dict]) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def restore(engine: Engine, path: str) -> dict:
+    """Load an archive back; runs first so classifications can reference them. Existing ids are skipped"""
+    restored = {}
+    with engine.begin() as connection:
+        for table in (RUNS, CLASSIFICATIONS):
+            restored[table.name] = 0
+            existing = select(table.c.id)
+            for batch in _batches(_read_archive(path, table.name)):
+                present = set(connection.execute(existing.where(table.c.id.in_([row["id"] for row in batch]))).scalars())
+                rows = [row for row in batch if row["id"] not in present]
+                if rows:
+                    connection.execute(table.insert(), rows)
+                restored[table.name] += len(rows)
+    return restored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive and restore classification history")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    archive_parser = commands.add_parser("archive", help="Archive whole months older than the retention period")
+    archive_parser.add_argument("--older-than-days", type=int, default=RETENTION_DAYS)
+    archive_parser.add_argument("--dir", default=ARCHIVE_DIR)
+
+    restore_parser = commands.add_parser("restore", help="Load an archive file back into the database")
+    restore_parser.add_argument("path")
+
+    partitions_parser = commands.add_parser("ensure-partitions", help="Create upcoming monthly partitions")
+    partitions_parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+
+    args = parser.parse_args()
+    from database import engine
+
+    if args.command == "archive":
+        cutoff = datetime.utcnow() - timedelta(days=args.older_than_days)
+        print(f"📦 Archiving classifications before {cutoff:%Y-%m} into {args.dir}/")
+        results = archive_older_than(engine, cutoff, args.dir)
+        for result in results:
+            print(f"   • {result['month']}: {result['document_classifications']} classifications, "
+                  f"{result['classification_runs']} runs → {result['archive']}")
+        print(f"✅ Archived {len(results)} months")
+    elif args.command == "restore":
+        restored = restore(engine, args.path)
+        print(f"✅ Restored {restored[CLASSIFICATIONS.name]} classifications and "
+              f"{restored[RUNS.name]} runs from {args.path}")
+    else:
+        created = ensure_partitions(engine, args.months_ahead)
+        print(f"✅ Created {len(created)} partitions" + (f": {', '.join(created)}" if created else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 
 # Base schemas
 class LCDocumentRequirementBase(BaseModel):
@@ -69,6 +69,17 @@ class LetterOfCreditCreate(LetterOfCreditBase):
 
 class LetterOfCredit(LetterOfCreditBase):
     id: int
+    # Parsed from the MT700 strings (mt700.py); null where they could not be parsed
+    credit_amount_value: Optional[float] = None
+    credit_currency: Optional[str] = None
+    max_credit_amount_value: Optional[float] = None
+    tolerance_plus_percent: Optional[float] = None
+    tolerance_minus_percent: Optional[float] = None
+    issued_on: Optional[date] = None
+    expires_on: Optional[date] = None
+    expiry_place: Optional[str] = None
+    latest_shipment_on: Optional[date] = None
+    blob_sha256: Optional[str] = None  # Original PDF in the blob store
     created_at: datetime
     updated_at: datetime
     document_requirements: List[LCDocumentRequirement] = []
@@ -89,10 +100,12 @@ class ExportDocumentBase(BaseModel):
     extraction_metadata: Optional[Dict[str, Any]] = None
 
 class ExportDocumentCreate(ExportDocumentBase):
-    pass
+    lc_id: int
 
 class ExportDocument(ExportDocumentBase):
     id: int
+    source_document_id: Optional[str] = None  # Id in the bulk-ingested batch file
+    blob_sha256: Optional[str] = None  # Original PDF in the blob store
     created_at: datetime
     updated_at: datetime
     
@@ -139,6 +152,8 @@ class ClassificationRun(ClassificationRunBase):
     id: int
     lc_id: int
     run_timestamp: datetime
+    error_message: Optional[str] = None
+    trace_id: Optional[str] = None
     created_at: datetime
     updated_at: datetime
     classifications: List[DocumentClassification] = []
@@ -146,6 +161,17 @@ class ClassificationRun(ClassificationRunBase):
     class Config:
         from_attributes = True
 
+class ClassificationProgress(BaseModel):
+    run_id: int
+    lc_id: int
+    status: str
+    documents_classified: int = 0
+    total_documents: int = 0
+    matches_found: int = 0
+    error_message: Optional[str] = None
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
 # Response schemas
 class ClassificationSummary(BaseModel):
     lc_reference: str
@@ -156,6 +182,57 @@ class ClassificationSummary(BaseModel):
     unmatched_requirements: List[str]
     unmatched_export_docs: List[str]
 
+class RequirementCandidate(BaseModel):
+    lc_requirement_id: int
+    document_id: str
+    name: str
+    score: float  # Cosine similarity of the local embeddings, 0.0 to 1.0
+
+class MatchSuggestion(BaseModel):
+    export_document_id: int
+    document_id: str
+    document_name: Optional[str] = None
+    candidates: List[RequirementCandidate]
+
+class SearchResult(BaseModel):
+    kind: str  # export_document, lc or lc_requirement
+    id: int
+    lc_id: int
+    title: Optional[str] = None
+    snippet: Optional[str] = None  # Matched terms wrapped in << >> on PostgreSQL
+    rank: float
+
+class CurrencyExposure(BaseModel):
+    currency: str
+    lc_count: int
+    credit_amount: float  # Sum of 32B
+    max_exposure: float  # Sum of 39B, or 32B plus the 39A tolerance where no 39B is given
+
+class PortfolioExposure(BaseModel):
+    as_of: date
+    currencies: List[CurrencyExposure]
+    unparsed_lcs: int  # Live LCs whose amount or currency could not be parsed
+
+class ExpiringLC(BaseModel):
+    id: int
+    lc_reference: str
+    applicant: Optional[str] = None
+    beneficiary: Optional[str] = None
+    credit_currency: Optional[str] = None
+    credit_amount_value: Optional[float] = None
+    expires_on: date
+    expiry_place: Optional[str] = None
+
+class ExpiringLCs(BaseModel):
+    date_from: date
+    date_to: date  # Inclusive
+    lcs: List[ExpiringLC]
+    totals: List[CurrencyExposure]  # Over all LCs in the window, not only the listed ones
+
+class LCBatchRequest(BaseModel):
+    ids: List[int] = []
+    references: List[str] = []  # lc_reference values
+
 class APIResponse(BaseModel):
     success: bool
     message: str
@@ -0,0 +1,194 @@
+"""
+Ranked full-text search over export documents, LC clauses and LC document requirements
+On PostgreSQL each table has a stored, weighted search_vector column with a GIN index (migration 0005)
+queried with websearch_to_tsquery, so quoted phrases ("clean on board") and B/L numbers work as
+operators type them. Other databases fall back to case-insensitive substring matching
+"""
+
+import base64
+import json
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import Float, String, and_, case, cast, func, inspect, literal, literal_column, or_, select, tuple_, union_all
+from sqlalchemy.orm import Session
+
+from models import (
+    LetterOfCredit as LCModel,
+    LCDocumentRequirement as LCRequirementModel,
+    ExportDocument as ExportDocModel
+)
+
+SEARCH_CONFIG = "english"
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+SNIPPET_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=5, StartSel=<<, StopSel=>>"
+SNIPPET_CHARS = 200
+
+
+def _sources():
+    """Per result kind: model, LC id column, title and the (column, weight) pairs that are searched"""
+    return {
+        "export_document": (
+            ExportDocModel, ExportDocModel.lc_id, func.coalesce(ExportDocModel.document_name, ExportDocModel.filename),
+            [(ExportDocModel.document_name, "A"), (ExportDocModel.summary, "B"), (ExportDocModel.full_description, "C")]
+        ),
+        "lc": (
+            LCModel, LCModel.id, LCModel.lc_reference,
+            [(LCModel.lc_reference, "A"), (LCModel.goods_description, "B"), (LCModel.additional_conditions, "B")]
+        ),
+        "lc_requirement": (
+            LCRequirementModel, LCRequirementModel.lc_id, LCRequirementModel.name,
+            [(LCRequirementModel.name, "A"), (LCRequirementModel.description, "B")]
+        ),
+    }
+
+
+SEARCH_KINDS = tuple(_sources())
+
+
+@lru_cache(maxsize=None)
+def _has_search_vector(bind, table_name: str) -> bool:
+    """Whether migration 0005 added the stored column (tables made by create_all do not have it)"""
+    return any(column["name"] == "search_vector" for column in inspect(bind).get_columns(table_name))
+
+
+def _vector(bind, model, columns):
+    """The table's search_vector column, or the same expression computed inline when it is missing"""
+    if _has_search_vector(bind.engine, model.__tablename__):
+        return literal_column(f"{model.__tablename__}.search_vector")
+    config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+    weighted = [func.setweight(func.to_tsvector(config, func.coalesce(column, "")), weight) for column, weight in columns]
+    vector = weighted[0]
+    for part in weighted[1:]:
+        vector = vector.op("||")(part)
+    return vector
+
+
+def _terms(q: str) -> Tuple[List[str], List[str]]:
+    """Quoted phrases and words of a query, split into required and -excluded ones, for the substring fallback"""
+    required, excluded = [], []
+    for phrase, word in re.findall(r'"([^"]+)"|(\S+)', q.lower()):
+        if word.startswith("-") and len(word) > 1:
+            excluded.append(word[1:])
+        elif (phrase or word).strip() and word.lower() != "or":
+            required.append((phrase or word).strip())
+    return required, excluded
+
+
+def _tsquery(q: str):
+    return func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), q)
+
+
+def _postgres_select(bind, q: str, kind: str, lc_id: Optional[int]):
+    """Ids and ranks of a kind's matches; the text columns are only read for the page (_page_details)"""
+    model, lc_column, title, columns = _sources()[kind]
+    query = _tsquery(q)
+    vector = _vector(bind, model, columns)
+    statement = select(
+        literal(kind, String).label("kind"),
+        model.id.label("id"),
+        # Normalisation 32 maps the rank into [0, 1); the cast keeps cursors exact
+        cast(func.ts_rank(vector, query, 32), Float).label("rank")
+    ).where(vector.op("@@")(query))
+    if lc_id is not None:
+        statement = statement.where(lc_column == lc_id)
+    return statement
+
+
+def _fallback_select(q: str, kind: str, lc_id: Optional[int]):
+    model, lc_column, title, columns = _sources()[kind]
+    terms, excluded = _terms(q)
+    texts = [column for column, _ in columns]
+
+    def contains(column, term):
+        return func.lower(column).contains(term, autoescape=True)
+
+    # Ranked by the share of terms found in the highest-weighted column (the title)
+    rank = sum(case((contains(texts[0], term), 1.0), else_=0.0) for term in terms)
+    statement = select(
+        literal(kind, String).label("kind"),
+        model.id.label("id"),
+        cast(rank / (len(terms) + 1), Float).label("rank")
+    ).where(and_(*[or_(*[contains(column, term) for column in texts]) for term in terms]))
+    for term in excluded:
+        statement = statement.where(~or_(*[func.coalesce(contains(column, term), False) for column in texts]))
+    if lc_id is not None:
+        statement = statement.where(lc_column == lc_id)
+    return statement
+
+
+def _page_details(page, q: str, kind: str, postgres: bool):
+    """LC id, title and snippet of the page's rows of one kind, joined back by id"""
+    model, lc_column, title, columns = _sources()[kind]
+    texts = [column for column, _ in columns]
+    if postgres:
+        snippet = func.ts_headline(
+            literal_column(f"'{SEARCH_CONFIG}'::regconfig"), func.concat_ws(" ", *texts), _tsquery(q), SNIPPET_OPTIONS
+        )
+    else:
+        snippet = func.substr(func.coalesce(*texts[1:], texts[0]), 1, SNIPPET_CHARS)
+    return select(
+        page.c.kind,
+        page.c.id,
+        lc_column.label("lc_id"),
+        title.label("title"),
+        snippet.label("snippet"),
+        page.c.rank
+    ).join_from(page, model, and_(page.c.kind == kind, model.id == page.c.id))
+
+
+def encode_search_cursor(rank: float, kind: str, row_id: int) -> str:
+    payload = json.dumps({"r": rank, "k": kind, "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_search_cursor(cursor: str) -> Tuple[float, str, int]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return float(payload["r"]), str(payload["k"]), int(payload["id"])
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {e}")
+
+
+def search(db: Session, q: str, kinds: Optional[List[str]] = None, lc_id: Optional[int] = None,
+           limit: int = DEFAULT_SEARCH_LIMIT, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of matches across the requested kinds, best rank first
+    Returns: (results, next_cursor) where next_cursor is None on the last page
+    """
+    if not _terms(q)[0]:
+        raise HTTPException(status_code=400, detail="Search query must not be empty")
+    kinds = kinds or list(SEARCH_KINDS)
+    unknown = sorted(set(kinds) - set(SEARCH_KINDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search kinds: {', '.join(unknown)}")
+
+    bind = db.get_bind()
+    postgres = bind.dialect.name == "postgresql"
+    selects = [
+        _postgres_select(bind, q, kind, lc_id) if postgres else _fallback_select(q, kind, lc_id)
+        for kind in kinds
+    ]
+    matches = union_all(*selects).subquery("matches")
+
+    # Keyset over (rank, kind, id), all descending, so pages stay stable while documents are added.
+    # Only ids and ranks are sorted; titles and snippets are read for the page's rows alone
+    page = select(matches)
+    if cursor:
+        page = page.where(tuple_(matches.c.rank, matches.c.kind, matches.c.id) < decode_search_cursor(cursor))
+    page = page.order_by(matches.c.rank.desc(), matches.c.kind.desc(), matches.c.id.desc()).limit(limit + 1).cte("page")
+
+    details = union_all(*[_page_details(page, q, kind, postgres) for kind in kinds]).subquery("details")
+    rows = db.execute(
+        select(details).order_by(details.c.rank.desc(), details.c.kind.desc(), details.c.id.desc())
+    ).mappings().all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_search_cursor(last["rank"], last["kind"], last["id"])
+    return [dict(row) for row in rows], next_cursor
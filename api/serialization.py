@@ -0,0 +1,134 @@
+"""
+Fast JSON serialization path for read endpoints
+Builds plain dicts straight from ORM rows using a per-schema field plan computed once,
+skipping pydantic validation, and encodes them with orjson.
+Enabled with FAST_SERIALIZATION=1; rows from our own database are trusted to match the schemas
+"""
+
+import json
+import os
+import typing
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Type
+
+import orjson
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+from fieldsets import default_fields
+
+FAST_SERIALIZATION = os.getenv("FAST_SERIALIZATION", "0").lower() in ("1", "true", "yes")
+
+# (attribute name, default, nested plan or None, is a list of nested models)
+FieldPlan = Tuple[Tuple[str, Any, Optional[tuple], bool], ...]
+
+
+def _nested_model(annotation) -> Tuple[Optional[Type[BaseModel]], bool]:
+    """Unwrap Optional[...] / List[...] down to a pydantic model, if there is one"""
+    is_list = False
+    while True:
+        origin = typing.get_origin(annotation)
+        if origin is typing.Union:
+            args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+            if len(args) != 1:
+                return None, False
+            annotation = args[0]
+        elif origin in (list, List):
+            is_list = True
+            annotation = typing.get_args(annotation)[0]
+        else:
+            break
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, is_list
+    return None, False
+
+
+def field_plan(schema: Type[BaseModel], fields: Optional[frozenset] = None) -> FieldPlan:
+    """
+    How to read the fields of a response schema off an ORM object
+    fields limits the top level to a sparse fieldset; nested models then use their default (list) fieldset
+    """
+    return _plan(schema, fields, fields is not None)
+
+
+@lru_cache(maxsize=None)
+def _plan(schema: Type[BaseModel], fields: Optional[frozenset], sparse: bool) -> FieldPlan:
+    plan = []
+    for name, field in schema.model_fields.items():
+        if fields is not None and name not in fields:
+            continue
+        default = None if field.default is PydanticUndefined else field.default
+        nested, is_list = _nested_model(field.annotation)
+        nested_plan = None
+        if nested:
+            nested_plan = _plan(nested, default_fields(nested) if sparse else None, sparse)
+        plan.append((name, default, nested_plan, is_list))
+    return tuple(plan)
+
+
+def _build(obj, plan: FieldPlan) -> dict:
+    data = {}
+    for name, default, nested, is_list in plan:
+        value = getattr(obj, name, default)
+        if nested is not None and value is not None:
+            value = [_build(item, nested) for item in value] if is_list else _build(value, nested)
+        data[name] = value
+    return data
+
+
+def to_dicts(schema: Type[BaseModel], rows, fields: Optional[frozenset] = None) -> List[dict]:
+    """Plain dicts for ORM rows following the schema's fields, without validation"""
+    plan = field_plan(schema, fields)
+    return [_build(row, plan) for row in rows]
+
+
+def from_rows(schema: Type[BaseModel], rows, fields: Optional[frozenset] = None) -> list:
+    """Cacheable values for ORM rows: plain dicts on the fast path or for a sparse fieldset, validated models otherwise"""
+    if FAST_SERIALIZATION or fields is not None:
+        return to_dicts(schema, rows, fields)
+    return [schema.model_validate(row) for row in rows]
+
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, Decimal):
+        # As jsonable_encoder renders numeric columns
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    """Encode a response body; pydantic models are dumped without jsonable_encoder on the fast path"""
+    if FAST_SERIALIZATION:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(jsonable_encoder(value), separators=(",", ":")).encode("utf-8")
+
+
+def list_response(schema: Type[BaseModel], rows, response: Optional[Response] = None,
+                  fields: Optional[frozenset] = None):
+    """
+    Return value for an endpoint declared with response_model=List[schema]
+    On the fast path or for a sparse fieldset the rows are rendered here, keeping headers already set
+    on the injected response; otherwise they are returned for FastAPI to validate as usual
+    """
+    if not FAST_SERIALIZATION and fields is None:
+        return rows
+    headers = {}
+    if response is not None:
+        headers = {key: value for key, value in response.headers.items() if key != "content-length"}
+    return Response(
+        content=orjson.dumps(to_dicts(schema, rows, fields), default=_default),
+        media_type="application/json",
+        headers=headers
+    )
+
+
+def item_response(schema: Type[BaseModel], row, fields: Optional[frozenset] = None):
+    """Return value for a detail endpoint declared with response_model=schema"""
+    if not FAST_SERIALIZATION and fields is None:
+        return row
+    return Response(content=orjson.dumps(to_dicts(schema, [row], fields)[0], default=_default), media_type="application/json")
@@ -0,0 +1,134 @@
+"""
+Production entrypoint for the API
+Migrates the schema once, then runs WEB_CONCURRENCY preforked uvicorn worker processes on one socket.
+Each worker warms its database pool, extractor and classifier graph in the app lifespan before /ready
+reports it, and on SIGTERM stops accepting connections, lets in-flight requests finish for up to
+GRACEFUL_TIMEOUT seconds and drains its background classification runs. The live metrics of a worker
+that exits are dropped so /metrics only sums running workers, and every PARTITION_CHECK_HOURS the
+supervisor creates the coming months' classification partitions (retention.ensure_partitions)
+
+Usage: python serve.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+import uvicorn
+from dotenv import load_dotenv
+from prometheus_client import multiprocess
+from uvicorn.supervisors.multiprocess import Multiprocess
+
+load_dotenv()
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+# Seconds uvicorn waits for in-flight requests (LLM extractions can be slow) after SIGTERM
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "120"))
+KEEPALIVE_TIMEOUT = int(os.getenv("KEEPALIVE_TIMEOUT", "5"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "info")
+# Seconds between checks for exited workers
+WORKER_CHECK_INTERVAL = float(os.getenv("WORKER_CHECK_INTERVAL", "1"))
+# Hours between partition maintenance runs after the one at startup; 0 disables them
+PARTITION_CHECK_HOURS = float(os.getenv("PARTITION_CHECK_HOURS", "24"))
+
+
+def run_migrations_enabled() -> bool:
+    return os.getenv("RUN_MIGRATIONS", "true").lower() in ("1", "true", "yes")
+
+
+def prepare_database():
+    """Apply migrations before forking; workers then skip create_all"""
+    os.environ["AUTO_CREATE_TABLES"] = "false"
+    if not run_migrations_enabled():
+        return
+    from database import engine, run_migrations
+    try:
+        run_migrations()
+        print("✅ Database migrations applied")
+    finally:
+        engine.dispose()
+    create_partitions()
+
+
+def create_partitions():
+    """Create this and the coming months' classification partitions, moving rows out of the default one"""
+    from database import engine
+    from retention import ensure_partitions
+    try:
+        created = ensure_partitions(engine)
+        if created:
+            print(f"✅ Created classification partitions: {', '.join(created)}")
+    finally:
+        engine.dispose()
+
+
+def prepare_metrics_dir():
+    """Fresh shared directory for prometheus_client multiprocess metrics"""
+    if WEB_CONCURRENCY < 2 or os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        return
+    metrics_dir = os.path.join(tempfile.gettempdir(), f"lc-scanner-metrics-{PORT}")
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+
+def child_exit(pid: int):
+    """Remove an exited worker's livesum/liveall gauge files, e.g. lc_http_requests_in_progress"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+class WorkerSupervisor(Multiprocess):
+    """uvicorn's worker supervisor, calling child_exit for every worker that exits and running maintenance"""
+
+    def run(self):
+        self.startup()
+        self.next_maintenance = time.monotonic() + PARTITION_CHECK_HOURS * 3600
+        while not self.should_exit.wait(WORKER_CHECK_INTERVAL):
+            self.reap_workers()
+            self.run_maintenance()
+        self.shutdown()
+        for process in self.processes:
+            child_exit(process.pid)
+
+    def run_maintenance(self):
+        # A long-running server would otherwise write next quarter's classifications into the default partition
+        if not PARTITION_CHECK_HOURS or not run_migrations_enabled() or time.monotonic() < self.next_maintenance:
+            return
+        self.next_maintenance = time.monotonic() + PARTITION_CHECK_HOURS * 3600
+        try:
+            create_partitions()
+        except Exception as e:
+            print(f"⚠️  Partition maintenance failed: {e}")
+
+    def reap_workers(self):
+        for process in [process for process in self.processes if not process.is_alive()]:
+            self.processes.remove(process)
+            print(f"⚠️ Worker {process.pid} exited with code {process.exitcode}")
+            child_exit(process.pid)
+
+
+def main():
+    prepare_database()
+    prepare_metrics_dir()
+    print(f"🚀 Starting LC Scanner API on {HOST}:{PORT} with {WEB_CONCURRENCY} workers")
+    config = uvicorn.Config(
+        "main:app",
+        host=HOST,
+        port=PORT,
+        workers=WEB_CONCURRENCY,
+        timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+        timeout_keep_alive=KEEPALIVE_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        log_level=LOG_LEVEL
+    )
+    # Also for a single worker, so the supervisor can run maintenance beside it
+    WorkerSupervisor(config, target=uvicorn.Server(config).run, sockets=[config.bind_socket()]).run()
+
+
+if __name__ == "__main__":
+    main()
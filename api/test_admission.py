@@ -0,0 +1,92 @@
+"""
+Tests for admission control: bounded queue, fair share between clients and 429 responses
+"""
+
+import asyncio
+
+import pytest
+
+import admission
+from admission import AdmissionController, AdmissionRejected
+from conftest import seed_lc
+
+
+def test_queue_grants_least_served_client_first():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=2, max_queue=3, queue_timeout=5, per_client_limit=2)
+        order = []
+
+        async def request(client_id):
+            ticket = await controller.acquire(client_id)
+            order.append(client_id)
+            return ticket
+
+        held = await request("a")
+        other = await request("c")
+        queued = [asyncio.create_task(request("a")), asyncio.create_task(request("b"))]
+        await asyncio.sleep(0.01)
+        assert controller.stats()["queued"] == 2
+
+        # Client a still holds a slot, so b is admitted ahead of a's earlier request
+        other.release()
+        (await queued[1]).release()
+        (await queued[0]).release()
+        held.release()
+        return order, controller.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["a", "c", "b", "a"]
+    assert stats["active"] == 0 and stats["queued"] == 0 and stats["admitted"] == 4
+
+
+def test_rejects_when_queue_full_or_client_over_share():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1, queue_timeout=5)
+        ticket = await controller.acquire("a")
+
+        with pytest.raises(AdmissionRejected, match="share"):
+            await controller.acquire("a")
+
+        waiting = asyncio.create_task(controller.acquire("b"))
+        await asyncio.sleep(0.01)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("c")
+        assert rejected.value.retry_after >= 1
+
+        ticket.release()
+        (await waiting).release()
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 2
+    assert stats["active"] == 0
+
+
+def test_queue_timeout_rejects_and_cleans_up():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrent=1, max_queue=1, queue_timeout=0.05)
+        ticket = await controller.acquire("a")
+        with pytest.raises(AdmissionRejected, match="Timed out"):
+            await controller.acquire("b")
+        ticket.release()
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["timed_out"] == 1
+    assert stats["queued"] == 0 and stats["active"] == 0
+
+
+def test_classify_returns_429_with_retry_after(client, db_session, monkeypatch):
+    lc_id = seed_lc(db_session, "ADM-A", num_requirements=1, num_docs=1)
+    monkeypatch.setitem(
+        admission.controllers, "classify",
+        AdmissionController("classify", max_concurrent=0, max_queue=0, queue_timeout=0)
+    )
+
+    response = client.post(f"/classify/{lc_id}", headers={"X-Client-Id": "tester"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    stats = client.get("/admission").json()
+    assert stats["classify"]["rejected"] == 1
+    assert set(stats) == {"lc_upload", "export_upload", "classify"}
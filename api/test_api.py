@@ -47,6 +47,52 @@ def test_get_export_documents():
         print(f"Error: {response.text}")
     print("-" * 50)
 
+def test_paginate_lcs():
+    """Test keyset pagination on the LC list"""
+    print("Testing GET /lcs/ pagination...")
+    response = requests.get(f"{BASE_URL}/lcs/", params={"limit": 1})
+    print(f"Status: {response.status_code}")
+    assert response.status_code == 200
+    first_page = response.json()
+    print(f"First page: {len(first_page)} LC(s)")
+    assert len(first_page) <= 1
+    
+    next_cursor = response.headers.get("X-Next-Cursor")
+    if next_cursor:
+        next_response = requests.get(f"{BASE_URL}/lcs/", params={"limit": 1, "cursor": next_cursor})
+        assert next_response.status_code == 200
+        next_page = next_response.json()
+        print(f"Next page starts at LC ID: {next_page[0]['id']}")
+        assert next_page[0]['id'] > first_page[0]['id']
+    else:
+        print("Single page of results")
+    
+    bad_response = requests.get(f"{BASE_URL}/lcs/", params={"cursor": "not-a-cursor"})
+    print(f"Invalid cursor status: {bad_response.status_code}")
+    assert bad_response.status_code == 400
+    print("-" * 50)
+
+def test_lc_etag():
+    """Test ETag revalidation on the LC detail endpoint"""
+    print("Testing GET /lcs/{lc_id} ETag revalidation...")
+    response = requests.get(f"{BASE_URL}/lcs/", params={"limit": 1})
+    lcs = response.json()
+    if not lcs:
+        print("No LCs found to test ETags")
+        print("-" * 50)
+        return
+    
+    lc_id = lcs[0]['id']
+    first = requests.get(f"{BASE_URL}/lcs/{lc_id}")
+    etag = first.headers.get("ETag")
+    print(f"Status: {first.status_code}, ETag: {etag}")
+    assert first.status_code == 200 and etag
+    
+    revalidated = requests.get(f"{BASE_URL}/lcs/{lc_id}", headers={"If-None-Match": etag})
+    print(f"Revalidation status: {revalidated.status_code}")
+    assert revalidated.status_code == 304
+    print("-" * 50)
+
 def test_classification_summary():
     """Test classification summary"""
     print("Testing classification summary...")
@@ -90,11 +136,18 @@ def test_run_classification():
             print(f"Status: {classify_response.status_code}")
             if classify_response.status_code == 200:
                 result = classify_response.json()
-                print(f"Classification run completed:")
+                print(f"Classification run started:")
                 print(f"  Total export docs: {result['total_export_docs']}")
                 print(f"  Total LC requirements: {result['total_lc_requirements']}")
-                print(f"  Total matches found: {result['total_matches_found']}")
                 print(f"  Status: {result['status']}")
+                
+                # Check run progress
+                progress_response = requests.get(f"{BASE_URL}/classification-runs/{result['id']}/progress")
+                print(f"Progress status: {progress_response.status_code}")
+                if progress_response.status_code == 200:
+                    progress = progress_response.json()
+                    print(f"  Documents classified: {progress['documents_classified']}/{progress['total_documents']}")
+                    print(f"  Status: {progress['status']}")
             else:
                 print(f"Error: {classify_response.text}")
         else:
@@ -151,6 +204,8 @@ def main():
         
         # Test LC endpoints
         test_get_lcs()
+        test_paginate_lcs()
+        test_lc_etag()
         
         # Test export document endpoints
         test_get_export_documents()
@@ -0,0 +1,98 @@
+"""
+Tests for the AsyncSession data layer the API handlers await their queries on
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from database import RoutingSession, async_database_url, replica_reads
+from models import Base, LetterOfCredit as LCModel
+from pagination import paginate, paginate_async
+
+
+def test_async_database_url_picks_the_async_driver():
+    assert async_database_url("postgresql://u:p@db:5432/lc") == "postgresql+asyncpg://u:p@db:5432/lc"
+    assert async_database_url("postgresql+psycopg2://u:p@db/lc") == "postgresql+asyncpg://u:p@db/lc"
+    assert async_database_url("sqlite:////tmp/lc.db") == "sqlite+aiosqlite:////tmp/lc.db"
+    with pytest.raises(ValueError):
+        async_database_url("mssql+pyodbc://db/lc")
+
+
+def test_paginate_async_pages_like_paginate(db_session, async_engine):
+    db_session.add_all([LCModel(lc_reference=f"ASYNC-{n:02d}") for n in range(7)])
+    db_session.commit()
+
+    expected, cursor = [], None
+    while True:
+        rows, cursor = paginate(db_session.query(LCModel), "id", LCModel.id, LCModel.id, 3, cursor, descending=True)
+        expected.append([lc.lc_reference for lc in rows])
+        if cursor is None:
+            break
+
+    async def pages():
+        pages, cursor = [], None
+        async with AsyncSession(async_engine) as db:
+            while True:
+                rows, cursor = await paginate_async(
+                    db, select(LCModel), "id", LCModel.id, LCModel.id, 3, cursor, descending=True
+                )
+                pages.append([lc.lc_reference for lc in rows])
+                if cursor is None:
+                    return pages
+
+    assert asyncio.run(pages()) == expected
+    assert [len(page) for page in expected] == [3, 3, 1]
+
+
+def test_async_sessions_route_reads_to_replicas(tmp_path):
+    async def run():
+        engines = {}
+        for name in ("primary", "replica"):
+            engines[name] = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / name}.db", poolclass=NullPool)
+            async with engines[name].begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with AsyncSession(engines[name]) as db:
+                db.add(LCModel(lc_reference=f"ON-{name.upper()}"))
+                await db.commit()
+
+        make_session = async_sessionmaker(
+            engines["primary"], sync_session_class=RoutingSession, expire_on_commit=False,
+            replicas=[engines["replica"].sync_engine]
+        )
+        references = select(LCModel.lc_reference)
+        async with make_session() as db:
+            with replica_reads(db.sync_session):
+                seen = [(await db.execute(references)).scalars().all()]
+                db.add(LCModel(lc_reference="NEW"))
+                await db.commit()
+                seen.append(sorted((await db.execute(references)).scalars().all()))
+        for engine in engines.values():
+            await engine.dispose()
+        return seen
+
+    assert asyncio.run(run()) == [["ON-REPLICA"], ["NEW", "ON-PRIMARY"]]
+
+
+def test_lc_lifecycle_on_async_handlers(client, db_session):
+    created = client.post("/lcs/", json={
+        "lc_reference": "ASYNC-LC",
+        "document_requirements": [{"document_id": "doc_001", "name": "Invoice"}]
+    })
+    assert created.status_code == 200
+    lc_id = created.json()["id"]
+    assert [r["name"] for r in created.json()["document_requirements"]] == ["Invoice"]
+    assert client.post("/lcs/", json={"lc_reference": "ASYNC-LC"}).status_code == 400
+
+    updated = client.put(f"/lcs/{lc_id}", json={"lc_reference": "ASYNC-LC", "applicant": "ACME"})
+    assert updated.json()["applicant"] == "ACME"
+    assert [r["name"] for r in updated.json()["document_requirements"]] == ["Invoice"]
+    assert client.get(f"/lcs/{lc_id}").json()["applicant"] == "ACME"
+
+    bare_id = client.post("/lcs/", json={"lc_reference": "ASYNC-BARE"}).json()["id"]
+    assert client.delete(f"/lcs/{bare_id}").status_code == 200
+    assert client.get(f"/lcs/{bare_id}").status_code == 404
+    assert db_session.get(LCModel, bare_id) is None
@@ -0,0 +1,116 @@
+"""
+Tests for the content-addressed blob store, its reference counts and re-extraction from stored PDFs
+"""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+import blob_store
+import main
+from blob_store import BlobStore, add_reference, collect_garbage, release_reference
+from conftest import seed_lc
+from models import Blob as BlobModel, ExportDocument as ExportDocModel
+
+PDF = b"%PDF-1.4 invoice"
+
+
+class FakeExtractor:
+    def __init__(self):
+        self.calls = []
+        self.on_event_loop = []
+
+    def extract(self, file_path, schema, filename=None, output_path=None):
+        try:
+            asyncio.get_running_loop()
+            self.on_event_loop.append(filename)
+        except RuntimeError:
+            pass
+        with open(file_path, "rb") as f:
+            content = f.read()
+        self.calls.append((file_path, filename))
+        return {"document_name": f"{filename} v{len(self.calls)}", "summary": content.decode(), "full_description": "d"}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    test_store = BlobStore(tmp_path / "blobs")
+    monkeypatch.setattr(blob_store, "blob_store", test_store)
+    monkeypatch.setattr(main, "blob_store", test_store)
+    return test_store
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    fake = FakeExtractor()
+    monkeypatch.setattr(main, "get_extractor", lambda: fake)
+    return fake
+
+
+def test_identical_content_is_stored_once_in_sharded_directories(store, tmp_path):
+    sha256, size = store.put_bytes(PDF)
+    assert size == len(PDF)
+    assert store.path(sha256).relative_to(store.root).parts == (sha256[:2], sha256[2:4], sha256)
+
+    source = tmp_path / "copy.pdf"
+    source.write_bytes(PDF)
+    assert store.put_file(source) == (sha256, size)
+    assert [path.name for path in store.files()] == [sha256]
+
+    with pytest.raises(ValueError):
+        store.path("../../etc/passwd")
+
+
+def test_references_are_counted_and_unreferenced_blobs_collected(store, db_session):
+    kept, _ = store.put_bytes(b"kept")
+    dropped, _ = store.put_bytes(b"dropped")
+    orphan, _ = store.put_bytes(b"never referenced")
+    for sha256 in (kept, kept, dropped):
+        add_reference(db_session, sha256, 4)
+    release_reference(db_session, kept)
+    release_reference(db_session, dropped)
+    db_session.commit()
+    assert db_session.get(BlobModel, kept).ref_count == 1
+
+    # Within the grace period nothing goes
+    assert collect_garbage(db_session, store) == []
+
+    for path in store.files():
+        os.utime(path, (time.time() - 7200, time.time() - 7200))
+    assert sorted(collect_garbage(db_session, store, grace_seconds=0)) == sorted([dropped, orphan])
+    assert [path.name for path in store.files()] == [kept]
+    db_session.expire_all()
+    assert db_session.get(BlobModel, dropped) is None
+
+
+def test_uploads_keep_originals_and_reextract_without_a_new_upload(client, db_session, store, extractor):
+    lc_id = seed_lc(db_session, "BLOB-A", num_requirements=1, num_docs=0)
+    files = [("files", (name, PDF, "application/pdf")) for name in ("invoice_1.pdf", "invoice_2.pdf")]
+    docs = client.post(f"/export-documents/upload/{lc_id}", files=files).json()
+
+    sha256 = docs[0]["blob_sha256"]
+    assert {doc["blob_sha256"] for doc in docs} == {sha256}
+    assert [path.name for path in store.files()] == [sha256]
+    assert db_session.get(BlobModel, sha256).ref_count == 2
+    assert extractor.calls[0] == (store.path(sha256), "invoice_1.pdf")
+
+    download = client.get(f"/export-documents/{docs[0]['id']}/file")
+    assert download.status_code == 200 and download.content == PDF
+
+    again = client.post(f"/export-documents/{docs[0]['id']}/reextract")
+    assert again.status_code == 200
+    assert again.json()["document_name"] == "invoice_1.pdf v3"
+    assert again.json()["extraction_metadata"]["reextracted_from_blob"] == sha256
+    # Extraction blocks on the LLM, so it runs in the threadpool rather than on the event loop
+    assert extractor.on_event_loop == []
+
+
+def test_reextract_needs_a_stored_original(client, db_session, store, extractor):
+    seed_lc(db_session, "BLOB-B", num_requirements=1, num_docs=1)
+    doc_id = db_session.query(ExportDocModel.id).scalar()
+
+    assert client.post(f"/export-documents/{doc_id}/reextract").status_code == 409
+    assert client.get(f"/export-documents/{doc_id}/file").status_code == 404
+    assert client.post("/export-documents/999999/reextract").status_code == 404
@@ -0,0 +1,147 @@
+"""
+Tests for the streaming bulk ingest endpoint and its incremental parsers
+"""
+
+import json
+
+import pytest
+
+from bulk_ingest import BatchJSONParser, BulkIngestError
+from document_ids import allocate_document_ids
+from models import (
+    LetterOfCredit as LCModel,
+    LCDocumentRequirement as LCRequirementModel,
+    ExportDocument as ExportDocModel
+)
+
+
+def lc_analysis(reference, requirement_count=2):
+    return {
+        "LC_REFERENCE": reference,
+        "APPLICANT": f"{reference} applicant",
+        "DOCUMENTS_REQUIRED": [
+            {"document_id": f"doc_{i:03d}", "name": f"{reference} requirement {i}", "quantity": 1}
+            for i in range(requirement_count)
+        ]
+    }
+
+
+def export_document(document_id, lc_reference=None):
+    record = {
+        "document_id": document_id,
+        "file_info": {
+            "filename": f"{document_id}.pdf",
+            "file_size_bytes": 100,
+            "extraction_timestamp": "2025-01-01T00:00:00"
+        },
+        "extraction_result": {"document_name": document_id, "summary": "s", "full_description": "d"}
+    }
+    if lc_reference:
+        record["lc_reference"] = lc_reference
+    return record
+
+
+def batch_json(documents):
+    return json.dumps({
+        "extraction_metadata": {"schema_used": "SimpleDocumentSchema", "total_documents": len(documents)},
+        "documents": documents
+    }, indent=2)
+
+
+def test_ndjson_ingest_is_idempotent(client, db_session):
+    lines = [lc_analysis("BULK-A"), lc_analysis("BULK-B", 3)]
+    lines += [export_document(f"bulk_a_{i}", "BULK-A") for i in range(5)]
+    lines += [export_document("orphan", "BULK-MISSING"), {"unexpected": True}]
+    body = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+
+    response = client.post("/bulk/ingest?batch_size=3", content=body,
+                           headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    summary = response.json()["data"]
+    assert summary["lcs_created"] == 2
+    assert summary["requirements_created"] == 5
+    assert summary["export_documents_created"] == 5
+    assert summary["records_rejected"] == 3
+    assert summary["rows_written"] == 12
+    assert summary["rows_per_second"] > 0
+
+    lc_a = db_session.query(LCModel).filter(LCModel.lc_reference == "BULK-A").one()
+    assert db_session.query(ExportDocModel).filter(ExportDocModel.lc_id == lc_a.id).count() == 5
+    assert db_session.query(LCRequirementModel).count() == 5
+    # Embedded at ingest, as the Core inserts bypass the ORM events
+    assert all(doc.embedding for doc in db_session.query(ExportDocModel))
+    assert all(requirement.embedding for requirement in db_session.query(LCRequirementModel))
+
+    again = client.post("/bulk/ingest?format=ndjson", content=body).json()["data"]
+    assert again["rows_written"] == 0
+    assert again["lcs_existing"] == 2
+    assert again["export_documents_existing"] == 5
+
+
+def test_batch_json_ingest_uses_lc_reference_param(client, db_session):
+    client.post("/bulk/ingest", content=json.dumps(lc_analysis("BULK-C")))
+    body = batch_json([export_document(f"bulk_c_{i}") for i in range(4)])
+
+    response = client.post("/bulk/ingest?lc_reference=BULK-C", content=body,
+                           headers={"Content-Type": "application/json"})
+    assert response.status_code == 200
+    assert response.json()["data"]["export_documents_created"] == 4
+
+    document = db_session.query(ExportDocModel).filter(ExportDocModel.source_document_id == "bulk_c_0").one()
+    assert document.extraction_metadata["original_metadata"]["schema_used"] == "SimpleDocumentSchema"
+    assert document.document_id == f"export_doc_{document.lc_id}_001"
+
+
+def test_batch_ids_repeated_across_lcs_are_kept_per_lc(client, db_session):
+    # extract_document.py --batch numbers every batch from export_doc_001
+    lines = [lc_analysis(reference, 1) for reference in ("BULK-X", "BULK-Y", "BULK-Z")]
+    lines += [
+        export_document(f"export_doc_{i:03d}", reference)
+        for reference in ("BULK-X", "BULK-Y", "BULK-Z") for i in range(1, 4)
+    ]
+    lines.append(export_document("export_doc_001", "BULK-Y"))
+    body = "\n".join(json.dumps(line) for line in lines)
+
+    summary = client.post("/bulk/ingest?format=ndjson&batch_size=4", content=body).json()["data"]
+    assert summary["export_documents_created"] == 9
+    assert summary["export_documents_existing"] == 1
+
+    for reference in ("BULK-X", "BULK-Y", "BULK-Z"):
+        lc = db_session.query(LCModel).filter(LCModel.lc_reference == reference).one()
+        documents = db_session.query(ExportDocModel).filter(ExportDocModel.lc_id == lc.id).order_by(ExportDocModel.id).all()
+        assert [document.source_document_id for document in documents] == ["export_doc_001", "export_doc_002", "export_doc_003"]
+        assert [document.document_id for document in documents] == [f"export_doc_{lc.id}_{i:03d}" for i in range(1, 4)]
+
+    # Uploads continue the per-LC numbering after ingested documents
+    lc_z = db_session.query(LCModel).filter(LCModel.lc_reference == "BULK-Z").one()
+    assert allocate_document_ids(db_session, lc_z.id, 1) == [f"export_doc_{lc_z.id}_004"]
+    db_session.rollback()
+
+    again = client.post("/bulk/ingest?format=ndjson", content=body).json()["data"]
+    assert again["export_documents_created"] == 0
+    assert again["export_documents_existing"] == 10
+
+
+def test_batch_parser_handles_arbitrary_chunking():
+    documents = [export_document(f"chunk_{i}") for i in range(3)]
+    text = batch_json(documents)
+
+    parser = BatchJSONParser()
+    records = []
+    for char in text:
+        records.extend(parser.feed(char))
+    records.extend(parser.close())
+
+    assert [record["document_id"] for record in records] == ["chunk_0", "chunk_1", "chunk_2"]
+    assert parser.metadata["extraction_metadata"]["total_documents"] == 3
+
+
+def test_truncated_batch_json_is_rejected(client):
+    body = batch_json([export_document("cut")])[:-20]
+    response = client.post("/bulk/ingest?format=batch&lc_reference=NONE", content=body)
+    assert response.status_code == 400
+
+    parser = BatchJSONParser()
+    parser.feed(body)
+    with pytest.raises(BulkIngestError):
+        parser.close()
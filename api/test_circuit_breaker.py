@@ -0,0 +1,164 @@
+"""
+Tests for the LLM circuit breaker, the /ready endpoint and shutdown drain
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+import circuit_breaker
+import classifier_runner
+import metrics
+import readiness
+from circuit_breaker import CircuitBreaker, CircuitBreakerHandler, CircuitOpenError
+from conftest import seed_lc
+
+
+def test_opens_on_failure_rate_and_recovers_after_probe():
+    breaker = CircuitBreaker("test", failure_rate=0.5, window=4, min_calls=4, open_seconds=0.05)
+    for succeeded in (True, False, True, False):
+        breaker.before_call()
+        breaker.record(succeeded)
+    assert breaker.state == circuit_breaker.OPEN
+
+    with pytest.raises(CircuitOpenError) as refused:
+        breaker.before_call()
+    assert refused.value.retry_after >= 1
+
+    time.sleep(0.06)
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    breaker.before_call()
+    # Only one probe at a time
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.record(True)
+    assert breaker.state == circuit_breaker.CLOSED
+    assert breaker.stats()["opened_count"] == 1
+
+
+def test_slow_calls_count_as_failures_and_failed_probe_reopens():
+    breaker = CircuitBreaker("test", slow_call_seconds=1, window=2, min_calls=2, open_seconds=0.05)
+    breaker.record(True, seconds=5)
+    breaker.record(True, seconds=5)
+    assert breaker.state == circuit_breaker.OPEN
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record(False)
+    assert breaker.state == circuit_breaker.OPEN
+    assert breaker.stats()["opened_count"] == 2
+
+
+def test_handler_fails_langchain_calls_fast_while_open():
+    breaker = CircuitBreaker("test", window=1, min_calls=1, open_seconds=60)
+    handler = CircuitBreakerHandler(breaker)
+    llm = FakeListChatModel(responses=["ok", "ok"])
+
+    assert llm.invoke("hello", config={"callbacks": [handler]}).content == "ok"
+    assert breaker.stats()["recent_calls"] == 1
+
+    breaker.record(False)
+    with pytest.raises(CircuitOpenError):
+        llm.invoke("hello", config={"callbacks": [handler]})
+    assert breaker.stats()["rejected"] == 1
+
+
+@pytest.fixture
+def open_llm_breaker(monkeypatch):
+    breaker = circuit_breaker.llm_breaker
+    for name in ("_state", "_opened_at", "opened_count", "rejected"):
+        monkeypatch.setattr(breaker, name, getattr(breaker, name))
+    for _ in range(breaker.min_calls):
+        breaker.record(False)
+    assert breaker.state == circuit_breaker.OPEN
+    return breaker
+
+
+@pytest.fixture
+def serving(monkeypatch):
+    monkeypatch.setattr(readiness, "phase", readiness.SERVING)
+
+
+def test_ready_reports_checks(client, serving):
+    response = client.get("/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ready"] is True
+    assert body["checks"]["database"]["ok"] is True
+    assert set(body["checks"]) == {
+        "lifecycle", "database", "db_pool", "async_db_pools", "classifier", "admission", "llm"
+    }
+
+
+def test_exhausted_async_pool_fails_readiness(db_session, engine, database_path, serving):
+    pooled = create_async_engine(
+        f"sqlite+aiosqlite:///{database_path}", poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0
+    )
+
+    async def run():
+        async with pooled.connect():
+            held = readiness.readiness(db_session, engine, [pooled])
+        released = readiness.readiness(db_session, engine, [pooled])
+        await pooled.dispose()
+        return held, released
+
+    held, released = asyncio.run(run())
+    assert held["ready"] is False
+    assert held["checks"]["async_db_pools"]["pools"] == [{"ok": False, "checked_out": 1, "capacity": 1, "overflow": 0}]
+    assert released["ready"] is True
+
+
+def test_not_ready_until_warm_and_while_draining(client, monkeypatch):
+    for phase in (readiness.STARTING, readiness.DRAINING):
+        monkeypatch.setattr(readiness, "phase", phase)
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["checks"]["lifecycle"] == {"ok": False, "phase": phase}
+
+
+def test_open_breaker_degrades_and_fails_llm_endpoints_fast(client, db_session, serving, open_llm_breaker):
+    lc_id = seed_lc(db_session, "CB-A", num_requirements=1, num_docs=1)
+
+    ready = client.get("/ready").json()
+    assert ready["status"] == "degraded" and ready["ready"] is True
+    assert ready["checks"]["llm"]["state"] == "open"
+
+    response = client.post(f"/classify/{lc_id}")
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+    response = client.post("/lcs/upload", files={"file": ("lc.pdf", b"%PDF-1.4", "application/pdf")})
+    assert response.status_code == 503
+
+
+def test_calls_refused_by_the_breaker_leave_no_metrics_behind(open_llm_breaker):
+    llm = FakeListChatModel(responses=["ok"])
+    started = len(metrics.llm_metrics._started)
+
+    for _ in range(3):
+        with pytest.raises(CircuitOpenError):
+            llm.invoke("hello", config={"callbacks": classifier_runner.LLM_CALLBACKS})
+    assert len(metrics.llm_metrics._started) == started
+
+
+def test_drain_cancels_runs_still_waiting_for_a_worker(monkeypatch):
+    release = threading.Event()
+    finished = []
+    monkeypatch.setattr(classifier_runner, "_executor", ThreadPoolExecutor(max_workers=1))
+    monkeypatch.setattr(classifier_runner, "_classify", lambda *args: release.wait(5))
+    monkeypatch.setattr(classifier_runner, "_finish_run", lambda run_id, lc_id, status, error=None: finished.append((run_id, status)))
+
+    classifier_runner.submit_classification(901, 1, 1)
+    classifier_runner.submit_classification(902, 1, 1)
+
+    assert classifier_runner.drain(0.05) == 1
+    assert finished == [(902, "failed")]
+    release.set()
+    classifier_runner._executor.shutdown(wait=True)
+    assert classifier_runner.executor_stats()["running"] == 0
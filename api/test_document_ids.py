@@ -0,0 +1,79 @@
+"""
+Tests for export document id allocation from per-LC counters
+"""
+
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import main
+from blob_store import BlobStore
+from conftest import seed_lc
+from document_ids import allocate_document_ids
+from models import Base, ExportDocument as ExportDocModel, LetterOfCredit as LCModel
+
+
+class FakeExtractor:
+    def extract(self, file_path, schema, filename=None, output_path=None):
+        return {"document_name": file_path.name, "summary": "s", "full_description": "d"}
+
+
+def test_ids_are_unique_across_lcs_and_continue_after_existing_documents(db_session):
+    first = seed_lc(db_session, "ID-A", num_requirements=1, num_docs=2)
+    second = seed_lc(db_session, "ID-B", num_requirements=1, num_docs=0)
+
+    assert allocate_document_ids(db_session, first, 2) == [f"export_doc_{first}_003", f"export_doc_{first}_004"]
+    assert allocate_document_ids(db_session, second, 1) == [f"export_doc_{second}_001"]
+    assert allocate_document_ids(db_session, first, 1) == [f"export_doc_{first}_005"]
+    assert allocate_document_ids(db_session, first, 0) == []
+
+
+def test_concurrent_allocations_never_hand_out_the_same_id(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ids.db'}", connect_args={"timeout": 30})
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        lc = LCModel(lc_reference="ID-C")
+        db.add(lc)
+        db.commit()
+        lc_id = lc.id
+
+    allocated, errors = [], []
+
+    def worker():
+        try:
+            for _ in range(5):
+                with Session() as db:
+                    ids = allocate_document_ids(db, lc_id, 3)
+                    db.commit()
+                allocated.extend(ids)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    assert errors == []
+    assert sorted(allocated) == [f"export_doc_{lc_id}_{n:03d}" for n in range(1, 121)]
+
+
+def test_uploads_to_two_lcs_do_not_collide(client, db_session, monkeypatch, tmp_path):
+    monkeypatch.setattr(main, "get_extractor", lambda: FakeExtractor())
+    monkeypatch.setattr(main, "blob_store", BlobStore(tmp_path / "blobs"))
+    first = seed_lc(db_session, "ID-D", num_requirements=1, num_docs=0)
+    second = seed_lc(db_session, "ID-E", num_requirements=1, num_docs=0)
+
+    files = [("files", (f"doc_{i}.pdf", b"%PDF-1.4", "application/pdf")) for i in range(2)]
+    for lc_id in (first, second, first):
+        response = client.post(f"/export-documents/upload/{lc_id}", files=files)
+        assert response.status_code == 200, response.text
+
+    assert not any(doc.extraction_metadata.get("error") for doc in db_session.query(ExportDocModel))
+    ids = sorted(doc.document_id for doc in db_session.query(ExportDocModel))
+    assert ids == sorted([f"export_doc_{first}_{n:03d}" for n in range(1, 5)]
+                         + [f"export_doc_{second}_{n:03d}" for n in range(1, 3)])
@@ -0,0 +1,130 @@
+"""
+Tests for local embeddings, the requirement index and /lcs/{id}/suggest-matches
+"""
+
+import sys
+
+import numpy as np
+from sqlalchemy import update
+
+import classifier_runner
+import embeddings
+from models import ExportDocument as ExportDocModel, LCDocumentRequirement as LCRequirementModel, LetterOfCredit as LCModel
+from response_cache import response_cache
+
+REQUIREMENTS = [
+    ("doc_001", "MANUALLY SIGNED COMMERCIAL INVOICES", "Invoices in 3 originals showing the goods value"),
+    ("doc_002", "FULL SET CLEAN ON BOARD BILLS OF LADING", "Marked freight prepaid, made out to order"),
+    ("doc_003", "CERTIFICATE OF ORIGIN", "Issued by the chamber of commerce"),
+    ("doc_004", "PACKING LIST", "Showing gross and net weights per carton"),
+]
+DOCUMENTS = [
+    ("Commercial Invoice INV-2291", "Signed invoice for 20 MT of frozen shrimp, total value USD 91,000"),
+    ("Bill of Lading MAEU123456789", "Clean on board ocean bill of lading, freight prepaid"),
+    ("Packing List", "Gross weight and net weight per carton for 1,200 cartons"),
+]
+
+
+def seed_lc_with_texts(db, lc_reference="EMB-A") -> int:
+    lc = LCModel(lc_reference=lc_reference)
+    db.add(lc)
+    db.flush()
+    db.add_all([
+        LCRequirementModel(lc_id=lc.id, document_id=document_id, name=name, description=description)
+        for document_id, name, description in REQUIREMENTS
+    ])
+    db.add_all([
+        ExportDocModel(lc_id=lc.id, document_id=f"{lc_reference}_export_doc_{i:03d}", filename=f"doc_{i}.pdf",
+                       document_name=name, summary=summary)
+        for i, (name, summary) in enumerate(DOCUMENTS, 1)
+    ])
+    db.commit()
+    return lc.id
+
+
+def test_embeddings_are_normalised_and_stable():
+    vector = embeddings.embed("Commercial invoices, signed")
+    assert vector.dtype == np.float32 and vector.shape == (embeddings.EMBEDDING_DIM,)
+    assert abs(float(np.linalg.norm(vector)) - 1.0) < 1e-5
+    assert np.array_equal(embeddings.from_blob(embeddings.to_blob(vector)), vector)
+    assert float(vector @ embeddings.embed("signed commercial invoice")) > 0.7
+    assert float(vector @ embeddings.embed("Certificate of origin")) == 0
+    assert not embeddings.embed("of the").any()
+    assert embeddings.from_blob(b"short") is None
+
+
+def test_suggest_matches_ranks_the_right_requirement_first(client, db_session):
+    lc_id = seed_lc_with_texts(db_session)
+
+    suggestions = client.get(f"/lcs/{lc_id}/suggest-matches?k=2").json()
+    assert [[c["document_id"] for c in s["candidates"]][0] for s in suggestions] == ["doc_001", "doc_002", "doc_004"]
+    assert all(len(s["candidates"]) == 2 for s in suggestions)
+    first = suggestions[0]["candidates"]
+    assert 0 < first[1]["score"] < first[0]["score"] <= 1
+
+    doc_id = suggestions[1]["export_document_id"]
+    single = client.get(f"/lcs/{lc_id}/suggest-matches?export_document_id={doc_id}").json()
+    assert [s["export_document_id"] for s in single] == [doc_id]
+
+    assert client.get("/lcs/999999/suggest-matches").status_code == 404
+
+
+def test_lcs_with_identical_requirements_get_their_own_ids(client, db_session):
+    lc_ids = [seed_lc_with_texts(db_session, reference) for reference in ("EMB-C", "EMB-D")]
+
+    for lc_id in lc_ids:
+        own_ids = {requirement.id for requirement in db_session.query(LCRequirementModel).filter(LCRequirementModel.lc_id == lc_id)}
+        suggestions = client.get(f"/lcs/{lc_id}/suggest-matches?k=4").json()
+        suggested_ids = {c["lc_requirement_id"] for s in suggestions for c in s["candidates"]}
+        assert suggested_ids == own_ids
+
+    shared = embeddings.requirement_index([{"id": 1, "name": "Invoice", "description": None}])
+    other = embeddings.requirement_index([{"id": 99, "name": "Invoice", "description": None}])
+    assert other.matrix is shared.matrix
+    assert other.top_k(embeddings.embed("invoice"), 1)[0][0][0]["id"] == 99
+
+
+def test_rows_without_embeddings_are_suggested_from_memory_and_backfilled(client, db_session):
+    lc_id = seed_lc_with_texts(db_session, "EMB-B")
+    assert all(embeddings.from_blob(doc.embedding) is not None for doc in db_session.query(ExportDocModel))
+
+    # As after a bulk ingest through Core inserts
+    db_session.execute(update(ExportDocModel).values(embedding=None))
+    db_session.execute(update(LCRequirementModel).values(embedding=None))
+    db_session.commit()
+
+    # Suggestions are computed in memory; the GET writes nothing
+    suggestions = client.get(f"/lcs/{lc_id}/suggest-matches")
+    assert suggestions.status_code == 200
+    db_session.expire_all()
+    assert not any(doc.embedding for doc in db_session.query(ExportDocModel))
+
+    assert embeddings.backfill(db_session, batch_size=2) == {
+        "export_documents": len(DOCUMENTS), "lc_document_requirements": len(REQUIREMENTS)
+    }
+    db_session.expire_all()
+    assert all(doc.embedding for doc in db_session.query(ExportDocModel))
+    assert all(requirement.embedding for requirement in db_session.query(LCRequirementModel))
+    assert embeddings.backfill(db_session) == {"export_documents": 0, "lc_document_requirements": 0}
+    response_cache.clear()
+    assert client.get(f"/lcs/{lc_id}/suggest-matches").json() == suggestions.json()
+
+
+def test_classifier_prompt_only_lists_shortlisted_requirements(monkeypatch):
+    classifier_runner.warm_up()
+    graph = sys.modules["graph"]
+    prompts = []
+    monkeypatch.setattr(graph, "CLASSIFIER_CANDIDATES", 2)
+    monkeypatch.setattr(graph, "call_ai_classifier_with_selection", lambda prompt, trace_id=None: prompts.append(prompt))
+
+    requirements = [{"document_id": d, "name": n, "description": desc} for d, n, desc in REQUIREMENTS]
+    name, summary = DOCUMENTS[1]
+    graph.classify_current_document({
+        "export_documents": [{"document_id": "x", "extraction_result": {"document_name": name, "summary": summary}}],
+        "lc_requirements": requirements,
+        "current_doc_index": 0,
+    })
+
+    listed = prompts[0].split("LC REQUIRED DOCUMENT CATEGORIES:")[1].split("INSTRUCTIONS:")[0]
+    assert "ID: doc_002" in listed
+    assert listed.count("ID: ") == 2
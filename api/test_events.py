@@ -0,0 +1,138 @@
+"""
+Tests for LC change events and their server-sent event stream
+"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+import blob_store
+import events
+import main
+from blob_store import BlobStore
+from conftest import seed_lc
+from models import LetterOfCredit as LCModel
+
+
+class FakeExtractor:
+    def extract(self, file_path, schema, filename=None, output_path=None):
+        return {"document_name": filename, "summary": "s", "full_description": "d"}
+
+
+def parse_stream(body: str):
+    parsed = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if line and not line.startswith(":"))
+        if "event" in fields:
+            parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def test_events_reach_subscribers_only_when_the_transaction_commits(db_session):
+    lc_id = seed_lc(db_session, "EV-A", num_requirements=1, num_docs=0)
+
+    async def run():
+        subscription = events.hub.subscribe(lc_id)
+        other = events.hub.subscribe(lc_id + 1)
+        try:
+            events.notify(db_session, lc_id, "run_created", run_id=1)
+            db_session.rollback()
+            events.notify(db_session, lc_id, "run_completed", run_id=2, status="completed")
+            await asyncio.sleep(0.01)
+            assert subscription.queue.empty()
+
+            db_session.commit()
+            event = await asyncio.wait_for(subscription.queue.get(), 1)
+            assert (event["type"], event["lc_id"], event["run_id"]) == ("run_completed", lc_id, 2)
+            assert subscription.queue.empty() and other.queue.empty()
+        finally:
+            events.hub.unsubscribe(subscription)
+            events.hub.unsubscribe(other)
+
+    asyncio.run(run())
+    assert events.hub.subscriber_count() == 0
+
+
+def test_subscriber_that_falls_behind_gets_a_resync(engine, monkeypatch):
+    monkeypatch.setattr(events, "SUBSCRIBER_QUEUE_SIZE", 2)
+
+    async def run():
+        subscription = events.hub.subscribe(7)
+        try:
+            for n in range(3):
+                events.publish(engine, 7, "document_classified", documents_classified=n)
+            await asyncio.sleep(0.01)
+            return [subscription.queue.get_nowait()["type"] for _ in range(subscription.queue.qsize())]
+        finally:
+            events.hub.unsubscribe(subscription)
+
+    assert asyncio.run(run()) == ["resync"]
+
+
+def test_stream_delivers_run_and_extraction_events(client, db_session, tmp_path, monkeypatch):
+    lc_id = seed_lc(db_session, "EV-B", num_requirements=1, num_docs=0)
+    store = BlobStore(tmp_path / "blobs")
+    monkeypatch.setattr(blob_store, "blob_store", store)
+    monkeypatch.setattr(main, "blob_store", store)
+    monkeypatch.setattr(main, "get_extractor", lambda: FakeExtractor())
+    monkeypatch.setattr(events, "STREAM_MAX_SECONDS", 1.0)
+
+    assert client.get("/lcs/999999/events").status_code == 404
+
+    def write_once_subscribed():
+        while not events.hub.subscriber_count(lc_id):
+            threading.Event().wait(0.01)
+        client.post(f"/classify/{lc_id}")
+        client.post(
+            f"/export-documents/upload/{lc_id}",
+            files=[("files", ("invoice.pdf", b"%PDF-1.4 invoice", "application/pdf"))]
+        )
+
+    writer = threading.Thread(target=write_once_subscribed)
+    writer.start()
+    response = client.get(f"/lcs/{lc_id}/events")
+    writer.join()
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    received = parse_stream(response.text)
+    assert [event_type for event_type, _ in received] == ["run_created", "document_extracted"]
+    assert received[0][1]["status"] == "completed"
+    assert received[1][1]["document_id"] == f"export_doc_{lc_id}_001"
+    assert events.hub.subscriber_count() == 0
+
+
+def test_lc_writes_notify_other_workers(client, db_session):
+    lc_id = seed_lc(db_session, "EV-C", num_requirements=0, num_docs=0)
+
+    async def run():
+        subscription = events.hub.subscribe(lc_id)
+        try:
+            await asyncio.to_thread(client.put, f"/lcs/{lc_id}", json={"lc_reference": "EV-C", "applicant": "Acme"})
+            await asyncio.to_thread(client.delete, f"/classifications/reset/{lc_id}")
+            await asyncio.to_thread(client.delete, f"/lcs/{lc_id}")
+            await asyncio.sleep(0.01)
+            return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+        finally:
+            events.hub.unsubscribe(subscription)
+
+    received = asyncio.run(run())
+    assert [(event["type"], event["change"]) for event in received] == [
+        ("lc_changed", "updated"), ("lc_changed", "classifications_reset"), ("lc_changed", "deleted")
+    ]
+    with pytest.raises(ValueError):
+        events.notify_changed(db_session, lc_id, "renamed")
+
+
+def test_notification_from_another_worker_drops_the_cached_response(client, db_session, engine):
+    lc_id = seed_lc(db_session, "EV-D", num_requirements=1, num_docs=0)
+    assert client.get(f"/lcs/{lc_id}").json()["applicant"] != "Other worker"
+
+    # Another worker's write: this process never invalidated its cache
+    db_session.query(LCModel).filter(LCModel.id == lc_id).update({"applicant": "Other worker"})
+    db_session.commit()
+    assert client.get(f"/lcs/{lc_id}").json()["applicant"] != "Other worker"
+
+    events.PostgresListener(engine)._deliver(json.dumps(events.make_event(lc_id, "lc_changed", change="updated")))
+    assert client.get(f"/lcs/{lc_id}").json()["applicant"] == "Other worker"
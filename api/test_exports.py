@@ -0,0 +1,49 @@
+"""
+Tests for the streaming NDJSON/CSV export endpoints
+"""
+
+import csv
+import io
+import json
+
+import exports
+from conftest import seed_lc
+
+
+def test_export_classifications_ndjson_scoped_to_lc(client, db_session):
+    lc_a = seed_lc(db_session, "EXP-A", num_requirements=3, num_docs=6)
+    seed_lc(db_session, "EXP-B", num_requirements=2, num_docs=4)
+
+    response = client.get(f"/export/classifications?lc_id={lc_a}")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 3
+    assert {row["lc_reference"] for row in rows} == {"EXP-A"}
+    assert rows[0]["lc_requirement_name"] == "EXP-A requirement 1"
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+
+def test_export_documents_csv_in_small_chunks(client, db_session, monkeypatch):
+    seed_lc(db_session, "EXP-C", num_requirements=1, num_docs=25)
+    monkeypatch.setattr(exports, "EXPORT_CHUNK_SIZE", 128)
+
+    response = client.get("/export/export-documents?format=csv&from=2000-01-01T00:00:00")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 25
+    assert rows[0]["document_id"] == "EXP-C_export_doc_001"
+    assert "full_description" in rows[0]
+
+
+def test_export_date_range_and_unknown_lc(client, db_session):
+    seed_lc(db_session, "EXP-D", num_requirements=1, num_docs=2)
+
+    response = client.get("/export/classifications?to=2000-01-01T00:00:00")
+    assert response.status_code == 200
+    assert response.text == ""
+
+    assert client.get("/export/classifications?lc_id=9999").status_code == 404
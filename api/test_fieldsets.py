@@ -0,0 +1,63 @@
+"""
+Tests for sparse fieldsets: heavy columns stay out of both the SQL and the payload unless requested
+"""
+
+from conftest import seed_lc
+from models import ExportDocument as ExportDocModel
+
+
+def seed_heavy_documents(db, lc_reference="FS-A"):
+    lc_id = seed_lc(db, lc_reference, num_requirements=2, num_docs=10)
+    for doc in db.query(ExportDocModel).filter(ExportDocModel.lc_id == lc_id):
+        doc.full_description = "Every detail of the document. " * 2000
+    db.commit()
+    return lc_id
+
+
+def test_list_defaults_omit_heavy_columns(client, db_session, query_counter):
+    seed_heavy_documents(db_session)
+
+    query_counter.clear()
+    sparse = client.get("/export-documents/")
+    assert sparse.status_code == 200
+    assert all("full_description" not in doc for doc in sparse.json())
+    assert not any("full_description" in statement for statement in query_counter)
+
+    full = client.get("/export-documents/?fields=*")
+    assert all(doc["full_description"] for doc in full.json())
+    assert len(full.content) > 10 * len(sparse.content)
+
+
+def test_fields_parameter_selects_columns(client, db_session):
+    lc_id = seed_heavy_documents(db_session)
+
+    docs = client.get(f"/export-documents/?lc_id={lc_id}&fields=document_id,filename&limit=3")
+    assert docs.status_code == 200
+    assert docs.headers.get("x-next-cursor")
+    assert set(docs.json()[0]) == {"id", "document_id", "filename"}
+
+    lc = client.get(f"/lcs/{lc_id}?fields=lc_reference,document_requirements").json()
+    assert set(lc) == {"id", "lc_reference", "document_requirements"}
+    assert len(lc["document_requirements"]) == 2
+
+    assert client.get("/lcs/?fields=lc_reference,bogus").status_code == 400
+
+
+def test_detail_endpoints_return_everything_by_default(client, db_session):
+    seed_heavy_documents(db_session)
+    doc_id = db_session.query(ExportDocModel.id).first()[0]
+
+    doc = client.get(f"/export-documents/{doc_id}").json()
+    assert doc["full_description"].startswith("Every detail")
+
+
+def test_classification_runs_include_classifications_on_request(client, db_session):
+    seed_heavy_documents(db_session)
+
+    runs = client.get("/classification-runs/").json()
+    assert "classifications" not in runs[0]
+
+    runs = client.get("/classification-runs/?fields=status,classifications").json()
+    classification = runs[0]["classifications"][0]
+    assert set(runs[0]) == {"id", "status", "classifications"}
+    assert "full_description" not in classification["export_document"]
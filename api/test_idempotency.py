@@ -0,0 +1,208 @@
+"""
+Tests for Idempotency-Key handling and coalescing of duplicate LC uploads and classification runs
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+import blob_store
+import classifier_runner
+import idempotency
+import main
+from blob_store import BlobStore
+from conftest import seed_lc
+from models import ClassificationRun as ClassificationRunModel, IdempotencyKey as IdempotencyKeyModel
+
+PDF = b"%PDF-1.4 letter of credit"
+
+
+class FakeLCExtractor:
+    def __init__(self, release=None):
+        self.calls = 0
+        self.release = release
+        self.fail = False
+
+    def extract(self, file_path, schema, filename=None, output_path=None):
+        self.calls += 1
+        if self.release:
+            self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("extraction failed")
+        with open(file_path, "rb") as f:
+            reference = f.read().decode().split()[-1].upper()
+        return {"LC_REFERENCE": reference, "DOCUMENTS_REQUIRED": [{"document_id": "doc_001", "name": "Invoice"}]}
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    test_store = BlobStore(tmp_path / "blobs")
+    monkeypatch.setattr(blob_store, "blob_store", test_store)
+    monkeypatch.setattr(main, "blob_store", test_store)
+    return test_store
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    fake = FakeLCExtractor()
+    monkeypatch.setattr(main, "get_extractor", lambda: fake)
+    return fake
+
+
+def upload(client, content=PDF, key=None):
+    headers = {idempotency.IDEMPOTENCY_KEY_HEADER: key} if key else {}
+    return client.post("/lcs/upload", files={"file": ("lc.pdf", content, "application/pdf")}, headers=headers)
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    group = idempotency.SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    async def run():
+        first = asyncio.ensure_future(group.do("k", work, 21))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(group.do("k", work, 99))
+        await asyncio.sleep(0.05)
+        assert group.in_flight("k")
+        release.set()
+        return await asyncio.gather(first, second)
+
+    assert asyncio.run(run()) == [(42, False), (42, True)]
+    assert calls == [21]
+    assert len(group) == 0
+
+
+def test_retry_with_key_replays_the_first_lc(client, db_session, store, extractor):
+    first = upload(client, key="upload-1")
+    assert first.status_code == 200
+    assert idempotency.REPLAYED_HEADER not in first.headers
+
+    retry = upload(client, key="upload-1")
+    assert retry.status_code == 200
+    assert retry.json()["id"] == first.json()["id"]
+    assert retry.headers[idempotency.REPLAYED_HEADER] == "true"
+    assert extractor.calls == 1
+
+    record = db_session.get(IdempotencyKeyModel, "upload-1")
+    assert (record.scope, record.status, record.resource_id) == ("lc_upload", "completed", first.json()["id"])
+
+    # The same key for another file is a client bug, not a retry
+    assert upload(client, content=b"%PDF-1.4 other", key="upload-1").status_code == 422
+
+
+def test_reuploading_an_extracted_pdf_returns_its_lc_without_extracting(client, store, extractor):
+    first = upload(client)
+    second = upload(client)
+    assert second.status_code == 200
+    assert second.json()["id"] == first.json()["id"]
+    assert second.headers[idempotency.REPLAYED_HEADER] == "true"
+    assert extractor.calls == 1
+
+
+def test_failed_request_gives_its_key_up(client, db_session, store, extractor):
+    extractor.fail = True
+    assert upload(client, key="upload-2").status_code == 500
+    assert db_session.get(IdempotencyKeyModel, "upload-2") is None
+
+    extractor.fail = False
+    assert upload(client, key="upload-2").status_code == 200
+    assert extractor.calls == 2
+
+
+def test_key_held_by_another_worker_is_busy_until_it_goes_stale(client, db_session, store, extractor):
+    sha256 = store.put_bytes(PDF)[0]
+    db_session.add(IdempotencyKeyModel(
+        key="upload-3", scope="lc_upload", request_hash=idempotency.request_hash(sha256), status="in_progress",
+        created_at=datetime.utcnow(), expires_at=datetime.utcnow() + timedelta(days=1)
+    ))
+    db_session.commit()
+
+    busy = upload(client, key="upload-3")
+    assert busy.status_code == 409
+    assert busy.headers["Retry-After"] == str(idempotency.IN_PROGRESS_RETRY_AFTER_SECONDS)
+    assert extractor.calls == 0
+
+    db_session.query(IdempotencyKeyModel).update({"created_at": datetime.utcnow() - timedelta(hours=1)})
+    db_session.commit()
+    assert upload(client, key="upload-3").status_code == 200
+    assert extractor.calls == 1
+
+
+def test_concurrent_uploads_of_one_pdf_share_an_extraction(client, store, monkeypatch):
+    release = threading.Event()
+    fake = FakeLCExtractor(release)
+    monkeypatch.setattr(main, "get_extractor", lambda: fake)
+
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(upload(client))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while not main.lc_upload_flights.in_flight(store.put_bytes(PDF)[0]):
+        threading.Event().wait(0.01)
+    threading.Event().wait(0.2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert len({response.json()["id"] for response in responses}) == 1
+    assert fake.calls == 1
+
+
+def test_duplicate_classify_returns_the_run_in_progress(client, db_session, monkeypatch):
+    lc_id = seed_lc(db_session, "IDEM-A", num_requirements=1, num_docs=2)
+    release = threading.Event()
+    monkeypatch.setattr(classifier_runner, "_classify", lambda *args: release.wait(5) and args[-1]())
+    monkeypatch.setattr(classifier_runner, "_finish_run", lambda *args, **kwargs: None)
+
+    try:
+        first = client.post(f"/classify/{lc_id}", headers={idempotency.IDEMPOTENCY_KEY_HEADER: "classify-1"})
+        assert first.status_code == 200
+        run_id = first.json()["id"]
+
+        duplicate = client.post(f"/classify/{lc_id}")
+        assert duplicate.json()["id"] == run_id
+        assert duplicate.headers[idempotency.REPLAYED_HEADER] == "true"
+    finally:
+        release.set()
+
+    for _ in range(500):
+        if classifier_runner.find_active_run(lc_id) is None:
+            break
+        threading.Event().wait(0.01)
+
+    # Once the run has finished a retry with the key still gets it, without the key a new run starts
+    retry = client.post(f"/classify/{lc_id}", headers={idempotency.IDEMPOTENCY_KEY_HEADER: "classify-1"})
+    assert retry.json()["id"] == run_id
+    assert db_session.query(ClassificationRunModel).filter(ClassificationRunModel.lc_id == lc_id).count() == 2
+
+
+def test_sync_session_queries_stay_off_the_event_loop(client, engine, db_session, store, extractor):
+    on_event_loop = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(statement)
+        except RuntimeError:
+            pass
+
+    lc_id = seed_lc(db_session, "IDEM-LOOP", num_requirements=1, num_docs=0)
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        assert upload(client, key="loop-upload").status_code == 200
+        assert client.post(f"/classify/{lc_id}", headers={idempotency.IDEMPOTENCY_KEY_HEADER: "loop-classify"}).status_code == 200
+        assert client.get("/export/classifications", params={"lc_id": lc_id}).status_code == 200
+        client.get("/ready")
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    assert on_event_loop == []
@@ -0,0 +1,54 @@
+"""
+Tests for POST /lcs/batch
+"""
+
+from datetime import datetime
+
+import pytest
+
+import lc_batch
+from conftest import seed_lc
+from models import ClassificationRun as ClassificationRunModel
+
+
+def count_batch_queries(client, query_counter, body: dict) -> int:
+    query_counter.clear()
+    response = client.post("/lcs/batch", json=body)
+    assert response.status_code == 200
+    return len(query_counter)
+
+
+def test_batch_matches_the_per_lc_endpoints(client, db_session):
+    first = seed_lc(db_session, "BATCH-A", num_requirements=3, num_docs=4)
+    second = seed_lc(db_session, "BATCH-B", num_requirements=2, num_docs=0)
+    no_runs = seed_lc(db_session, "BATCH-C", num_requirements=1, num_docs=1)
+    db_session.query(ClassificationRunModel).filter(ClassificationRunModel.lc_id == no_runs).delete()
+    # An older run must not be picked over the latest one
+    db_session.add(ClassificationRunModel(lc_id=first, total_export_docs=0, total_lc_requirements=0,
+                                          status="completed", run_timestamp=datetime(2000, 1, 1)))
+    db_session.commit()
+
+    response = client.post("/lcs/batch", json={"ids": [second, 999999], "references": ["BATCH-A", "BATCH-C", "NOPE"]})
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["not_found"] == {"ids": [999999], "references": ["NOPE"]}
+    assert [item["lc"]["id"] for item in body["lcs"]] == sorted([first, second, no_runs])
+    for item in body["lcs"]:
+        lc_id = item["lc"]["id"]
+        assert item["lc"] == client.get(f"/lcs/{lc_id}").json()
+        assert item["requirements_with_matches"] == client.get(f"/lcs/{lc_id}/requirements-with-matches").json()
+        assert item["classification_summary"] == client.get(f"/classification-summary/{lc_id}").json()
+
+
+def test_batch_query_count_does_not_grow_with_the_batch(client, db_session, query_counter):
+    small = [seed_lc(db_session, f"BATCH-S{n}", num_requirements=2, num_docs=2) for n in range(2)]
+    large = small + [seed_lc(db_session, f"BATCH-L{n}", num_requirements=10, num_docs=20) for n in range(20)]
+
+    assert count_batch_queries(client, query_counter, {"ids": small}) == \
+        count_batch_queries(client, query_counter, {"ids": large}) == 5
+
+
+@pytest.mark.parametrize("body", [{}, {"ids": list(range(lc_batch.MAX_BATCH_SIZE + 1))}])
+def test_batch_size_is_bounded(client, body):
+    assert client.post("/lcs/batch", json=body).status_code == 400
@@ -0,0 +1,101 @@
+"""
+Tests for the Prometheus metrics endpoint and instrumentation hooks
+"""
+
+import uuid
+
+import pytest
+from langchain_core.outputs import LLMResult
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+import metrics
+import serve
+from conftest import seed_lc
+from main import create_extractor
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_metrics_endpoint_reports_route_templates(client, db_session):
+    lc_id = seed_lc(db_session, "MET-A", num_requirements=1, num_docs=1)
+    before = sample("lc_http_request_duration_seconds_count", method="GET", route="/lcs/{lc_id}", status="200")
+
+    client.get(f"/lcs/{lc_id}")
+    client.get("/no-such-route")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/lcs/{lc_id}"' in response.text
+    assert 'route="unmatched"' in response.text
+    assert "lc_db_pool_checked_out" in response.text
+    assert sample("lc_http_request_duration_seconds_count",
+                  method="GET", route="/lcs/{lc_id}", status="200") == before + 1
+
+
+def test_llm_handler_counts_calls_tokens_and_errors():
+    handler = metrics.LLMMetricsHandler()
+    calls = sample("lc_llm_calls_total", model="test-model")
+    tokens = sample("lc_llm_tokens_total", model="test-model", kind="prompt")
+
+    run_id = uuid.uuid4()
+    handler.on_chat_model_start({}, [], run_id=run_id, invocation_params={"model": "test-model"})
+    handler.on_llm_end(LLMResult(generations=[], llm_output={
+        "token_usage": {"prompt_tokens": 120, "completion_tokens": 30}
+    }), run_id=run_id)
+
+    failed_run = uuid.uuid4()
+    handler.on_chat_model_start({}, [], run_id=failed_run, invocation_params={"model": "test-model"})
+    handler.on_llm_error(RuntimeError("boom"), run_id=failed_run)
+
+    assert sample("lc_llm_calls_total", model="test-model") == calls + 2
+    assert sample("lc_llm_tokens_total", model="test-model", kind="prompt") == tokens + 120
+    assert sample("lc_llm_errors_total", model="test-model") >= 1
+
+
+def test_extractor_reports_parse_stage(monkeypatch):
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+    before = sample("lc_extraction_stage_duration_seconds_count", stage="parse")
+
+    with pytest.raises(Exception):
+        create_extractor().extract_bytes(b"not a pdf")
+
+    assert sample("lc_extraction_stage_duration_seconds_count", stage="parse") == before + 1
+
+
+def test_pool_wait_is_timed_after_the_pool_is_recreated(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}")
+    metrics.instrument_engine(engine, role="pool-test")
+    try:
+        for _ in range(2):
+            before = sample("lc_db_pool_wait_seconds_count")
+            with engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            assert sample("lc_db_pool_wait_seconds_count") == before + 1
+            engine.dispose()
+    finally:
+        metrics._pool_collectors[0].engines.remove(("pool-test", engine))
+
+
+def test_supervisor_drops_live_gauges_of_exited_workers(tmp_path, monkeypatch):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    for pid in (101, 102):
+        (tmp_path / f"gauge_livesum_{pid}.db").touch()
+        (tmp_path / f"counter_{pid}.db").touch()
+
+    class Process:
+        def __init__(self, pid, alive):
+            self.pid, self.alive, self.exitcode = pid, alive, None if alive else 1
+
+        def is_alive(self):
+            return self.alive
+
+    supervisor = serve.WorkerSupervisor.__new__(serve.WorkerSupervisor)
+    supervisor.processes = [Process(101, alive=False), Process(102, alive=True)]
+    supervisor.reap_workers()
+
+    assert [process.pid for process in supervisor.processes] == [102]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["counter_101.db", "counter_102.db", "gauge_livesum_102.db"]
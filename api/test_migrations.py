@@ -0,0 +1,109 @@
+"""
+Tests for the Alembic migrations and the indexes the hot-path queries rely on
+"""
+
+import os
+from datetime import date
+
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import Session
+
+from conftest import seed_lc
+from database import run_migrations
+from models import (
+    Base,
+    ClassificationRun as ClassificationRunModel,
+    DocumentClassification as ClassificationModel,
+    ExportDocument as ExportDocModel,
+    LCDocumentRequirement as LCRequirementModel,
+    LetterOfCredit as LCModel
+)
+
+
+@pytest.fixture
+def migrated_engine(tmp_path):
+    migrated = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    with migrated.connect() as connection:
+        run_migrations(connection=connection)
+    yield migrated
+    migrated.dispose()
+
+
+def head_revision() -> str:
+    here = os.path.dirname(os.path.abspath(__file__))
+    config = Config(os.path.join(here, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(here, "migrations"))
+    return ScriptDirectory.from_config(config).get_current_head()
+
+
+def test_migrations_match_models(migrated_engine):
+    with migrated_engine.connect() as connection:
+        diffs = compare_metadata(MigrationContext.configure(connection), Base.metadata)
+    assert diffs == []
+
+
+def test_upgrade_is_safe_on_databases_created_with_create_all(tmp_path):
+    existing = create_engine(f"sqlite:///{tmp_path / 'existing.db'}")
+    Base.metadata.create_all(existing)
+    with existing.connect() as connection:
+        run_migrations(connection=connection)
+    with existing.connect() as connection:
+        assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() == head_revision()
+    existing.dispose()
+
+
+def query_plan(connection, statement) -> str:
+    sql = str(statement.compile(dialect=connection.dialect, compile_kwargs={"literal_binds": True}))
+    return "\n".join(row[-1] for row in connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+
+
+@pytest.mark.parametrize("statement, index", [
+    (
+        select(ClassificationModel.lc_requirement_id).where(
+            ClassificationModel.classification_run_id == 1, ClassificationModel.is_matched == True
+        ),
+        "ix_document_classifications_run_matched_requirement"
+    ),
+    (
+        select(ClassificationModel.export_document_id).where(ClassificationModel.classification_run_id == 1),
+        "ix_document_classifications_run_matched_requirement"
+    ),
+    (
+        select(LCRequirementModel).where(LCRequirementModel.lc_id == 1).order_by(LCRequirementModel.id),
+        "ix_lc_document_requirements_lc_id_id"
+    ),
+    (
+        select(ClassificationRunModel).where(ClassificationRunModel.lc_id == 1)
+        .order_by(ClassificationRunModel.run_timestamp.desc()).limit(1),
+        "ix_classification_runs_lc_id_run_timestamp_id"
+    ),
+    (
+        select(ExportDocModel.id).where(ExportDocModel.lc_id == 1).order_by(ExportDocModel.id),
+        "ix_export_documents_lc_id_id"
+    ),
+    (
+        select(LCModel.id).where(LCModel.expires_on >= date(2026, 1, 1), LCModel.expires_on <= date(2026, 1, 8))
+        .order_by(LCModel.expires_on, LCModel.id),
+        "ix_letter_of_credits_expires_on"
+    ),
+    (
+        select(LCModel.id).where(
+            LCModel.credit_currency == "USD", LCModel.expires_on >= date(2026, 1, 1), LCModel.expires_on <= date(2026, 1, 8)
+        ).order_by(LCModel.expires_on, LCModel.id),
+        "ix_letter_of_credits_currency_expires_on"
+    ),
+])
+def test_hot_path_queries_use_indexes(migrated_engine, statement, index):
+    with Session(migrated_engine) as session:
+        for n in range(3):
+            seed_lc(session, f"PLAN-{n}", num_requirements=5, num_docs=5)
+    with migrated_engine.connect() as connection:
+        connection.execute(text("ANALYZE"))
+        plan = query_plan(connection, statement)
+    assert index in plan, plan
+    assert "USE TEMP B-TREE" not in plan, plan
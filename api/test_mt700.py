@@ -0,0 +1,126 @@
+"""
+Tests for parsing the MT700 strings into typed columns and the portfolio endpoints built on them
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+import mt700
+from models import LetterOfCredit as LCModel
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("USD125000,00", (Decimal("125000.00"), "USD")),
+    ("125,000.00 EUR", (Decimal("125000.00"), "EUR")),
+    ("EUR 1.250.000,00", (Decimal("1250000.00"), "EUR")),
+    ("GBP 50 000", (Decimal("50000"), "GBP")),
+    ("US$ 1,500", (Decimal("1500"), "USD")),
+    ("CURRENCY: JPY AMOUNT: 3000000", (Decimal("3000000"), "JPY")),
+    ("AMOUNT TO BE ADVISED", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_amount(text, expected):
+    assert mt700.parse_amount(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("10/05", (Decimal("10"), Decimal("5"))),
+    ("+/- 5%", (Decimal("5"), Decimal("5"))),
+    ("5 PCT MORE OR LESS", (Decimal("5"), Decimal("5"))),
+    ("PLUS 10 MINUS 0", (Decimal("10"), Decimal("0"))),
+    ("NOT APPLICABLE", (None, None)),
+])
+def test_parse_tolerance(text, expected):
+    assert mt700.parse_tolerance(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("251231LONDON", (date(2025, 12, 31), "LONDON")),
+    ("20251231 IN SINGAPORE", (date(2025, 12, 31), "SINGAPORE")),
+    ("31 December 2025 in London", (date(2025, 12, 31), "London")),
+    ("Expiry: 2025-03-15, Hamburg", (date(2025, 3, 15), "Hamburg")),
+    ("15/03/2025 AT THE COUNTERS OF THE ADVISING BANK", (date(2025, 3, 15), "THE COUNTERS OF THE ADVISING BANK")),
+    ("March 15, 2025", (date(2025, 3, 15), None)),
+    ("ON OR ABOUT SHIPMENT", (None, None)),
+])
+def test_parse_expiry(text, expected):
+    assert mt700.parse_expiry(text) == expected
+
+
+def test_typed_columns():
+    columns = mt700.typed_columns({
+        "credit_amount": "USD100000,00",
+        "percent_tolerance": "10/10",
+        "date_of_issue": "250115",
+        "expiry_date_and_place": "250630NEW YORK",
+        "latest_shipment_date": "15-MAY-25"
+    })
+    assert set(columns) == set(mt700.TYPED_COLUMNS)
+    assert columns["credit_amount_value"] == Decimal("100000.00")
+    assert columns["credit_currency"] == "USD"
+    assert columns["max_credit_amount_value"] is None
+    assert columns["issued_on"] == date(2025, 1, 15)
+    assert (columns["expires_on"], columns["expiry_place"]) == (date(2025, 6, 30), "NEW YORK")
+    assert columns["latest_shipment_on"] == date(2025, 5, 15)
+
+
+def test_backfill_derives_columns_of_existing_lcs(db_session):
+    db_session.add_all([
+        LCModel(lc_reference="BACKFILL-1", credit_amount="EUR5000,00", expiry_date_and_place="261231PARIS"),
+        LCModel(lc_reference="BACKFILL-2", credit_amount="TO BE ADVISED")
+    ])
+    db_session.commit()
+
+    assert mt700.backfill(db_session, batch_size=1) >= 2
+    db_session.expire_all()
+    parsed = db_session.query(LCModel).filter(LCModel.lc_reference == "BACKFILL-1").one()
+    assert (parsed.credit_amount_value, parsed.credit_currency) == (Decimal("5000.00"), "EUR")
+    assert (parsed.expires_on, parsed.expiry_place) == (date(2026, 12, 31), "PARIS")
+    unparsed = db_session.query(LCModel).filter(LCModel.lc_reference == "BACKFILL-2").one()
+    assert unparsed.credit_amount_value is None and unparsed.credit_amount == "TO BE ADVISED"
+
+
+def swift_date(day: date) -> str:
+    return day.strftime("%y%m%d")
+
+
+def test_portfolio_endpoints(client):
+    today = date.today()
+    for reference, amount, tolerance, max_amount, expires in [
+        ("PF-USD-1", "USD100000,00", "10/10", None, today + timedelta(days=3)),
+        ("PF-USD-2", "USD50000,00", None, "USD52000,00", today + timedelta(days=30)),
+        ("PF-EUR-1", "EUR20000,00", None, None, today + timedelta(days=1)),
+        ("PF-EXPIRED", "USD999,00", None, None, today - timedelta(days=1)),
+    ]:
+        created = client.post("/lcs/", json={
+            "lc_reference": reference, "credit_amount": amount, "percent_tolerance": tolerance,
+            "max_credit_amount": max_amount, "expiry_date_and_place": f"{swift_date(expires)}LONDON"
+        })
+        assert created.status_code == 200
+    assert created.json()["expires_on"] == (today - timedelta(days=1)).isoformat()
+    assert created.json()["credit_amount_value"] == 999
+    client.post("/lcs/", json={"lc_reference": "PF-UNPARSED", "credit_amount": "TO BE ADVISED"})
+
+    exposure = client.get("/portfolio/exposure").json()
+    assert exposure["as_of"] == today.isoformat()
+    assert exposure["unparsed_lcs"] >= 1
+    currencies = {row["currency"]: row for row in exposure["currencies"]}
+    assert currencies["USD"] == {"currency": "USD", "lc_count": 2, "credit_amount": 150000, "max_exposure": 162000}
+    assert currencies["EUR"]["max_exposure"] == 20000
+
+    expiring = client.get("/portfolio/expiring").json()
+    assert [lc["lc_reference"] for lc in expiring["lcs"]] == ["PF-EUR-1", "PF-USD-1"]
+    assert {row["currency"]: row["lc_count"] for row in expiring["totals"]} == {"EUR": 1, "USD": 1}
+
+    usd = client.get("/portfolio/expiring", params={"currency": "usd", "date_to": (today + timedelta(days=60)).isoformat()})
+    assert [lc["lc_reference"] for lc in usd.json()["lcs"]] == ["PF-USD-1", "PF-USD-2"]
+
+    # Updating the 31D text re-derives the typed columns
+    lc_id = client.get("/lcs/reference/PF-EUR-1").json()["id"]
+    client.put(f"/lcs/{lc_id}", json={
+        "lc_reference": "PF-EUR-1", "expiry_date_and_place": f"{swift_date(today + timedelta(days=90))} PARIS"
+    })
+    assert "PF-EUR-1" not in [lc["lc_reference"] for lc in client.get("/portfolio/expiring").json()["lcs"]]
+    assert client.get("/portfolio/expiring", params={"date_from": today.isoformat(), "date_to": "2000-01-01"}).status_code == 400
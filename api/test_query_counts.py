@@ -0,0 +1,62 @@
+"""
+Query-count regression tests for the dashboard endpoints
+The number of SQL statements must not grow with the number of requirements or documents
+"""
+
+from conftest import seed_lc
+
+
+def count_queries(client, query_counter, url: str) -> int:
+    query_counter.clear()
+    response = client.get(url)
+    assert response.status_code == 200
+    return len(query_counter)
+
+
+def test_requirements_with_matches_query_count_is_constant(client, db_session, query_counter):
+    small_lc = seed_lc(db_session, "LC-SMALL", num_requirements=2, num_docs=2)
+    large_lc = seed_lc(db_session, "LC-LARGE", num_requirements=20, num_docs=40)
+
+    small = count_queries(client, query_counter, f"/lcs/{small_lc}/requirements-with-matches")
+    large = count_queries(client, query_counter, f"/lcs/{large_lc}/requirements-with-matches")
+
+    assert small == large
+    assert large <= 4
+
+    data = client.get(f"/lcs/{large_lc}/requirements-with-matches").json()
+    assert data["total_requirements"] == 20
+    assert data["total_matches"] == 20
+    assert all(req["match_count"] == 1 for req in data["requirements"])
+
+
+def test_classification_summary_query_count_is_constant(client, db_session, query_counter):
+    small_lc = seed_lc(db_session, "LC-SMALL", num_requirements=2, num_docs=2)
+    large_lc = seed_lc(db_session, "LC-LARGE", num_requirements=20, num_docs=40)
+
+    small = count_queries(client, query_counter, f"/classification-summary/{small_lc}")
+    large = count_queries(client, query_counter, f"/classification-summary/{large_lc}")
+
+    assert small == large
+    assert large <= 4
+
+
+def test_classification_summary_is_scoped_to_lc(client, db_session):
+    lc_id = seed_lc(db_session, "LC-A", num_requirements=3, num_docs=4)
+    seed_lc(db_session, "LC-B", num_requirements=3, num_docs=4)
+
+    summary = client.get(f"/classification-summary/{lc_id}").json()
+
+    assert summary["unmatched_requirements"] == ["LC-A requirement 3"]
+    assert summary["unmatched_export_docs"] == ["LC-A document 2", "LC-A document 4"]
+
+
+def test_classification_summary_sees_new_export_documents(client, db_session):
+    lc_id = seed_lc(db_session, "LC-NEW-DOC", num_requirements=1, num_docs=2)
+    assert client.get(f"/classification-summary/{lc_id}").json()["unmatched_export_docs"] == ["LC-NEW-DOC document 2"]
+
+    created = client.post("/export-documents/", json={
+        "lc_id": lc_id, "document_id": "LC-NEW-DOC_export_doc_003", "filename": "doc_3.pdf", "document_name": "Late document"
+    })
+    assert created.status_code == 200
+    summary = client.get(f"/classification-summary/{lc_id}").json()
+    assert summary["unmatched_export_docs"] == ["LC-NEW-DOC document 2", "Late document"]
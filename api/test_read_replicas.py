@@ -0,0 +1,184 @@
+"""
+Tests for read-replica routing, with two SQLite databases standing in for the primary and a replica
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+from starlette.requests import Request
+
+import database
+import main
+from database import PRIMARY_UNTIL_COOKIE, RoutingSession, get_db, get_read_db, replica_reads, stick_to_primary
+from models import Base, LetterOfCredit as LCModel
+from response_cache import response_cache
+
+
+def make_engine(reference: str, url: str = "sqlite://"):
+    test_engine = create_engine(url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=test_engine)
+    with Session(bind=test_engine) as session:
+        session.add(LCModel(lc_reference=reference))
+        session.commit()
+    return test_engine
+
+
+@pytest.fixture
+def primary():
+    test_engine = make_engine("ON-PRIMARY")
+    yield test_engine
+    test_engine.dispose()
+
+
+@pytest.fixture
+def replica():
+    test_engine = make_engine("ON-REPLICA")
+    yield test_engine
+    test_engine.dispose()
+
+
+@pytest.fixture
+def make_session(primary, replica):
+    return sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=primary, replicas=[replica])
+
+
+def references(session) -> set:
+    return set(session.execute(select(LCModel.lc_reference)).scalars())
+
+
+def test_reads_go_to_the_replica_only_when_asked(make_session):
+    with make_session() as session:
+        assert references(session) == {"ON-PRIMARY"}
+        with replica_reads(session):
+            assert references(session) == {"ON-REPLICA"}
+            # Locking reads and raw SQL stay on the primary
+            locked = session.execute(select(LCModel.lc_reference).with_for_update()).scalars().all()
+            assert locked == ["ON-PRIMARY"]
+            assert session.execute(text("SELECT lc_reference FROM letter_of_credits")).scalars().all() == ["ON-PRIMARY"]
+
+
+def test_reads_after_a_write_go_to_the_primary(make_session):
+    with make_session() as session:
+        session.info["use_replica"] = True
+        assert references(session) == {"ON-REPLICA"}
+
+        session.add(LCModel(lc_reference="NEW"))
+        session.commit()
+        assert references(session) == {"ON-PRIMARY", "NEW"}
+
+
+def test_primary_until_keeps_reads_on_the_primary(make_session):
+    with make_session() as session:
+        session.info["use_replica"] = True
+        stick_to_primary(session, time.time() + 60)
+        assert references(session) == {"ON-PRIMARY"}
+
+    with make_session() as session:
+        session.info["use_replica"] = True
+        stick_to_primary(session, time.time() - 1)
+        assert references(session) == {"ON-REPLICA"}
+
+
+def test_pool_options_per_engine(monkeypatch):
+    monkeypatch.setenv("DB_REPLICA_POOL_SIZE", "20")
+    monkeypatch.setenv("DB_REPLICA_MAX_OVERFLOW", "5")
+    monkeypatch.setenv("DB_REPLICA_POOL_RECYCLE", "600")
+    monkeypatch.delenv("DB_REPLICA_POOL_TIMEOUT", raising=False)
+
+    assert database.pool_options("DB_REPLICA") == {
+        "pool_pre_ping": True, "pool_recycle": 600, "pool_size": 20, "max_overflow": 5
+    }
+
+
+def test_get_requests_read_the_replica_until_the_client_writes(make_session, replica, monkeypatch):
+    monkeypatch.setattr(database, "SessionLocal", make_session)
+    monkeypatch.setattr(database, "replica_engines", [replica])
+
+    app = FastAPI()
+
+    @app.get("/references")
+    def list_references(db: Session = Depends(get_db)):
+        return sorted(references(db))
+
+    @app.post("/references/{reference}")
+    def add_reference(reference: str, db: Session = Depends(get_db)):
+        db.add(LCModel(lc_reference=reference))
+        db.commit()
+        return sorted(references(db))
+
+    client = TestClient(app)
+    assert client.get("/references").json() == ["ON-REPLICA"]
+
+    written = client.post("/references/NEW")
+    assert written.json() == ["NEW", "ON-PRIMARY"]
+    assert PRIMARY_UNTIL_COOKIE in written.cookies
+
+    # The client's next read sees its write although the replica has not caught up
+    assert client.get("/references").json() == ["NEW", "ON-PRIMARY"]
+
+    client.cookies.clear()
+    assert client.get("/references").json() == ["ON-REPLICA"]
+
+
+def test_read_bind_follows_the_routing_rules(make_session, primary, replica):
+    with make_session() as session:
+        assert session.read_bind() is primary
+        with replica_reads(session):
+            assert session.read_bind() is replica
+            stick_to_primary(session, time.time() + 60)
+            assert session.read_bind() is primary
+
+
+def test_read_only_post_reads_the_replica_until_the_client_writes(make_session, replica, monkeypatch):
+    monkeypatch.setattr(database, "SessionLocal", make_session)
+    monkeypatch.setattr(database, "replica_engines", [replica])
+
+    app = FastAPI()
+
+    @app.post("/batch")
+    def batch(db: Session = Depends(get_read_db)):
+        # Streams open their own session on the bind the request would read from
+        with Session(bind=db.read_bind()) as stream_session:
+            return sorted(references(stream_session))
+
+    client = TestClient(app)
+    assert client.post("/batch").json() == ["ON-REPLICA"]
+    client.cookies.set(PRIMARY_UNTIL_COOKIE, str(time.time() + 60))
+    assert client.post("/batch").json() == ["ON-PRIMARY"]
+
+
+def test_cached_responses_are_built_from_the_primary(tmp_path):
+    sync_engines, async_engines = [], []
+    for name in ("ON-PRIMARY", "ON-REPLICA"):
+        path = tmp_path / f"{name}.db"
+        sync_engines.append(make_engine(name, f"sqlite:///{path}"))
+        async_engines.append(create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool))
+    make_async_session = async_sessionmaker(
+        async_engines[0], class_=AsyncSession, sync_session_class=RoutingSession,
+        replicas=[async_engines[1].sync_engine]
+    )
+    request = Request({"type": "http", "method": "GET", "path": "/cached", "query_string": b"", "headers": []})
+
+    async def run():
+        async with make_async_session() as db:
+            db.sync_session.info["use_replica"] = True
+            build = lambda: db.run_sync(lambda session: sorted(references(session)))
+            response = await main.respond_cached(request, db, 1, build)
+            # Other reads of the request still go to the replica
+            return response.body, await build()
+
+    response_cache.clear()
+    try:
+        assert asyncio.run(run()) == (b'["ON-PRIMARY"]', ["ON-REPLICA"])
+    finally:
+        response_cache.clear()
+        for sync_engine, async_engine in zip(sync_engines, async_engines):
+            sync_engine.dispose()
+            asyncio.run(async_engine.dispose())
@@ -0,0 +1,138 @@
+"""
+Tests for archiving old classification history and restoring it
+"""
+
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+import retention
+import serve
+from conftest import seed_lc
+from models import (
+    ClassificationRun as ClassificationRunModel,
+    DocumentClassification as ClassificationModel
+)
+
+
+def age_run(db, run_id: int, moment: datetime):
+    db.execute(update(ClassificationRunModel).where(ClassificationRunModel.id == run_id).values(run_timestamp=moment))
+    db.execute(update(ClassificationModel).where(ClassificationModel.classification_run_id == run_id)
+               .values(classification_timestamp=moment))
+    db.commit()
+
+
+def runs_of(db, lc_id: int):
+    return db.query(ClassificationRunModel).filter(ClassificationRunModel.lc_id == lc_id).order_by(ClassificationRunModel.id).all()
+
+
+def add_run(db, lc_id: int) -> int:
+    """Copy an LC's first run, so the copy becomes its latest run"""
+    first = runs_of(db, lc_id)[0]
+    run = ClassificationRunModel(lc_id=lc_id, total_export_docs=first.total_export_docs,
+                                 total_lc_requirements=first.total_lc_requirements, status="completed")
+    db.add(run)
+    db.flush()
+    for classification in db.query(ClassificationModel).filter(ClassificationModel.classification_run_id == first.id):
+        db.add(ClassificationModel(
+            export_document_id=classification.export_document_id,
+            lc_requirement_id=classification.lc_requirement_id,
+            classification_run_id=run.id,
+            confidence_score=classification.confidence_score,
+            is_matched=classification.is_matched
+        ))
+    db.commit()
+    return run.id
+
+
+def test_archive_keeps_latest_runs_and_restore_brings_history_back(engine, db_session, tmp_path):
+    old_month = datetime(2024, 1, 15)
+    history_lc = seed_lc(db_session, "RET-A", num_requirements=2, num_docs=4)
+    old_run = runs_of(db_session, history_lc)[0].id
+    latest_run = add_run(db_session, history_lc)
+    age_run(db_session, old_run, old_month)
+
+    # An LC whose only run is old keeps it: it is still that LC's latest run
+    stale_lc = seed_lc(db_session, "RET-B", num_requirements=1, num_docs=2)
+    stale_run = runs_of(db_session, stale_lc)[0].id
+    age_run(db_session, stale_run, old_month)
+
+    archived_rows = db_session.query(ClassificationModel).filter(ClassificationModel.classification_run_id == old_run).count()
+    results = retention.archive_older_than(engine, datetime.utcnow() - timedelta(days=30), str(tmp_path))
+
+    assert [result["month"] for result in results] == ["2024-01"]
+    assert results[0]["document_classifications"] == archived_rows
+    assert results[0]["classification_runs"] == 1
+    db_session.expire_all()
+    assert [run.id for run in runs_of(db_session, history_lc)] == [latest_run]
+    assert [run.id for run in runs_of(db_session, stale_lc)] == [stale_run]
+    assert db_session.query(ClassificationModel).filter(ClassificationModel.classification_run_id == stale_run).count() > 0
+
+    archive_path = results[0]["archive"]
+    with gzip.open(archive_path, "rt") as archive:
+        tables = [json.loads(line)["table"] for line in archive]
+    assert tables.count("document_classifications") == archived_rows
+
+    assert retention.restore(engine, archive_path) == {
+        "classification_runs": 1, "document_classifications": archived_rows
+    }
+    db_session.expire_all()
+    restored_run = db_session.get(ClassificationRunModel, old_run)
+    assert restored_run.run_timestamp == old_month
+    assert db_session.query(ClassificationModel).filter(ClassificationModel.classification_run_id == old_run).count() == archived_rows
+
+    # Restoring twice skips rows that are already present
+    assert retention.restore(engine, archive_path) == {"classification_runs": 0, "document_classifications": 0}
+
+
+def test_archive_with_nothing_old_writes_no_files(engine, db_session, tmp_path):
+    seed_lc(db_session, "RET-C", num_requirements=1, num_docs=2)
+    assert retention.archive_older_than(engine, datetime.utcnow() - timedelta(days=30), str(tmp_path)) == []
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_month_arithmetic_crosses_years():
+    assert retention.add_months(datetime(2025, 11, 1), 3) == datetime(2026, 2, 1)
+    assert retention.partition_name(datetime(2026, 2, 1)) == "document_classifications_p202602"
+
+
+def test_archiving_a_month_again_keeps_the_first_archive(engine, db_session, tmp_path):
+    old_month = datetime(2024, 3, 10)
+    lc_id = seed_lc(db_session, "RET-D", num_requirements=1, num_docs=2)
+    first_run = runs_of(db_session, lc_id)[0].id
+    second_run = add_run(db_session, lc_id)
+    age_run(db_session, first_run, old_month)
+    age_run(db_session, second_run, old_month)
+    cutoff = datetime.utcnow() - timedelta(days=30)
+
+    first = retention.archive_older_than(engine, cutoff, str(tmp_path))
+    # The second run is the LC's latest until a newer one arrives
+    add_run(db_session, lc_id)
+    second = retention.archive_older_than(engine, cutoff, str(tmp_path))
+
+    assert [result["classification_runs"] for result in first + second] == [1, 1]
+    assert first[0]["archive"] != second[0]["archive"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "document_classifications_2024_03.ndjson.gz", "document_classifications_2024_03_2.ndjson.gz"
+    ]
+    assert retention.restore(engine, first[0]["archive"])["classification_runs"] == 1
+
+
+def test_supervisor_creates_partitions_when_due(monkeypatch):
+    calls = []
+    monkeypatch.setattr(serve, "create_partitions", lambda: calls.append(True))
+    monkeypatch.setattr(serve, "PARTITION_CHECK_HOURS", 24)
+    supervisor = serve.WorkerSupervisor.__new__(serve.WorkerSupervisor)
+
+    supervisor.next_maintenance = time.monotonic() + 3600
+    supervisor.run_maintenance()
+    assert calls == []
+
+    supervisor.next_maintenance = time.monotonic() - 1
+    supervisor.run_maintenance()
+    supervisor.run_maintenance()
+    assert calls == [True]
+    assert supervisor.next_maintenance > time.monotonic() + 23 * 3600
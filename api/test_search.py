@@ -0,0 +1,79 @@
+"""
+Tests for /search (the substring fallback, as the test database is SQLite)
+"""
+
+from conftest import seed_lc
+from models import ExportDocument as ExportDocModel, LetterOfCredit as LCModel
+
+
+def seed_searchable(db):
+    first = seed_lc(db, "SR-A", num_requirements=2, num_docs=4)
+    second = seed_lc(db, "SR-B", num_requirements=1, num_docs=2)
+    docs = db.query(ExportDocModel).order_by(ExportDocModel.id).all()
+    docs[0].document_name = "Bill of Lading MAEU123456789"
+    docs[0].full_description = "Shipped clean on board at Hamburg"
+    docs[1].summary = "Commercial invoice, marked clean on board"
+    docs[4].full_description = "Clean on board bill of lading, 50% off"
+    lc = db.get(LCModel, first)
+    lc.goods_description = "Frozen shrimp, clean on board required"
+    db.commit()
+    return first, second, docs
+
+
+def test_search_matches_phrases_across_documents_and_lc_clauses(client, db_session):
+    first, second, docs = seed_searchable(db_session)
+
+    results = client.get("/search", params={"q": '"clean on board"'}).json()
+    assert {(result["kind"], result["id"]) for result in results} == {
+        ("export_document", docs[0].id), ("export_document", docs[1].id),
+        ("export_document", docs[4].id), ("lc", first)
+    }
+    lc_hit = next(result for result in results if result["kind"] == "lc")
+    assert lc_hit["lc_id"] == first and lc_hit["title"] == "SR-A"
+    assert "clean on board" in lc_hit["snippet"]
+
+    # A B/L number hits the document title and ranks first
+    results = client.get("/search", params={"q": "maeu123456789"}).json()
+    assert [(result["kind"], result["id"]) for result in results] == [("export_document", docs[0].id)]
+    assert results[0]["rank"] > 0
+
+
+def test_search_scoping_exclusions_and_validation(client, db_session):
+    first, second, docs = seed_searchable(db_session)
+
+    scoped = client.get("/search", params={"q": "clean", "lc_id": second}).json()
+    assert [(result["kind"], result["id"]) for result in scoped] == [("export_document", docs[4].id)]
+
+    only_lcs = client.get("/search", params={"q": "clean", "kind": "lc"}).json()
+    assert [result["kind"] for result in only_lcs] == ["lc"]
+
+    excluded = client.get("/search", params={"q": "clean -invoice", "kind": "export_document"}).json()
+    assert docs[1].id not in [result["id"] for result in excluded]
+
+    # LIKE wildcards in the query are matched literally
+    assert [result["id"] for result in client.get("/search", params={"q": "50%"}).json()] == [docs[4].id]
+
+    requirements = client.get("/search", params={"q": "SR-B requirement"}).json()
+    assert [(result["kind"], result["lc_id"]) for result in requirements] == [("lc_requirement", second)]
+
+    assert client.get("/search", params={"q": "clean", "kind": "bogus"}).status_code == 400
+    assert client.get("/search", params={"q": " "}).status_code == 400
+
+
+def test_search_pages_with_a_cursor(client, db_session):
+    seed_searchable(db_session)
+
+    expected = client.get("/search", params={"q": "clean"}).json()
+    seen, cursor = [], None
+    while True:
+        params = {"q": "clean", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/search", params=params)
+        assert page.status_code == 200
+        seen += page.json()
+        cursor = page.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert seen == expected
+    assert client.get("/search", params={"q": "clean", "cursor": "garbage"}).status_code == 400
@@ -0,0 +1,46 @@
+"""
+The fast serialization path must produce the same JSON as pydantic validation
+"""
+
+import pytest
+
+import serialization
+from conftest import seed_lc
+from response_cache import response_cache
+
+
+def get_both(client, monkeypatch, url):
+    """Fetch a URL with the standard path and then the fast path"""
+    results = []
+    for fast in (False, True):
+        monkeypatch.setattr(serialization, "FAST_SERIALIZATION", fast)
+        response_cache.clear()
+        response = client.get(url)
+        assert response.status_code == 200
+        results.append(response)
+    return results
+
+
+@pytest.mark.parametrize("path", [
+    "/lcs/?limit=1",
+    "/lcs/{lc_id}",
+    "/export-documents/?limit=3",
+    "/classification-runs/",
+    "/classifications/{lc_id}",
+])
+def test_fast_path_matches_validated_output(client, db_session, monkeypatch, path):
+    lc_id = seed_lc(db_session, "SER-A", num_requirements=3, num_docs=6)
+    seed_lc(db_session, "SER-B", num_requirements=2, num_docs=2)
+
+    standard, fast = get_both(client, monkeypatch, path.format(lc_id=lc_id))
+    assert fast.json() == standard.json()
+    assert fast.headers.get("x-next-cursor") == standard.headers.get("x-next-cursor")
+
+
+def test_field_plan_follows_nested_models():
+    from schemas import ClassificationRun
+
+    plan = {name: nested for name, _, nested, _ in serialization.field_plan(ClassificationRun)}
+    classification_plan = {name: nested for name, _, nested, _ in plan["classifications"]}
+    assert classification_plan["export_document"] is not None
+    assert plan["status"] is None
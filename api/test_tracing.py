@@ -0,0 +1,76 @@
+"""
+Tests for request, SQL and background classification tracing
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanKind
+
+import classifier_runner
+import tracing
+from conftest import seed_lc
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+TRACEPARENT = f"00-{TRACE_ID}-00f067aa0ba902b7-01"
+
+
+@pytest.fixture(scope="module")
+def exporter():
+    span_exporter = InMemorySpanExporter()
+    tracing.setup_tracing(span_exporter, batch=False)
+    return span_exporter
+
+
+@pytest.fixture
+def spans(exporter, engine, async_engine):
+    tracing.instrument_engine(engine)
+    tracing.instrument_engine(async_engine.sync_engine)
+    exporter.clear()
+    yield exporter
+    exporter.clear()
+
+
+def test_request_continues_traceparent_and_records_sql(client, db_session, spans):
+    lc_id = seed_lc(db_session, "TRC-A", num_requirements=1, num_docs=1)
+    spans.clear()
+
+    response = client.get(f"/lcs/{lc_id}", headers={"traceparent": TRACEPARENT})
+    assert response.status_code == 200
+    assert response.headers[tracing.TRACE_ID_HEADER] == TRACE_ID
+
+    finished = spans.get_finished_spans()
+    server = next(span for span in finished if span.kind == SpanKind.SERVER)
+    assert server.name == "GET /lcs/{lc_id}"
+    assert server.attributes["http.response.status_code"] == 200
+    assert format(server.context.trace_id, "032x") == TRACE_ID
+
+    queries = [span for span in finished if span.kind == SpanKind.CLIENT]
+    assert queries and all(span.context.trace_id == server.context.trace_id for span in queries)
+    assert any(span.name == "SELECT" for span in queries)
+
+
+def test_sql_outside_a_trace_is_not_recorded(db_session, spans):
+    seed_lc(db_session, "TRC-B", num_requirements=1, num_docs=1)
+    assert spans.get_finished_spans() == ()
+
+
+def test_classification_run_span_is_parented_to_submitting_request(spans, monkeypatch):
+    seen = {}
+
+    def fake_classify(run_id, lc_id, total_documents, export_document_ids, on_finish):
+        seen["trace_id"] = tracing.current_trace_id()
+
+    monkeypatch.setattr(classifier_runner, "_classify", fake_classify)
+
+    with tracing.tracer.start_as_current_span("request") as request_span:
+        request_trace_id = tracing.current_trace_id()
+        parent = tracing.current_context()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            executor.submit(classifier_runner._run_classification, 7, 3, 2, None, None, parent).result()
+
+    assert seen["trace_id"] == request_trace_id
+    run_span = next(span for span in spans.get_finished_spans() if span.name == "classification.run")
+    assert run_span.parent.span_id == request_span.get_span_context().span_id
+    assert run_span.attributes["classification.run_id"] == 7
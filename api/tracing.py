@@ -0,0 +1,158 @@
+"""
+OpenTelemetry tracing for the API
+Spans cover request handling, document extraction, PDF parsing, classifier graph nodes, LLM calls
+and SQL statements. Exporters work offline: TRACING_EXPORTER=console writes spans to stdout and
+TRACING_EXPORTER=file appends one JSON span per line to TRACING_FILE.
+TRACING_SAMPLE_RATIO samples new traces at the head; child spans follow their parent's decision
+"""
+
+import os
+from typing import Optional
+
+from opentelemetry import context as otel_context
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SimpleSpanProcessor,
+    SpanExporter
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from sqlalchemy import event
+
+from metrics import route_template
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")
+TRACING_FILE = os.getenv("TRACING_FILE", "traces.jsonl")
+TRACING_SAMPLE_RATIO = float(os.getenv("TRACING_SAMPLE_RATIO", "1.0"))
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "lc-scanner-api")
+
+TRACE_ID_HEADER = "X-Trace-Id"
+# Longest SQL statement recorded on a span
+MAX_STATEMENT_LENGTH = 1000
+
+tracer = trace.get_tracer("lc_scanner.api")
+
+
+def _exporter_from_env() -> Optional[SpanExporter]:
+    if TRACING_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    if TRACING_EXPORTER == "file":
+        trace_file = open(TRACING_FILE, "a", encoding="utf-8")
+        return ConsoleSpanExporter(out=trace_file, formatter=lambda span: span.to_json(indent=None) + "\n")
+    return None
+
+
+def setup_tracing(exporter: Optional[SpanExporter] = None, batch: bool = True) -> Optional[TracerProvider]:
+    """
+    Install the SDK tracer provider with ratio-based head sampling and the configured exporter
+    Spans stay no-ops when there is no exporter; a second call adds the exporter to the existing provider
+    """
+    exporter = exporter or _exporter_from_env()
+    if exporter is None:
+        return None
+    processor = BatchSpanProcessor(exporter) if batch else SimpleSpanProcessor(exporter)
+
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        provider = TracerProvider(
+            resource=Resource.create({"service.name": SERVICE_NAME}),
+            sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO))
+        )
+        trace.set_tracer_provider(provider)
+    provider.add_span_processor(processor)
+    return provider
+
+
+def flush():
+    """Export spans still buffered by batch processors, e.g. before the worker exits"""
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, TracerProvider):
+        provider.force_flush()
+
+
+def current_trace_id() -> Optional[str]:
+    """Hex trace id of the active span if it is being recorded"""
+    span_context = trace.get_current_span().get_span_context()
+    if not span_context.is_valid or not span_context.trace_flags.sampled:
+        return None
+    return format(span_context.trace_id, "032x")
+
+
+def current_context():
+    """Context to parent spans started on another thread"""
+    return otel_context.get_current()
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a server span per request, continuing an incoming traceparent"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        method = scope["method"]
+        route = route_template(scope)
+
+        with tracer.start_as_current_span(
+            f"{method} {route}",
+            context=propagate.extract(headers),
+            kind=SpanKind.SERVER,
+            attributes={"http.request.method": method, "http.route": route, "url.path": scope["path"]}
+        ) as span:
+            trace_id = current_trace_id()
+
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    status = message["status"]
+                    span.set_attribute("http.response.status_code", status)
+                    if status >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                    if trace_id:
+                        message["headers"] = list(message.get("headers", [])) + [
+                            (TRACE_ID_HEADER.lower().encode("latin-1"), trace_id.encode("latin-1"))
+                        ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
+
+
+def instrument_engine(engine):
+    """Record a client span for every SQL statement executed inside a sampled trace"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is None or not trace.get_current_span().is_recording():
+            return
+        context._otel_span = tracer.start_span(
+            statement.split(None, 1)[0].upper() if statement else "SQL",
+            kind=SpanKind.CLIENT,
+            attributes={
+                "db.system": engine.dialect.name,
+                "db.statement": statement[:MAX_STATEMENT_LENGTH]
+            }
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        span = getattr(context, "_otel_span", None)
+        if span is not None:
+            span.end()
+            context._otel_span = None
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        span = getattr(exception_context.execution_context, "_otel_span", None)
+        if span is not None:
+            span.record_exception(exception_context.original_exception)
+            span.set_status(Status(StatusCode.ERROR))
+            span.end()
+            exception_context.execution_context._otel_span = None
@@ -4,11 +4,16 @@ import os
 import base64
 import json
 import re
+import time
+import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Union, Any
+from typing import Union, Any, Callable, List, Optional
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
+from langchain_core.outputs import LLMResult
 from langchain_core.prompts import ChatPromptTemplate
+from opentelemetry import trace
 
 from ..utils.pdf_extractor import PDFExtractor
 from ..schemas.base import BaseDocumentSchema
@@ -17,23 +22,40 @@ from ..schemas.default import DefaultDocumentSchema
 # Load environment variables
 load_dotenv()
 
+tracer = trace.get_tracer("document_extraction_service")
+
+# Seconds to wait for the provider before giving up on a call
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+OCR_TIMEOUT_SECONDS = float(os.getenv("LLM_OCR_TIMEOUT_SECONDS", "300"))
+
 
 class DocumentExtractor:
     """Configurable PDF document extraction service using OpenRouter and Gemini via LangChain."""
     
-    def __init__(self, api_key: str = None, model: str = "google/gemini-2.0-flash-001"):
+    def __init__(self, api_key: str = None, model: str = "google/gemini-2.0-flash-001",
+                 callbacks: Optional[List[Any]] = None,
+                 on_stage: Optional[Callable[[str, float], None]] = None,
+                 timeout: float = None, ocr_timeout: float = None):
         """
         Initialize the DocumentExtractor.
         
         Args:
             api_key: OpenRouter API key. If not provided, will look for OPENROUTER_API_KEY env var.
             model: Model to use for analysis (default: google/gemini-2.0-flash-001)
+            callbacks: Optional LangChain callback handlers passed to every LLM call
+            on_stage: Optional callable receiving (stage, seconds) for the parse, llm and ocr stages
+            timeout: Seconds to wait for a text analysis call (default: LLM_TIMEOUT_SECONDS env var or 120)
+            ocr_timeout: Seconds to wait for an OCR upload call (default: LLM_OCR_TIMEOUT_SECONDS env var or 300)
         """
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         if not self.api_key:
             raise ValueError("OpenRouter API key is required. Set OPENROUTER_API_KEY env var or pass api_key parameter.")
         
         self.model = model
+        self.callbacks = callbacks or []
+        self.on_stage = on_stage
+        self.timeout = timeout or LLM_TIMEOUT_SECONDS
+        self.ocr_timeout = ocr_timeout or OCR_TIMEOUT_SECONDS
         
         # Initialize the ChatOpenAI model with OpenRouter base URL for Gemini
         self.llm = ChatOpenAI(
@@ -42,6 +64,8 @@ class DocumentExtractor:
             base_url="https://openrouter.ai/api/v1",
             temperature=0,
             max_tokens=4000,
+            timeout=self.timeout,
+            max_retries=1,
             model_kwargs={
                 "extra_headers": {
                     "HTTP-Referer": "https://github.com/document-extraction-service",
@@ -50,6 +74,7 @@ class DocumentExtractor:
             }
         )
     
+    @tracer.start_as_current_span("extraction.extract")
     def extract(self, 
                 file_path: Union[str, Path], 
                 schema: BaseDocumentSchema = None,
@@ -84,14 +109,15 @@ class DocumentExtractor:
         
         try:
             # First try to extract text from PDF
-            document_text = PDFExtractor.extract_text_from_file(file_path)
+            with self._stage("parse"):
+                document_text = PDFExtractor.extract_text_from_file(file_path)
+                
+                # Get page count
+                page_count = PDFExtractor.get_page_count(file_path)
             
             if not document_text.strip():
                 raise Exception("No text content found in the PDF file")
             
-            # Get page count
-            page_count = PDFExtractor.get_page_count(file_path)
-            
             # Use text-based analysis with LangChain structured output
             structured_llm = self.llm.with_structured_output(schema.schema_class)
             
@@ -113,18 +139,20 @@ Provide your analysis in the exact structured format specified.""")
             
             analysis_chain = prompt | structured_llm
             
-            result = analysis_chain.invoke({
-                "document_text": document_text,
-                "filename": display_filename,
-                "page_count": page_count,
-                "analysis_instructions": schema.prompt_template
-            })
+            with self._stage("llm"):
+                result = analysis_chain.invoke({
+                    "document_text": document_text,
+                    "filename": display_filename,
+                    "page_count": page_count,
+                    "analysis_instructions": schema.prompt_template
+                }, config={"callbacks": self.callbacks})
             
         except Exception as e:
             if "No text content found" in str(e):
                 # If no text is extractable, try PDF upload with OCR
                 print("📄 No extractable text found - trying OCR via file upload...")
-                result = self._extract_with_upload(file_path, schema, display_filename)
+                with self._stage("ocr"):
+                    result = self._extract_with_upload(file_path, schema, display_filename)
             else:
                 raise Exception(f"Error extracting from PDF: {str(e)}")
         
@@ -134,6 +162,7 @@ Provide your analysis in the exact structured format specified.""")
             
         return result
     
+    @tracer.start_as_current_span("extraction.extract")
     def extract_bytes(self, 
                      pdf_bytes: bytes, 
                      schema: BaseDocumentSchema = None,
@@ -159,7 +188,8 @@ Provide your analysis in the exact structured format specified.""")
             
         try:
             # Extract text from PDF bytes
-            document_text = PDFExtractor.extract_text_from_bytes(pdf_bytes)
+            with self._stage("parse"):
+                document_text = PDFExtractor.extract_text_from_bytes(pdf_bytes)
             
             if not document_text.strip():
                 raise Exception("No text content found in the PDF file")
@@ -188,12 +218,13 @@ Provide your analysis in the exact structured format specified.""")
             
             analysis_chain = prompt | structured_llm
             
-            result = analysis_chain.invoke({
-                "document_text": document_text,
-                "filename": filename,
-                "page_count": page_count,
-                "analysis_instructions": schema.prompt_template
-            })
+            with self._stage("llm"):
+                result = analysis_chain.invoke({
+                    "document_text": document_text,
+                    "filename": filename,
+                    "page_count": page_count,
+                    "analysis_instructions": schema.prompt_template
+                }, config={"callbacks": self.callbacks})
             
         except Exception as e:
             if "No text content found" in str(e):
@@ -232,7 +263,8 @@ Provide your analysis in the exact structured format specified.""")
             client = openai.OpenAI(
                 api_key=self.api_key,
                 base_url="https://openrouter.ai/api/v1",
-                timeout=600.0
+                timeout=self.ocr_timeout,
+                max_retries=0
             )
             
             # Check file size and inform user
@@ -240,32 +272,38 @@ Provide your analysis in the exact structured format specified.""")
             print(f"📤 Uploading entire PDF ({file_size_mb:.1f}MB) for complete OCR analysis...")
             print("⏳ This may take a few minutes for large files...")
             
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": schema.get_analysis_prompt(filename)
-                            },
-                            {
-                                "type": "file",
-                                "file": {
-                                    "filename": filename,
-                                    "file_data": data_url
+            run_id = self._report_llm_start()
+            try:
+                response = client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": [
+                                {
+                                    "type": "text",
+                                    "text": schema.get_analysis_prompt(filename)
+                                },
+                                {
+                                    "type": "file",
+                                    "file": {
+                                        "filename": filename,
+                                        "file_data": data_url
+                                    }
                                 }
-                            }
-                        ]
-                    }
-                ],
-                extra_headers={
-                    "HTTP-Referer": "https://github.com/document-extraction-service",
-                    "X-Title": "Document Extraction Service"
-                },
-                timeout=600.0
-            )
+                            ]
+                        }
+                    ],
+                    extra_headers={
+                        "HTTP-Referer": "https://github.com/document-extraction-service",
+                        "X-Title": "Document Extraction Service"
+                    },
+                    timeout=self.ocr_timeout
+                )
+            except Exception as e:
+                self._report_llm_error(run_id, e)
+                raise
+            self._report_llm_end(run_id, response)
             
             # Parse the JSON response
             response_text = response.choices[0].message.content
@@ -291,6 +329,41 @@ Provide your analysis in the exact structured format specified.""")
         except Exception as e:
             raise Exception(f"Error extracting with upload: {str(e)}")
     
+    @contextmanager
+    def _stage(self, stage: str):
+        """Trace a block as an extraction.<stage> span and report its duration to the on_stage callback."""
+        started = time.perf_counter()
+        try:
+            with tracer.start_as_current_span(f"extraction.{stage}", attributes={"llm.model": self.model}):
+                yield
+        finally:
+            if self.on_stage:
+                self.on_stage(stage, time.perf_counter() - started)
+    
+    def _report_llm_start(self) -> uuid.UUID:
+        """Tell LangChain callbacks about an LLM call made with the raw OpenAI client."""
+        run_id = uuid.uuid4()
+        for callback in self.callbacks:
+            if hasattr(callback, "on_llm_start"):
+                callback.on_llm_start({}, [], run_id=run_id, invocation_params={"model": self.model})
+        return run_id
+    
+    def _report_llm_end(self, run_id: uuid.UUID, response: Any) -> None:
+        usage = getattr(response, "usage", None)
+        token_usage = {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0
+        }
+        result = LLMResult(generations=[], llm_output={"token_usage": token_usage, "model_name": self.model})
+        for callback in self.callbacks:
+            if hasattr(callback, "on_llm_end"):
+                callback.on_llm_end(result, run_id=run_id)
+    
+    def _report_llm_error(self, run_id: uuid.UUID, error: Exception) -> None:
+        for callback in self.callbacks:
+            if hasattr(callback, "on_llm_error"):
+                callback.on_llm_error(error, run_id=run_id)
+    
     def _extract_json_from_response(self, response_text: str) -> str:
         """Extract JSON content from LLM response."""
         original_text = response_text
@@ -1,13 +1,76 @@
 import io
+import mmap
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Union
+from typing import BinaryIO, Iterator, Union
+from opentelemetry import trace
 from pypdf import PdfReader
 
+tracer = trace.get_tracer("document_extraction_service.pdf")
+
 
 class PDFExtractor:
     """Simple PDF text extraction utility."""
     
     @staticmethod
+    @contextmanager
+    def open_mapped(file_path: Union[str, Path]) -> Iterator[BinaryIO]:
+        """
+        Open a PDF file as a read-only memory map.
+        
+        pypdf reads the map like a file, so pages come straight from the page cache
+        instead of being copied into Python buffers. Empty files cannot be mapped and
+        are opened normally.
+        
+        Args:
+            file_path: Path to the PDF file
+            
+        Yields:
+            A seekable, file-like view of the PDF content
+        """
+        with open(file_path, "rb") as f:
+            try:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                yield f
+                return
+            with mapped:
+                yield mapped
+    
+    @staticmethod
+    @tracer.start_as_current_span("pdf.extract_text")
+    def extract_text_from_stream(stream: BinaryIO) -> str:
+        """
+        Extract text from a seekable PDF stream, such as a memory map.
+        
+        Args:
+            stream: File-like object with read, seek and tell
+            
+        Returns:
+            Extracted text content as a string
+            
+        Raises:
+            Exception: If there's an error reading the PDF
+        """
+        try:
+            return PDFExtractor._extract_pages(PdfReader(stream))
+        except Exception as e:
+            raise Exception(f"Error extracting text from PDF: {str(e)}")
+    
+    @staticmethod
+    def _extract_pages(reader: PdfReader) -> str:
+        trace.get_current_span().set_attribute("pdf.pages", len(reader.pages))
+        text_content = []
+        
+        for page_num, page in enumerate(reader.pages, 1):
+            page_text = page.extract_text()
+            if page_text.strip():
+                text_content.append(f"--- Page {page_num} ---\n{page_text}\n")
+        
+        return "\n".join(text_content)
+    
+    @staticmethod
+    @tracer.start_as_current_span("pdf.extract_text")
     def extract_text_from_file(file_path: Union[str, Path]) -> str:
         """
         Extract text from a PDF file.
@@ -28,20 +91,14 @@ class PDFExtractor:
             raise FileNotFoundError(f"PDF file not found: {file_path}")
         
         try:
-            reader = PdfReader(str(file_path))
-            text_content = []
-            
-            for page_num, page in enumerate(reader.pages, 1):
-                page_text = page.extract_text()
-                if page_text.strip():
-                    text_content.append(f"--- Page {page_num} ---\n{page_text}\n")
-            
-            return "\n".join(text_content)
+            with PDFExtractor.open_mapped(file_path) as stream:
+                return PDFExtractor._extract_pages(PdfReader(stream))
             
         except Exception as e:
             raise Exception(f"Error extracting text from PDF: {str(e)}")
     
     @staticmethod
+    @tracer.start_as_current_span("pdf.extract_text")
     def extract_text_from_bytes(pdf_bytes: bytes) -> str:
         """
         Extract text from PDF bytes.
@@ -56,15 +113,7 @@ class PDFExtractor:
             Exception: If there's an error reading the PDF
         """
         try:
-            reader = PdfReader(io.BytesIO(pdf_bytes))
-            text_content = []
-            
-            for page_num, page in enumerate(reader.pages, 1):
-                page_text = page.extract_text()
-                if page_text.strip():
-                    text_content.append(f"--- Page {page_num} ---\n{page_text}\n")
-            
-            return "\n".join(text_content)
+            return PDFExtractor._extract_pages(PdfReader(io.BytesIO(pdf_bytes)))
             
         except Exception as e:
             raise Exception(f"Error extracting text from PDF bytes: {str(e)}")
@@ -81,7 +130,7 @@ class PDFExtractor:
             Number of pages in the PDF
         """
         try:
-            reader = PdfReader(str(file_path))
-            return len(reader.pages)
+            with PDFExtractor.open_mapped(file_path) as stream:
+                return len(PdfReader(stream).pages)
         except Exception:
             return 0
\ No newline at end of file
@@ -3,17 +3,19 @@ Database service layer for LangGraph classification system
 Provides database access functions for LC and export document data
 """
 
+import functools
 import sys
 import os
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
+from opentelemetry import trace
 from sqlalchemy.orm import Session
 
 # Add the API directory to the Python path
 api_dir = Path(__file__).parent.parent / "api"
 sys.path.append(str(api_dir))
 
-from database import SessionLocal, engine
+from database import SessionLocal, engine, replica_reads
 from models import (
     LetterOfCredit as LCModel,
     LCDocumentRequirement as LCRequirementModel,
@@ -22,6 +24,16 @@ from models import (
     DocumentClassification as ClassificationModel
 )
 
+tracer = trace.get_tracer("lc_document_classifier.db_service")
+
+def replica_read(method):
+    """Run a read-only service method against a read replica when one is configured"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with replica_reads(self.session):
+            return method(self, *args, **kwargs)
+    return wrapper
+
 class LCDatabaseService:
     """Database service for LC document classification"""
     
@@ -39,10 +51,13 @@ class LCDatabaseService:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
     
+    @replica_read
     def get_lc_by_reference(self, lc_reference: str) -> Optional[LCModel]:
         """Get LC by reference number"""
         return self.session.query(LCModel).filter(LCModel.lc_reference == lc_reference).first()
     
+    @tracer.start_as_current_span("db_service.get_lc_requirements_data")
+    @replica_read
     def get_lc_requirements_data(self, lc_reference: str) -> Tuple[List[Dict], str]:
         """
         Get LC requirements in the format expected by LangGraph
@@ -64,21 +79,25 @@ class LCDatabaseService:
         
         return requirements, lc.lc_reference
     
-    def get_export_documents_data(self, lc_reference: str = None) -> Dict[str, Any]:
+    @tracer.start_as_current_span("db_service.get_export_documents_data")
+    @replica_read
+    def get_export_documents_data(self, lc_reference: str = None,
+                                  export_document_ids: Optional[List[int]] = None) -> Dict[str, Any]:
         """
         Get export documents in the format expected by LangGraph
+        Optionally restricted to the given export document database IDs
         Returns: documents data with metadata
         """
+        # Get all export documents if no LC reference provided
+        query = self.session.query(ExportDocModel)
         if lc_reference:
             # Filter export documents by LC reference
             lc = self.get_lc_by_reference(lc_reference)
-            if lc:
-                export_docs = self.session.query(ExportDocModel).filter(ExportDocModel.lc_id == lc.id).all()
-            else:
-                export_docs = []
-        else:
-            # Get all export documents if no LC reference provided
-            export_docs = self.session.query(ExportDocModel).all()
+            query = query.filter(ExportDocModel.lc_id == lc.id) if lc else None
+        if query is not None and export_document_ids:
+            query = query.filter(ExportDocModel.id.in_(export_document_ids))
+        
+        export_docs = query.order_by(ExportDocModel.id).all() if query is not None else []
         
         documents = []
         for doc in export_docs:
@@ -106,6 +125,7 @@ class LCDatabaseService:
             }
         }
     
+    @tracer.start_as_current_span("db_service.create_classification_run")
     def create_classification_run(self, lc_reference: str, total_export_docs: int, 
                                 total_lc_requirements: int, model_used: str = "langraph_classification") -> ClassificationRunModel:
         """Create a new classification run record"""
@@ -126,12 +146,14 @@ class LCDatabaseService:
         self.session.refresh(run)
         return run
     
+    @tracer.start_as_current_span("db_service.save_classification")
     def save_classification(self, classification_run_id: int, export_document_id: str, 
                           lc_requirement_id: str, confidence: float, reasoning: str, 
-                          is_matched: bool) -> Tuple[ClassificationModel, ExportDocModel]:
+                          is_matched: bool, lc_reference: str = None) -> Tuple[ClassificationModel, ExportDocModel]:
         """
         Save a single classification result
         Updates both the DocumentClassification table and ExportDocument table
+        Requirement IDs like "doc_001" repeat across LCs, so pass lc_reference to scope the lookup
         """
         
         # Get the actual database records from the string IDs
@@ -142,9 +164,12 @@ class LCDatabaseService:
         if not export_doc:
             raise ValueError(f"Export document with ID {export_document_id} not found")
         
-        lc_req = self.session.query(LCRequirementModel).filter(
+        lc_req_query = self.session.query(LCRequirementModel).filter(
             LCRequirementModel.document_id == lc_requirement_id
-        ).first()
+        )
+        if lc_reference:
+            lc_req_query = lc_req_query.join(LCModel).filter(LCModel.lc_reference == lc_reference)
+        lc_req = lc_req_query.first()
         
         if not lc_req:
             raise ValueError(f"LC requirement with ID {lc_requirement_id} not found")
@@ -172,6 +197,7 @@ class LCDatabaseService:
         
         return classification, export_doc
     
+    @tracer.start_as_current_span("db_service.update_classification_run_status")
     def update_classification_run_status(self, run_id: int, status: str, 
                                        total_matches_found: int = None) -> ClassificationRunModel:
         """Update classification run status and statistics"""
@@ -190,6 +216,8 @@ class LCDatabaseService:
         self.session.refresh(run)
         return run
     
+    @tracer.start_as_current_span("db_service.get_classification_results")
+    @replica_read
     def get_classification_results(self, run_id: int) -> List[Dict]:
         """Get classification results for a run in the format expected by LangGraph"""
         classifications = self.session.query(ClassificationModel).filter(
@@ -210,6 +238,7 @@ class LCDatabaseService:
         
         return results
     
+    @replica_read
     def get_latest_classification_run(self, lc_reference: str) -> Optional[ClassificationRunModel]:
         """Get the latest classification run for an LC"""
         lc = self.get_lc_by_reference(lc_reference)
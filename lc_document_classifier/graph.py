@@ -5,6 +5,8 @@ Classifies export documents into LC required document categories
 
 import json
 import os
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
 from typing import Optional
 from langgraph.graph import StateGraph, START, END
@@ -15,11 +17,13 @@ from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
 from langfuse import Langfuse
 from langfuse.langchain import CallbackHandler
+from opentelemetry import trace
 from db_service import LCDatabaseService, create_db_service
 # Import models for type checking
 import sys
 sys.path.append(str(Path(__file__).parent.parent / "api"))
 from models import LetterOfCredit as LCModel
+import embeddings
 
 # Load environment variables
 load_dotenv()
@@ -27,17 +31,53 @@ load_dotenv()
 # Initialize Langfuse
 langfuse = Langfuse()
 langfuse_handler = CallbackHandler()
+tracer = trace.get_tracer("lc_document_classifier.graph")
+
+# Seconds to wait for the provider before a classification call is treated as failed
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "120"))
+# Requirements offered to the LLM per document, shortlisted by local embedding similarity (0 sends all)
+CLASSIFIER_CANDIDATES = int(os.getenv("CLASSIFIER_CANDIDATES", "8"))
 
 # Shared database service instance
 _db_service = None
 
+# Database service bound to the current classification run (set by API background workers)
+_run_db_service: ContextVar[Optional[LCDatabaseService]] = ContextVar("run_db_service", default=None)
+
 def get_shared_db_service():
-    """Get or create a shared database service instance"""
+    """Get the database service bound to this run, or create a shared one"""
+    run_db_service = _run_db_service.get()
+    if run_db_service is not None:
+        return run_db_service
+    
     global _db_service
     if _db_service is None:
         _db_service = create_db_service()
     return _db_service
 
+@contextmanager
+def bound_db_service():
+    """Bind a dedicated database service to the current context for one classification run"""
+    db_service = create_db_service()
+    token = _run_db_service.set(db_service)
+    try:
+        yield db_service
+    finally:
+        _run_db_service.reset(token)
+        db_service.close()
+
+# Extra LangChain callbacks for LLM calls made in the current context (e.g. API metrics)
+_run_callbacks: ContextVar[tuple] = ContextVar("run_callbacks", default=())
+
+@contextmanager
+def bound_callbacks(callbacks):
+    """Add LangChain callbacks to the classifier's LLM calls for the current context"""
+    token = _run_callbacks.set(tuple(callbacks))
+    try:
+        yield
+    finally:
+        _run_callbacks.reset(token)
+
 def close_shared_db_service():
     """Close the shared database service"""
     global _db_service
@@ -60,7 +100,8 @@ class ClassificationState(TypedDict):
     trace_id: str  # Add trace ID to state
     # Database-related fields
     lc_id: Optional[str]  # LC database ID (used to identify which LC to process)
-    classification_run_id: Optional[str]  # Classification run ID
+    classification_run_id: Optional[str]  # Classification run ID (created here unless provided)
+    export_document_ids: Optional[list]  # Restrict classification to these export document IDs
 
 
 # Pydantic model for structured output
@@ -83,7 +124,9 @@ def get_langchain_llm():
             return ChatOpenAI(
                 model="gpt-4o-mini",
                 temperature=0,
-                api_key=openai_api_key
+                api_key=openai_api_key,
+                timeout=LLM_TIMEOUT_SECONDS,
+                max_retries=1
             )
         
         # Fallback to OpenRouter
@@ -93,7 +136,9 @@ def get_langchain_llm():
                 model="openai/gpt-4o-mini",
                 temperature=0,
                 api_key=openrouter_api_key,
-                base_url="https://openrouter.ai/api/v1"
+                base_url="https://openrouter.ai/api/v1",
+                timeout=LLM_TIMEOUT_SECONDS,
+                max_retries=1
             )
         
         print("⚠️  No API key found")
@@ -104,6 +149,7 @@ def get_langchain_llm():
         return None
 
 
+@tracer.start_as_current_span("graph.load_lc_requirements")
 def load_lc_requirements(state: ClassificationState) -> ClassificationState:
     """Load LC requirements from database using lc_id"""
     
@@ -153,6 +199,7 @@ def load_lc_requirements(state: ClassificationState) -> ClassificationState:
         return {**state, "error": f"Failed to load LC requirements: {e}"}
 
 
+@tracer.start_as_current_span("graph.load_export_documents")
 def load_export_documents(state: ClassificationState) -> ClassificationState:
     """Load export documents from database using lc_reference"""
     
@@ -167,7 +214,10 @@ def load_export_documents(state: ClassificationState) -> ClassificationState:
         db_service = get_shared_db_service()
         
         # Get export documents from database for this specific LC
-        export_data = db_service.get_export_documents_data(lc_reference=lc_reference)
+        export_data = db_service.get_export_documents_data(
+            lc_reference=lc_reference,
+            export_document_ids=state.get("export_document_ids")
+        )
         documents = export_data.get("documents", [])
         
         print(f"✅ Loaded {len(documents)} export documents:")
@@ -177,9 +227,12 @@ def load_export_documents(state: ClassificationState) -> ClassificationState:
         if len(documents) > 3:
             print(f"   ... and {len(documents) - 3} more")
         
-        # Create classification run for tracking
+        # Create classification run for tracking, unless the caller already created one
         lc_requirements = state.get("lc_requirements", [])
-        if lc_id and lc_requirements:
+        classification_run_id = state.get("classification_run_id")
+        if classification_run_id:
+            print(f"✅ Using classification run: {classification_run_id}")
+        elif lc_id and lc_requirements:
             try:
                 run = db_service.create_classification_run(
                     lc_reference=lc_reference,
@@ -211,6 +264,7 @@ def load_export_documents(state: ClassificationState) -> ClassificationState:
         return {**state, "error": f"Failed to load export documents: {e}"}
 
 
+@tracer.start_as_current_span("graph.classify_current_document")
 def classify_current_document(state: ClassificationState) -> ClassificationState:
     """Classify current export document against LC requirements"""
     
@@ -232,6 +286,15 @@ def classify_current_document(state: ClassificationState) -> ClassificationState
     
     print(f"\n🔍 Classifying document {current_index + 1}/{len(documents)}: {doc_name}")
     
+    # Only the closest requirements go into the prompt; all of them when nothing overlaps at all
+    if 0 < CLASSIFIER_CANDIDATES < len(requirements):
+        index = embeddings.requirement_index(requirements)
+        query = embeddings.embed(embeddings.document_text(doc_name, doc_summary))
+        candidates = index.top_k(query, CLASSIFIER_CANDIDATES)[0]
+        if candidates and candidates[0][1] > 0:
+            requirements = [requirement for requirement, _ in candidates]
+            print(f"   🎯 Shortlisted {len(requirements)} of {len(index)} requirements")
+    
     # Create prompt with all LC requirements for LLM to choose from
     requirements_text = ""
     for i, requirement in enumerate(requirements, 1):
@@ -321,6 +384,7 @@ Example good matches:
     }
 
 
+@tracer.start_as_current_span("graph.record_and_continue")
 def record_and_continue(state: ClassificationState) -> ClassificationState:
     """Record the classification result and move to next document"""
     
@@ -329,52 +393,55 @@ def record_and_continue(state: ClassificationState) -> ClassificationState:
         classifications = state.get("classifications", [])
         classification_run_id = state.get("classification_run_id")
         
-        # Use the LC document details directly from the LLM response
-        if result["classified"]:
-            lc_document_id = result["best_match_id"]
-            lc_document_name = result["best_match_name"]
-        else:
-            lc_document_id = ""
-            lc_document_name = ""
-        
-        # Create classification record for this export document
-        classification_record = {
-            "export_document_id": result["document_id"],
-            "export_document_name": result["document_name"],
-            "lc_document_id": lc_document_id,
-            "lc_document_name": lc_document_name,
-            "confidence": result["confidence"],
-            "reasoning": result.get("reason", ""),
-            "is_classified": result["classified"]
-        }
-        
-        # Save to database if we have the necessary components
-        if classification_run_id and result["classified"] and lc_document_id != "OTHER":
-            try:
-                # Use shared database service for saving
-                db_service = get_shared_db_service()
-                db_classification, export_doc = db_service.save_classification(
-                    classification_run_id=int(classification_run_id),
-                    export_document_id=result["document_id"],
-                    lc_requirement_id=lc_document_id,
-                    confidence=result["confidence"],
-                    reasoning=result.get("reason", ""),
-                    is_matched=result["classified"]
-                )
-                print(f"✅ Saved classification to database: {db_classification.id}")
-            except Exception as e:
-                print(f"⚠️  Warning: Could not save classification to database: {e}")
-                # Continue with in-memory classification even if database save fails
-        
-        # Add to in-memory classifications list for backward compatibility
-        classifications.append(classification_record)
-        
-        print(f"📝 Stored classification record:")
-        print(f"   🆔 Export Doc ID: {classification_record['export_document_id']}")
-        print(f"   📄 Export Doc Name: {classification_record['export_document_name']}")
-        print(f"   🏷️  LC Doc ID: {classification_record['lc_document_id']}")
-        print(f"   📋 LC Doc Name: {classification_record['lc_document_name']}")
-        print(f"   ✅ Is Classified: {classification_record['is_classified']}")
+        # An empty result means there were no documents to classify - only finalize the run below
+        if result:
+            # Use the LC document details directly from the LLM response
+            if result["classified"]:
+                lc_document_id = result["best_match_id"]
+                lc_document_name = result["best_match_name"]
+            else:
+                lc_document_id = ""
+                lc_document_name = ""
+            
+            # Create classification record for this export document
+            classification_record = {
+                "export_document_id": result["document_id"],
+                "export_document_name": result["document_name"],
+                "lc_document_id": lc_document_id,
+                "lc_document_name": lc_document_name,
+                "confidence": result["confidence"],
+                "reasoning": result.get("reason", ""),
+                "is_classified": result["classified"]
+            }
+            
+            # Save to database if we have the necessary components
+            if classification_run_id and result["classified"] and lc_document_id != "OTHER":
+                try:
+                    # Use shared database service for saving
+                    db_service = get_shared_db_service()
+                    db_classification, export_doc = db_service.save_classification(
+                        classification_run_id=int(classification_run_id),
+                        lc_reference=state.get("lc_reference"),
+                        export_document_id=result["document_id"],
+                        lc_requirement_id=lc_document_id,
+                        confidence=result["confidence"],
+                        reasoning=result.get("reason", ""),
+                        is_matched=result["classified"]
+                    )
+                    print(f"✅ Saved classification to database: {db_classification.id}")
+                except Exception as e:
+                    print(f"⚠️  Warning: Could not save classification to database: {e}")
+                    # Continue with in-memory classification even if database save fails
+            
+            # Add to in-memory classifications list for backward compatibility
+            classifications.append(classification_record)
+            
+            print(f"📝 Stored classification record:")
+            print(f"   🆔 Export Doc ID: {classification_record['export_document_id']}")
+            print(f"   📄 Export Doc Name: {classification_record['export_document_name']}")
+            print(f"   🏷️  LC Doc ID: {classification_record['lc_document_id']}")
+            print(f"   📋 LC Doc Name: {classification_record['lc_document_name']}")
+            print(f"   ✅ Is Classified: {classification_record['is_classified']}")
         
         # Move to next document
         next_index = state["current_doc_index"] + 1
@@ -482,6 +549,7 @@ def initialize_graph_with_lc(lc_reference: str, trace_id: str = None) -> Classif
         }
 
 
+@tracer.start_as_current_span("graph.call_ai_classifier")
 def call_ai_classifier_with_selection(prompt: str, trace_id: str = None) -> dict:
     """AI classification call using LangChain with structured output"""
     
@@ -515,8 +583,8 @@ def call_ai_classifier_with_selection(prompt: str, trace_id: str = None) -> dict
         try:
             message = HumanMessage(content=prompt)
             
-            # Use langfuse callback handler
-            callbacks = [langfuse_handler]
+            # Use langfuse callback handler plus any callbacks bound by the caller
+            callbacks = [langfuse_handler, *_run_callbacks.get()]
             
             result = structured_llm.invoke([message], config={"callbacks": callbacks})
             
@@ -527,6 +595,7 @@ def call_ai_classifier_with_selection(prompt: str, trace_id: str = None) -> dict
                 
         except Exception as e:
             print(f"⚠️  LLM invocation failed: {e}")
+            trace.get_current_span().record_exception(e)
             fallback_response["reason"] = f"LLM invocation failed: {str(e)}"
             return fallback_response
         
@@ -12,5 +12,10 @@ fi
 
 # Navigate to API directory and start server
 cd api
-echo "✅ Starting FastAPI server on http://localhost:8000"
+if [ "$1" = "--prod" ]; then
+    # Preforked workers (WEB_CONCURRENCY, default one per CPU) with graceful shutdown
+    echo "✅ Starting production server on http://localhost:8000"
+    exec python serve.py
+fi
+echo "✅ Starting FastAPI server on http://localhost:8000 (development mode, use --prod for workers)"
 uvicorn main:app --host 0.0.0.0 --port 8000 --reload
\ No newline at end of file